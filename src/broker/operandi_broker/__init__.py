@@ -1,11 +1,13 @@
 __all__ = [
   "cli",
   "ServiceBroker",
-  "JobStatusWorker",
-  "Worker"
+  "JobStatusReconciler",
+  "Worker",
+  "WorkspaceImportWorker"
 ]
 
 from .cli import cli
 from .broker import ServiceBroker
-from .job_status_worker import JobStatusWorker
+from .job_status_reconciler import JobStatusReconciler
 from .worker import Worker
+from .workspace_import_worker import WorkspaceImportWorker
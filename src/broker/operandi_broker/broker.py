@@ -8,15 +8,16 @@ from operandi_utils import (
     get_log_file_path_prefix, reconfigure_all_loggers, verify_database_uri, verify_and_parse_mq_uri)
 from operandi_utils.constants import LOG_LEVEL_BROKER
 from operandi_utils.rabbitmq.constants import (
-    RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS, RABBITMQ_QUEUE_JOB_STATUSES)
+    RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS, RABBITMQ_QUEUE_WORKSPACE_IMPORTS)
 from .worker import Worker
-from .job_status_worker import JobStatusWorker
+from .job_status_reconciler import JobStatusReconciler, JOB_STATUS_RECONCILER_NAME
+from .workspace_import_worker import WorkspaceImportWorker
 
 
 class ServiceBroker:
     def __init__(
         self, db_url: str = environ.get("OPERANDI_DB_URL"), rabbitmq_url: str = environ.get("OPERANDI_RABBITMQ_URL"),
-        test_sbatch: bool = False
+        test_sbatch: bool = False, workspace_import_workers: int = 2
     ):
         if not db_url:
             raise ValueError("Environment variable not set: OPERANDI_DB_URL")
@@ -29,6 +30,7 @@ class ServiceBroker:
 
         self.log = getLogger("operandi_broker.service_broker")
         self.test_sbatch = test_sbatch
+        self.workspace_import_workers = workspace_import_workers
 
         try:
             self.db_url = verify_database_uri(db_url)
@@ -47,15 +49,19 @@ class ServiceBroker:
     def run_broker(self):
         # A list of queues for which a worker process should be created
         queues = [RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS]
-        status_queue = RABBITMQ_QUEUE_JOB_STATUSES
+        import_queue = RABBITMQ_QUEUE_WORKSPACE_IMPORTS
         try:
             for queue_name in queues:
                 self.log.info(f"Creating a worker process to consume from queue: {queue_name}")
                 self.create_worker_process(
                     queue_name=queue_name, status_checker=False, tunnel_port_executor=22, tunnel_port_transfer=22)
-            self.log.info(f"Creating a status worker process to consume from queue: {status_queue}")
+            self.log.info(f"Creating a job status reconciler process")
             self.create_worker_process(
-                queue_name=status_queue, status_checker=True, tunnel_port_executor=22, tunnel_port_transfer=22)
+                queue_name=JOB_STATUS_RECONCILER_NAME, status_checker=True, tunnel_port_executor=22,
+                tunnel_port_transfer=22)
+            for _ in range(self.workspace_import_workers):
+                self.log.info(f"Creating a workspace import worker process to consume from queue: {import_queue}")
+                self.create_worker_process(queue_name=import_queue, import_worker=True)
         except Exception as error:
             self.log.error(f"Error while creating worker processes: {error}")
 
@@ -81,7 +87,8 @@ class ServiceBroker:
 
     # Creates a separate worker process and append its pid if successful
     def create_worker_process(
-        self, queue_name, tunnel_port_executor: int = 22, tunnel_port_transfer: int = 22, status_checker=False
+        self, queue_name, tunnel_port_executor: int = 22, tunnel_port_transfer: int = 22, status_checker=False,
+        import_worker=False
     ) -> None:
         # If the entry for queue_name does not exist, create id
         if queue_name not in self.queues_and_workers:
@@ -90,7 +97,7 @@ class ServiceBroker:
             self.queues_and_workers[queue_name] = []
         child_pid = self.__create_child_process(
             queue_name=queue_name, status_checker=status_checker, tunnel_port_executor=tunnel_port_executor,
-            tunnel_port_transfer=tunnel_port_transfer)
+            tunnel_port_transfer=tunnel_port_transfer, import_worker=import_worker)
         # If creation of the child process was successful
         if child_pid:
             self.log.info(f"Assigning a new worker process with pid: {child_pid}, to queue: {queue_name}")
@@ -99,7 +106,8 @@ class ServiceBroker:
 
     # Forks a child process
     def __create_child_process(
-        self, queue_name, tunnel_port_executor: int = 22, tunnel_port_transfer: int = 22, status_checker=False
+        self, queue_name, tunnel_port_executor: int = 22, tunnel_port_transfer: int = 22, status_checker=False,
+        import_worker=False
     ) -> int:
         self.log.info(f"Trying to create a new worker process for queue: {queue_name}")
         try:
@@ -113,11 +121,14 @@ class ServiceBroker:
         try:
             # Clean unnecessary data
             # self.queues_and_workers = None
-            if status_checker:
-                child_worker = JobStatusWorker(
-                    db_url=self.db_url, rabbitmq_url=self.rabbitmq_url, queue_name=queue_name,
-                    tunnel_port_executor=tunnel_port_executor, tunnel_port_transfer=tunnel_port_transfer,
-                    test_sbatch=self.test_sbatch)
+            if import_worker:
+                child_worker = WorkspaceImportWorker(
+                    db_url=self.db_url, rabbitmq_url=self.rabbitmq_url, queue_name=queue_name)
+            elif status_checker:
+                # The reconciler does not consume from a queue, the `queue_name` only identifies its process
+                child_worker = JobStatusReconciler(
+                    db_url=self.db_url, tunnel_port_executor=tunnel_port_executor,
+                    tunnel_port_transfer=tunnel_port_transfer, test_sbatch=self.test_sbatch)
             else:
                 child_worker = Worker(
                     db_url=self.db_url, rabbitmq_url=self.rabbitmq_url, queue_name=queue_name,
@@ -0,0 +1,263 @@
+from logging import getLogger
+import signal
+from os import getpid, getppid, setsid
+from pathlib import Path
+from sys import exit
+from time import sleep, time
+from typing import Dict, Tuple
+
+from ocrd import Resolver
+from operandi_utils import reconfigure_all_loggers, get_log_file_path_prefix
+from operandi_utils.bagging import stream_workspace_bag, WorkspaceBagCache
+from operandi_utils.constants import LOG_LEVEL_WORKER, StateJob, StateWorkspace
+from operandi_utils.database import (
+    DBHPCSlurmJob, DBUnitOfWork, DBVersionConflictError, DBWorkflowJob, DBWorkspace, sync_db_initiate_database,
+    sync_db_get_hpc_slurm_job, sync_db_get_workflow_jobs_in_states, sync_db_get_workspace,
+    sync_db_update_workflow_job)
+from operandi_utils.hpc import NHRExecutor, NHRTransfer
+from operandi_utils.hpc.constants import HPC_TRANSFER_STREAMING
+
+# Name of the reconciler process, used for its log file and by the broker to track it
+JOB_STATUS_RECONCILER_NAME: str = "job_status_reconciler"
+# The workflow job states in which the slurm job is still to be checked in the HPC. The results of a job in the
+# TRANSFERRING_FROM_HPC state are downloaded again, e.g., after the reconciler was stopped during the download.
+RECONCILED_JOB_STATES = [StateJob.PENDING, StateJob.RUNNING, StateJob.TRANSFERRING_FROM_HPC]
+# Seconds between two checks of a job whose state has just changed or which has been just submitted
+RECONCILE_MIN_INTERVAL: float = 30
+# Upper bound of the seconds between two checks of a job whose state does not change
+RECONCILE_MAX_INTERVAL: float = 600
+
+
+class JobStatusReconciler:
+    """
+    Periodically reconciles the states of the non-terminal workflow jobs with their slurm jobs in the HPC.
+
+    The Operandi Server only reads the job states from the database, the reconciler is the only one checking
+    the slurm job states. Each job is checked on its own adaptive interval, starting at `min_interval`.
+    The interval of a job is doubled up to `max_interval` after each check without a state change
+    and reset to `min_interval` once the state changes.
+    """
+    def __init__(
+        self, db_url, tunnel_port_executor, tunnel_port_transfer, test_sbatch=False,
+        min_interval: float = RECONCILE_MIN_INTERVAL, max_interval: float = RECONCILE_MAX_INTERVAL
+    ):
+        self.log = getLogger(f"operandi_broker.job_status_reconciler[{getpid()}]")
+        self.log_file_path = f"{get_log_file_path_prefix(module_type='worker')}_{JOB_STATUS_RECONCILER_NAME}.log"
+        self.test_sbatch = test_sbatch
+
+        self.db_url = db_url
+        self.hpc_executor = None
+        self.hpc_io_transfer = None
+        self.bag_cache = None
+        # The database changes of the currently reconciled workflow job
+        self.db_changes = DBUnitOfWork()
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # Keys: workflow job ids, values: the time of the next check and the current check interval of the job
+        self.job_schedule: Dict[str, Tuple[float, float]] = {}
+
+        self.tunnel_port_executor = tunnel_port_executor
+        self.tunnel_port_transfer = tunnel_port_transfer
+
+    def run(self):
+        try:
+            # Source: https://unix.stackexchange.com/questions/18166/what-are-session-leaders-in-ps
+            # Make the current process session leader
+            setsid()
+            # Reconfigure all loggers to the same format
+            reconfigure_all_loggers(log_level=LOG_LEVEL_WORKER, log_file_path=self.log_file_path)
+            self.log.info(f"Activating signal handler for SIGINT, SIGTERM")
+            signal.signal(signal.SIGINT, self.signal_handler)
+            signal.signal(signal.SIGTERM, self.signal_handler)
+
+            sync_db_initiate_database(self.db_url)
+            self.hpc_executor = NHRExecutor()
+            self.log.info("HPC executor connection successful.")
+            self.hpc_io_transfer = NHRTransfer()
+            self.log.info("HPC transfer connection successful.")
+            try:
+                self.bag_cache = WorkspaceBagCache()
+            except ValueError as error:
+                self.log.warning(f"Bags of successfully processed workspaces will not be prebuilt: {error}")
+
+        except Exception as e:
+            self.log.error(f"The reconciler failed, reason: {e}")
+            raise Exception(f"The reconciler failed, reason: {e}")
+
+        self.log.info(f"Starting the reconciliation of the workflow job states: {RECONCILED_JOB_STATES}")
+        while True:
+            next_check = self.reconcile_once()
+            sleep(max(0.0, min(next_check, time() + self.min_interval) - time()))
+
+    def reconcile_once(self) -> float:
+        """
+        Checks all non-terminal workflow jobs which are due and returns the time of the next due check
+        """
+        now = time()
+        try:
+            db_workflow_jobs = sync_db_get_workflow_jobs_in_states(job_states=RECONCILED_JOB_STATES)
+        except Exception as error:
+            self.log.error(f"Failed to fetch the non-terminal workflow jobs: {error}")
+            return now + self.min_interval
+
+        # Forget the jobs which have reached a terminal state in the meantime
+        active_job_ids = {db_workflow_job.job_id for db_workflow_job in db_workflow_jobs}
+        for job_id in list(self.job_schedule.keys()):
+            if job_id not in active_job_ids:
+                del self.job_schedule[job_id]
+
+        for db_workflow_job in db_workflow_jobs:
+            job_id = db_workflow_job.job_id
+            # Newly seen jobs are checked right away
+            due_time, interval = self.job_schedule.get(job_id, (now, self.min_interval))
+            if due_time > now:
+                continue
+            try:
+                state_changed = self.__reconcile_job(db_workflow_job)
+            except Exception as error:
+                self.log.warning(f"Failed to reconcile workflow job id: {job_id}, error: {error}")
+                state_changed = False
+            interval = self.min_interval if state_changed else min(interval * 2, self.max_interval)
+            self.job_schedule[job_id] = (time() + interval, interval)
+
+        if not self.job_schedule:
+            return now + self.min_interval
+        return min(due_time for due_time, _ in self.job_schedule.values())
+
+    def __reconcile_job(self, db_workflow_job: DBWorkflowJob) -> bool:
+        db_workspace = sync_db_get_workspace(db_workflow_job.workspace_id)
+        db_hpc_slurm_job = sync_db_get_hpc_slurm_job(db_workflow_job.job_id)
+        return self.__handle_hpc_and_workflow_states(
+            hpc_slurm_job_db=db_hpc_slurm_job, workflow_job_db=db_workflow_job, workspace_db=db_workspace)
+
+    def __download_results_from_hpc(self, job_dir: str, workspace_dir: str, slurm_job_id: str) -> None:
+        if HPC_TRANSFER_STREAMING:
+            self.hpc_io_transfer.stream_and_unpack_slurm_workspace(
+                ocrd_workspace_dir=Path(workspace_dir), workflow_job_dir=Path(job_dir), slurm_job_id=slurm_job_id)
+        else:
+            self.hpc_io_transfer.get_and_unpack_slurm_workspace(
+                ocrd_workspace_dir=Path(workspace_dir), workflow_job_dir=Path(job_dir), slurm_job_id=slurm_job_id)
+        self.log.info(f"Transferred slurm workspace from hpc path")
+        # Delete the result dir from the HPC home folder
+        # self.hpc_executor.execute_blocking(f"bash -lc 'rm -rf {hpc_slurm_workspace_path}/{workflow_job_id}'")
+
+    def __prebuild_workspace_bag(self, workspace_db: DBWorkspace) -> None:
+        # The previously cached bags are outdated after the results were downloaded
+        workspace_id = workspace_db.workspace_id
+        self.bag_cache.invalidate(workspace_id)
+        try:
+            bag_path = self.bag_cache.put(
+                workspace_id, mets_path=workspace_db.workspace_mets_path, chunks=stream_workspace_bag(workspace_db))
+            self.log.info(f"Prebuilt bag of workspace id: {workspace_id}, path: {bag_path}")
+        except Exception as error:
+            self.log.warning(f"Failed to prebuild the bag of workspace id: {workspace_id}, error: {error}")
+
+    def __handle_hpc_and_workflow_states(
+        self, hpc_slurm_job_db: DBHPCSlurmJob, workflow_job_db: DBWorkflowJob, workspace_db: DBWorkspace
+    ) -> bool:
+        old_slurm_job_state = hpc_slurm_job_db.hpc_slurm_job_state
+        new_slurm_job_state = self.hpc_executor.check_slurm_job_state(slurm_job_id=hpc_slurm_job_db.hpc_slurm_job_id)
+        # TODO: Reconsider this
+        # if not new_slurm_job_state:
+        #   return
+
+        user_id = workspace_db.user_id
+        job_id = workflow_job_db.job_id
+        job_dir = workflow_job_db.job_dir
+        old_job_state = workflow_job_db.job_state
+
+        workspace_id = workspace_db.workspace_id
+        workspace_dir = workspace_db.workspace_dir
+
+        # If there has been a change of slurm job state, update it
+        if old_slurm_job_state != new_slurm_job_state:
+            self.log.info(
+                f"Slurm job: {hpc_slurm_job_db.hpc_slurm_job_id}, "
+                f"old state: {old_slurm_job_state}, "
+                f"new state: {new_slurm_job_state}")
+            self.db_changes.stage_hpc_slurm_job_update(
+                find_workflow_job_id=job_id, hpc_slurm_job_state=new_slurm_job_state)
+
+        # Convert the slurm job state to operandi workflow job state
+        new_job_state = StateJob.convert_from_slurm_job(slurm_job_state=new_slurm_job_state)
+
+        # TODO: Refactor this block of code since nothing is downloaded from the HPC when job fails.
+        # If there has been a change of operandi workflow state, update it
+        if old_job_state != new_job_state:
+            self.log.info(f"Workflow job id: {job_id}, old state: {old_job_state}, new state: {new_job_state}")
+            # The results of a successful job are still to be downloaded before the job is reported as succeeded
+            guarded_job_state = StateJob.TRANSFERRING_FROM_HPC if new_job_state == StateJob.SUCCESS else new_job_state
+            try:
+                # The state handling below must run once, even if another writer updates the job concurrently
+                sync_db_update_workflow_job(
+                    find_job_id=job_id, expected_version=workflow_job_db.version, job_state=guarded_job_state)
+            except DBVersionConflictError:
+                self.log.warning(f"Workflow job id: {job_id} has been updated concurrently, rechecking it later")
+                self.db_changes.sync_flush()
+                return True
+            # TODO: Simplify SUCCESS and FAILED duplications
+            if new_job_state == StateJob.SUCCESS:
+                # Written right away since the transfer takes long and the user waits for it
+                self.db_changes.stage_workspace_update(
+                    find_workspace_id=workspace_id, state=StateWorkspace.TRANSFERRING_FROM_HPC)
+                self.db_changes.sync_flush()
+                try:
+                    self.__download_results_from_hpc(
+                        job_dir=job_dir, workspace_dir=workspace_dir, slurm_job_id=hpc_slurm_job_db.hpc_slurm_job_id)
+                except Exception as error:
+                    # Rolled back to the reconciled states, so the download is retried with the next check of the job
+                    self.log.error(f"Failed to download the results of workflow job id: {job_id}, error: {error}")
+                    self.db_changes.stage_workspace_update(find_workspace_id=workspace_id, state=workspace_db.state)
+                    self.db_changes.stage_workflow_job_update(find_job_id=job_id, job_state=old_job_state)
+                    self.db_changes.sync_flush()
+                    raise
+
+                # TODO: Find a better way to do the update - consider callbacks to Operandi Server
+                try:
+                    workspace = Resolver().workspace_from_url(
+                        mets_url=workspace_db.workspace_mets_path, clobber_mets=False,
+                        mets_basename=workspace_db.mets_basename, download=False)
+                    updated_file_groups = workspace.mets.file_groups
+                except Exception as error:
+                    self.log.error(f"Failed to extract the processed file groups: {error}")
+                    updated_file_groups = ["CORRUPTED FILE GROUPS"]
+                self.log.info(f"Setting new workspace state `{StateWorkspace.READY}` of workspace_id: {workspace_id}")
+
+                self.db_changes.stage_workspace_update(
+                    find_workspace_id=workspace_id, state=StateWorkspace.READY, file_groups=updated_file_groups)
+                self.db_changes.stage_workflow_job_update(find_job_id=job_id, job_state=StateJob.SUCCESS)
+                self.db_changes.stage_processing_stats_increase(
+                    find_user_id=user_id, pages_succeed=workspace_db.pages_amount)
+                self.db_changes.sync_flush()
+                workspace_db.state = StateWorkspace.READY
+                workspace_db.file_groups = updated_file_groups
+                self.hpc_io_transfer.download_slurm_job_log_file(hpc_slurm_job_db.hpc_slurm_job_id, job_dir)
+                self.log.info(f"Increasing `pages_succeed` stat by {workspace_db.pages_amount}")
+                if self.bag_cache:
+                    self.__prebuild_workspace_bag(workspace_db=workspace_db)
+            if new_job_state == StateJob.FAILED:
+                self.log.info(f"Setting new workspace state `{StateWorkspace.READY}` of workspace_id: {workspace_id}")
+                self.db_changes.stage_workspace_update(find_workspace_id=workspace_id, state=StateWorkspace.READY)
+                self.db_changes.stage_workflow_job_update(find_job_id=job_id, job_state=StateJob.FAILED)
+                self.db_changes.stage_processing_stats_increase(
+                    find_user_id=user_id, pages_failed=workspace_db.pages_amount)
+                self.db_changes.sync_flush()
+                self.hpc_io_transfer.download_slurm_job_log_file(hpc_slurm_job_db.hpc_slurm_job_id, job_dir)
+                self.log.error(f"Increasing `pages_failed` stat by {workspace_db.pages_amount}")
+
+        # Writes the slurm job state if it has been the only change
+        self.db_changes.sync_flush()
+
+        self.log.info(f"Latest slurm job state: {new_slurm_job_state}")
+        self.log.info(f"Latest workflow job state: {new_job_state}")
+        return old_slurm_job_state != new_slurm_job_state
+
+    # The arguments to this method are passed by the caller from the OS
+    def signal_handler(self, sig, frame):
+        signal_name = signal.Signals(sig).name
+        self.log.info(f"{signal_name} received from parent process `{getppid()}`.")
+        if self.hpc_executor:
+            self.log.info(f"SSH channel metrics: {self.hpc_executor.session_manager.metrics()}")
+        self.log.info("Exiting gracefully.")
+        exit(0)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from json import loads
 from logging import getLogger
 import signal
@@ -9,12 +10,11 @@ from sys import exit
 from operandi_utils import reconfigure_all_loggers, get_log_file_path_prefix
 from operandi_utils.constants import LOG_LEVEL_WORKER, StateJob, StateWorkspace
 from operandi_utils.database import (
-    sync_db_increase_processing_stats, sync_db_initiate_database, sync_db_get_workflow, sync_db_get_workspace,
-    sync_db_create_hpc_slurm_job, sync_db_update_workflow_job, sync_db_update_workspace)
+    DBHPCSlurmJob, DBUnitOfWork, sync_db_initiate_database, sync_db_get_workflow, sync_db_get_workspace)
 from operandi_utils.hpc import NHRExecutor, NHRTransfer
 from operandi_utils.hpc.constants import (
     HPC_BATCH_SUBMIT_WORKFLOW_JOB, HPC_JOB_DEADLINE_TIME_REGULAR, HPC_JOB_DEADLINE_TIME_TEST, HPC_JOB_QOS_SHORT,
-    HPC_JOB_QOS_DEFAULT)
+    HPC_JOB_QOS_DEFAULT, HPC_TRANSFER_STREAMING)
 from operandi_utils.rabbitmq import get_connection_consumer
 
 
@@ -32,6 +32,8 @@ class Worker:
         self.rmq_consumer = None
         self.hpc_executor = None
         self.hpc_io_transfer = None
+        # The database changes of the currently consumed message
+        self.db_changes = DBUnitOfWork()
 
         # Currently consumed message related parameters
         self.current_message_delivery_tag = None
@@ -143,11 +145,19 @@ class Worker:
 
         job_state = StateJob.PENDING
         self.log.info(f"Setting new job state `{job_state}` of job_id: {self.current_message_job_id}")
-        sync_db_update_workflow_job(find_job_id=self.current_message_job_id, job_state=job_state)
+        self.db_changes.stage_workflow_job_update(find_job_id=self.current_message_job_id, job_state=job_state)
 
         ws_state = StateWorkspace.PENDING
         self.log.info(f"Setting new workspace state `{ws_state}` of workspace_id: {self.current_message_ws_id}")
-        sync_db_update_workspace(find_workspace_id=self.current_message_ws_id, state=ws_state)
+        self.db_changes.stage_workspace_update(find_workspace_id=self.current_message_ws_id, state=ws_state)
+
+        # Writes the hpc slurm job staged when triggering it together with the pending states
+        try:
+            self.db_changes.sync_flush()
+        except Exception as error:
+            self.log.error(f"Failed to save the hpc slurm job and the pending states in DB: {error}")
+            self.__handle_message_failure(interruption=False, set_ws_ready=True)
+            return
 
         self.has_consumed_message = False
         self.log.debug(f"Ack delivery tag: {self.current_message_delivery_tag}")
@@ -156,13 +166,18 @@ class Worker:
     def __handle_message_failure(self, interruption: bool = False, set_ws_ready: bool = False):
         job_state = StateJob.FAILED
         self.log.info(f"Setting new state `{job_state}` of job_id: {self.current_message_job_id}")
-        sync_db_update_workflow_job(find_job_id=self.current_message_job_id, job_state=job_state)
+        self.db_changes.stage_workflow_job_update(find_job_id=self.current_message_job_id, job_state=job_state)
         self.has_consumed_message = False
 
         if set_ws_ready:
             ws_state = StateWorkspace.READY
             self.log.info(f"Setting new workspace state `{ws_state}` of workspace_id: {self.current_message_ws_id}")
-            sync_db_update_workspace(find_workspace_id=self.current_message_ws_id, state=ws_state)
+            self.db_changes.stage_workspace_update(find_workspace_id=self.current_message_ws_id, state=ws_state)
+        # Also writes the changes staged before the failure, e.g., the increased `pages_failed` stat
+        try:
+            self.db_changes.sync_flush()
+        except Exception as error:
+            self.log.error(f"Failed to save the failed states of job_id: {self.current_message_job_id}, error: {error}")
 
         if interruption:
             # self.log.info(f"Nacking delivery tag: {self.current_message_delivery_tag}")
@@ -193,6 +208,8 @@ class Worker:
 
         self.rmq_consumer.disconnect()
         self.rmq_consumer = None
+        if self.hpc_executor:
+            self.log.info(f"SSH channel metrics: {self.hpc_executor.session_manager.metrics()}")
         self.log.info("Exiting gracefully.")
         exit(0)
 
@@ -218,11 +235,20 @@ class Worker:
         # self.log.info("HPC transfer connection renewed successfully.")
 
         try:
-            sync_db_update_workspace(find_workspace_id=workspace_id, state=StateWorkspace.TRANSFERRING_TO_HPC)
-            sync_db_update_workflow_job(find_job_id=workflow_job_id, job_state=StateJob.TRANSFERRING_TO_HPC)
-            self.hpc_io_transfer.pack_and_put_slurm_workspace(
-                ocrd_workspace_dir=workspace_dir, workflow_job_id=workflow_job_id,
-                nextflow_script_path=workflow_script_path)
+            # Written right away since the transfer takes long and the user waits for it
+            self.db_changes.stage_workspace_update(
+                find_workspace_id=workspace_id, state=StateWorkspace.TRANSFERRING_TO_HPC)
+            self.db_changes.stage_workflow_job_update(
+                find_job_id=workflow_job_id, job_state=StateJob.TRANSFERRING_TO_HPC)
+            self.db_changes.sync_flush()
+            if HPC_TRANSFER_STREAMING:
+                self.hpc_io_transfer.stream_slurm_workspace(
+                    ocrd_workspace_dir=workspace_dir, workflow_job_id=workflow_job_id,
+                    nextflow_script_path=workflow_script_path)
+            else:
+                self.hpc_io_transfer.pack_and_put_slurm_workspace(
+                    ocrd_workspace_dir=workspace_dir, workflow_job_id=workflow_job_id,
+                    nextflow_script_path=workflow_script_path)
         except Exception as error:
             raise Exception(f"Failed to pack and put slurm workspace: {error}")
 
@@ -233,20 +259,19 @@ class Worker:
                 workspace_id=workspace_id, mets_basename=workspace_base_mets,
                 input_file_grp=input_file_grp, nf_process_forks=nf_process_forks, ws_pages_amount=ws_pages_amount,
                 use_mets_server=use_mets_server, file_groups_to_remove=file_groups_to_remove, cpus=cpus, ram=ram,
-                job_deadline_time=job_deadline_time, partition=partition, qos=qos)
+                job_deadline_time=job_deadline_time, partition=partition, qos=qos,
+                stream_results=HPC_TRANSFER_STREAMING)
         except Exception as error:
-            db_stats = sync_db_increase_processing_stats(
+            # Written together with the failed job state when handling the message failure
+            self.db_changes.stage_processing_stats_increase(
                 find_user_id=self.current_message_user_id, pages_failed=ws_pages_amount)
             self.log.error(f"Increasing `pages_failed` stat by {ws_pages_amount}")
-            self.log.error(f"Total amount of `pages_failed` stat: {db_stats.pages_failed}")
             raise Exception(f"Triggering slurm job failed: {error}")
 
-        try:
-            sync_db_create_hpc_slurm_job(
-                user_id=self.current_message_user_id,
-                workflow_job_id=workflow_job_id, hpc_slurm_job_id=slurm_job_id,
-                hpc_batch_script_path=HPC_BATCH_SUBMIT_WORKFLOW_JOB,
-                hpc_slurm_workspace_path=join(self.hpc_io_transfer.slurm_workspaces_dir, workflow_job_id))
-        except Exception as error:
-            raise Exception(f"Failed to save the hpc slurm job in DB: {error}")
+        # Written together with the pending states of the workflow job and the workspace
+        self.db_changes.stage_insert(DBHPCSlurmJob(
+            user_id=self.current_message_user_id, workflow_job_id=workflow_job_id, hpc_slurm_job_id=slurm_job_id,
+            hpc_batch_script_path=HPC_BATCH_SUBMIT_WORKFLOW_JOB,
+            hpc_slurm_workspace_path=join(self.hpc_io_transfer.slurm_workspaces_dir, workflow_job_id),
+            datetime=datetime.now(), details="HPCSlurmJob"))
         return slurm_job_id
@@ -0,0 +1,187 @@
+from json import loads
+from logging import getLogger
+import signal
+from os import getpid, getppid, setsid
+from pathlib import Path
+from shutil import rmtree
+from sys import exit
+from time import time
+
+from operandi_utils import reconfigure_all_loggers, get_log_file_path_prefix
+from operandi_utils.bagging import create_workspace_bag_from_remote_url, ingest_workspace_bag
+from operandi_utils.constants import LOG_LEVEL_WORKER, StateWorkspace
+from operandi_utils.database import (
+    DBWorkspace, sync_db_create_workspace, sync_db_get_workspace, sync_db_increase_processing_stats,
+    sync_db_initiate_database, sync_db_update_workspace)
+from operandi_utils.rabbitmq import get_connection_consumer
+
+# Minimal amount of seconds between two progress updates of the same import in the database
+IMPORT_PROGRESS_UPDATE_INTERVAL: float = 2
+# Amount of processes used for checksumming when bagging the imported workspace
+IMPORT_BAGIT_PROCESSES: int = 4
+
+
+class WorkspaceImportWorker:
+    """
+    Consumes the workspace import requests of the Operandi Server. The files referenced in the remote METS file
+    are downloaded, bagged and ingested into the already created workspace directory. The workspace stays in the
+    `IMPORTING` state till the import is finished, then becomes either `READY` or `IMPORT_FAILED`.
+    """
+    def __init__(self, db_url, rabbitmq_url, queue_name):
+        self.log = getLogger(f"operandi_broker.workspace_import_worker[{getpid()}].{queue_name}")
+        self.queue_name = queue_name
+        self.log_file_path = f"{get_log_file_path_prefix(module_type='worker')}_{queue_name}.log"
+
+        self.db_url = db_url
+        self.rmq_url = rabbitmq_url
+        self.rmq_consumer = None
+
+        # Currently consumed message related parameters
+        self.current_message_delivery_tag = None
+        self.current_message_ws_id = None
+        self.has_consumed_message = False
+        self.last_progress_update = 0
+
+    def __del__(self):
+        if self.rmq_consumer:
+            self.rmq_consumer.disconnect()
+
+    def run(self):
+        try:
+            # Source: https://unix.stackexchange.com/questions/18166/what-are-session-leaders-in-ps
+            # Make the current process session leader
+            setsid()
+            # Reconfigure all loggers to the same format
+            reconfigure_all_loggers(log_level=LOG_LEVEL_WORKER, log_file_path=self.log_file_path)
+            self.log.info(f"Activating signal handler for SIGINT, SIGTERM")
+            signal.signal(signal.SIGINT, self.signal_handler)
+            signal.signal(signal.SIGTERM, self.signal_handler)
+
+            sync_db_initiate_database(self.db_url)
+            self.rmq_consumer = get_connection_consumer(rabbitmq_url=self.rmq_url)
+            self.log.info(f"RMQConsumer connected")
+            self.rmq_consumer.configure_consuming(queue_name=self.queue_name, callback_method=self.__callback)
+            self.log.info(f"Configured consuming from queue: {self.queue_name}")
+            self.log.info(f"Starting consuming from queue: {self.queue_name}")
+            self.rmq_consumer.start_consuming()
+        except Exception as e:
+            self.log.error(f"The worker failed, reason: {e}")
+            raise Exception(f"The worker failed, reason: {e}")
+
+    def __report_progress(self, files_fetched: int, files_total: int) -> None:
+        now = time()
+        if files_fetched < files_total and now - self.last_progress_update < IMPORT_PROGRESS_UPDATE_INTERVAL:
+            return
+        self.last_progress_update = now
+        sync_db_update_workspace(
+            find_workspace_id=self.current_message_ws_id, import_files_fetched=files_fetched,
+            import_files_total=files_total)
+
+    def __import_workspace(
+        self, db_workspace: DBWorkspace, mets_url: str, mets_basename: str, preserve_file_grps: list
+    ) -> None:
+        workspace_id = db_workspace.workspace_id
+        workspace_dir = db_workspace.workspace_dir
+        bag_dest = f"{workspace_dir}.zip"
+        self.last_progress_update = 0
+        user_id = db_workspace.user_id
+        try:
+            ws_temp_dir = create_workspace_bag_from_remote_url(
+                mets_url=mets_url, workspace_id=workspace_id, bag_dest=bag_dest, preserve_file_grps=preserve_file_grps,
+                mets_basename=mets_basename, processes=IMPORT_BAGIT_PROCESSES, progress_callback=self.__report_progress)
+            rmtree(ws_temp_dir, ignore_errors=True)
+            rmtree(workspace_dir, ignore_errors=True)
+            bag_info, pages_amount, file_groups = ingest_workspace_bag(bag_dest=bag_dest, workspace_dir=workspace_dir)
+            sync_db_create_workspace(
+                user_id=user_id, workspace_id=workspace_id, workspace_dir=workspace_dir, pages_amount=pages_amount,
+                file_groups=file_groups, bag_info=bag_info, state=StateWorkspace.READY, details=db_workspace.details)
+        except Exception:
+            # The workspace is marked as IMPORT_FAILED by the caller, its partially created directory is not kept
+            rmtree(workspace_dir, ignore_errors=True)
+            raise
+        finally:
+            Path(bag_dest).unlink(missing_ok=True)
+        sync_db_increase_processing_stats(find_user_id=user_id, pages_uploaded=pages_amount)
+        self.log.info(f"Imported workspace id: {workspace_id}, pages: {pages_amount}, file groups: {file_groups}")
+
+    def __callback(self, ch, method, properties, body):
+        self.log.debug(f"ch: {ch}, method: {method}, properties: {properties}, body: {body}")
+        self.log.debug(f"Consumed message: {body}")
+
+        self.current_message_delivery_tag = method.delivery_tag
+        self.current_message_ws_id = None
+        self.has_consumed_message = True
+
+        # Since the import message is constructed by the Operandi Server,
+        # it should not fail here when parsing under normal circumstances.
+        try:
+            consumed_message = loads(body)
+            self.log.info(f"Consumed message: {consumed_message}")
+            self.current_message_ws_id = consumed_message["workspace_id"]
+            mets_url = consumed_message["mets_url"]
+            mets_basename = consumed_message["mets_basename"]
+            preserve_file_grps = consumed_message["preserve_file_grps"]
+        except Exception as error:
+            self.log.warning(f"Parsing the consumed message has failed: {error}")
+            self.__handle_message_failure(interruption=False)
+            return
+
+        try:
+            db_workspace = sync_db_get_workspace(self.current_message_ws_id)
+        except RuntimeError as error:
+            self.log.warning(f"Database run-time error has occurred: {error}")
+            self.__handle_message_failure(interruption=False)
+            return
+        except Exception as error:
+            self.log.warning(f"Database related error has occurred: {error}")
+            self.__handle_message_failure(interruption=False)
+            return
+
+        try:
+            self.__import_workspace(
+                db_workspace=db_workspace, mets_url=mets_url, mets_basename=mets_basename,
+                preserve_file_grps=preserve_file_grps)
+        except Exception as error:
+            self.log.error(f"Failed to import workspace id: {self.current_message_ws_id}, error: {error}")
+            self.__handle_message_failure(interruption=False)
+            return
+
+        self.has_consumed_message = False
+        self.log.debug(f"Ack delivery tag: {self.current_message_delivery_tag}")
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+    def __handle_message_failure(self, interruption: bool = False):
+        self.has_consumed_message = False
+
+        if self.current_message_ws_id:
+            try:
+                sync_db_update_workspace(
+                    find_workspace_id=self.current_message_ws_id, state=StateWorkspace.IMPORT_FAILED)
+            except Exception as error:
+                self.log.error(f"Failed to set the import state of workspace id: {self.current_message_ws_id}, "
+                               f"error: {error}")
+
+        if interruption:
+            # Sending ACK since the partially imported workspace is marked as failed and not retried
+            self.log.info(f"Interruption ack delivery tag: {self.current_message_delivery_tag}")
+            self.rmq_consumer.ack_message(delivery_tag=self.current_message_delivery_tag)
+            return
+
+        self.log.debug(f"Ack delivery tag: {self.current_message_delivery_tag}")
+        self.rmq_consumer.ack_message(delivery_tag=self.current_message_delivery_tag)
+
+        # Reset the current message related parameters
+        self.current_message_delivery_tag = None
+        self.current_message_ws_id = None
+
+    # The arguments to this method are passed by the caller from the OS
+    def signal_handler(self, sig, frame):
+        signal_name = signal.Signals(sig).name
+        self.log.info(f"{signal_name} received from parent process `{getppid()}`.")
+        if self.has_consumed_message:
+            self.log.info(f"Handling the message failure due to interruption: {signal_name}")
+            self.__handle_message_failure(interruption=True)
+        self.rmq_consumer.disconnect()
+        self.rmq_consumer = None
+        self.log.info("Exiting gracefully.")
+        exit(0)
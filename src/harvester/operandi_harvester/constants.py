@@ -22,7 +22,7 @@ VD18_METS_EXT: str = ".mets.xml"
 
 # Time waited between the POST requests to the OPERANDI Server
 WAIT_TIME_BETWEEN_SUBMITS: int = 15  # seconds
-# Time waited between each workflow job status check
+# Seconds the server holds each long-polling workflow job status check
 WAIT_TIME_BETWEEN_POLLS: int = 15  # seconds
 # Times to perform workflow job status checks before timeout
 TRIES_TILL_TIMEOUT: int = 30
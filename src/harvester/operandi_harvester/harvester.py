@@ -2,16 +2,42 @@ from logging import getLogger
 from os import environ, makedirs
 from os.path import dirname, exists, join, isfile
 from requests import get, post
-from requests.auth import HTTPBasicAuth
-from time import sleep
+from requests.auth import AuthBase, HTTPBasicAuth
+from time import sleep, time
 
 from operandi_utils import get_log_file_path_prefix, is_url_responsive, reconfigure_all_loggers, receive_file
-from operandi_utils.constants import LOG_LEVEL_HARVESTER, StateJob
+from operandi_utils.constants import LOG_LEVEL_HARVESTER, StateJob, StateWorkspace
 from .constants import (
     TRIES_TILL_TIMEOUT, USE_WORKSPACE_FILE_GROUP, VD18_IDS_FILE, VD18_METS_EXT, VD18_URL, WAIT_TIME_BETWEEN_SUBMITS,
     WAIT_TIME_BETWEEN_POLLS)
 
 
+class SessionTokenAuth(AuthBase):
+    """
+    Authenticates the requests with a session token of the Operandi Server instead of the e-mail and password.
+    The token is issued with the basic credentials and renewed shortly before it expires.
+    """
+    def __init__(self, server_address: str, basic_auth: HTTPBasicAuth, renew_before: int = 60):
+        self.server_address = server_address
+        self.basic_auth = basic_auth
+        self.renew_before = renew_before
+        self.token = None
+        self.expires_at = 0
+
+    def _renew_token(self) -> None:
+        response = post(url=f"{self.server_address}/user/token", auth=self.basic_auth)
+        response.raise_for_status()
+        response_json = response.json()
+        self.token = response_json["access_token"]
+        self.expires_at = time() + response_json["expires_in"]
+
+    def __call__(self, request):
+        if not self.token or time() >= self.expires_at - self.renew_before:
+            self._renew_token()
+        request.headers["Authorization"] = f"Bearer {self.token}"
+        return request
+
+
 class Harvester:
     def __init__(
         self, server_address: str, auth_username: str = environ.get("OPERANDI_HARVESTER_DEFAULT_USERNAME", None),
@@ -47,7 +73,8 @@ class Harvester:
             raise ConnectionError(f"The Operandi Server is not responding: {server_address}")
 
         # The authentication used for interactions with the Operandi Server
-        self.auth = HTTPBasicAuth(auth_username, auth_password)
+        self.auth = SessionTokenAuth(
+            server_address=server_address, basic_auth=HTTPBasicAuth(auth_username, auth_password))
 
     def _parse_response_field(self, response, field_key: str) -> str:
         response_json = response.json()
@@ -100,6 +127,8 @@ class Harvester:
             workflow_id = self.post_workflow_nf_script(nf_script_path=nf_script_path)
 
         workspace_id = self.post_workspace_url(mets_url=mets_url)
+        if not self.poll_workspace_state(workspace_id=workspace_id):
+            raise ValueError("The workspace import state polling failed or reached a timeout")
         job_id = self.post_workflow_job(
             workflow_id=self.default_workflow_id, workspace_id=workspace_id, input_file_grp=USE_WORKSPACE_FILE_GROUP)
         has_finished = self.poll_workflow_job_state(workflow_id=workflow_id, job_id=job_id)
@@ -118,6 +147,37 @@ class Harvester:
         self.logger.info(f"Response workspace id: {workspace_id}")
         return workspace_id
 
+    def get_workspace_state(self, workspace_id: str) -> str:
+        self.logger.info(f"Checking state of workspace id: {workspace_id}")
+        req_url = f"{self.server_address}/workspace/{workspace_id}/status"
+        response = get(url=req_url, auth=self.auth)
+        workspace_state = self._parse_response_field(response=response, field_key="state")
+        if not workspace_state:
+            raise ValueError(f"Failed to parse workspace state from response")
+        return workspace_state
+
+    def poll_workspace_state(
+        self, workspace_id: str, tries: int = TRIES_TILL_TIMEOUT, wait_time: int = WAIT_TIME_BETWEEN_POLLS
+    ) -> bool:
+        self.logger.info(f"Starting polling the state of imported workspace: {workspace_id}")
+        self.logger.info(f"Amount of polls to be performed: {tries}, every {wait_time} secs.")
+        tries_left = tries
+        while tries_left > 0:
+            try:
+                workspace_state = self.get_workspace_state(workspace_id=workspace_id)
+            except Exception as error:
+                self.logger.exception(f"Checking workspace state has failed: {error}")
+                return False
+            self.logger.info(f"Response workspace state: {workspace_state}")
+            if workspace_state == StateWorkspace.READY:
+                return True
+            if workspace_state == StateWorkspace.IMPORT_FAILED:
+                return False
+            self.logger.info(f"Checking the workspace state after {wait_time} seconds")
+            sleep(wait_time)
+            tries_left -= 1
+        return False
+
     def post_workspace_zip(self, ocrd_zip_path: str):
         self.logger.info(f"Posting workspace ocrd zip: {ocrd_zip_path}")
         req_url = f"{self.server_address}/workspace"
@@ -157,10 +217,13 @@ class Harvester:
         self.logger.info(f"Response workflow job id: {workflow_job_id}")
         return workflow_job_id
 
-    def get_workflow_job_state(self, workflow_id: str, job_id: str) -> str:
+    def get_workflow_job_state(self, workflow_id: str, job_id: str, wait: int = 0) -> str:
+        """
+        With `wait` seconds set, the server responds once the job state changes or the `wait` expires
+        """
         self.logger.info(f"Checking state of workflow job id: {job_id}")
         req_url = f"{self.server_address}/workflow/{workflow_id}/{job_id}"
-        response = get(url=req_url, auth=self.auth)
+        response = get(url=req_url, params={"wait": wait}, auth=self.auth, timeout=wait + 30)
         workflow_job_status = self._parse_response_field(response=response, field_key="job_state")
         if not workflow_job_status:
             raise ValueError(f"Failed to parse workflow job state from response")
@@ -170,13 +233,14 @@ class Harvester:
         self, workflow_id: str, job_id: str, tries: int = TRIES_TILL_TIMEOUT, wait_time: int = WAIT_TIME_BETWEEN_POLLS
     ) -> bool:
         self.logger.info(f"Starting polling the state of workflow job: {job_id}")
-        self.logger.info(f"Amount of polls to be performed: {tries}, every {wait_time} secs.")
-        tries_left = tries
-        while tries_left > 0:
-            self.logger.info(f"Checking the job state after {wait_time} seconds")
-            sleep(wait_time)
+        # The server holds each request till the job state changes, hence, the polls
+        # are bounded by the total time instead of by the amount of requests
+        deadline = time() + tries * wait_time
+        self.logger.info(f"Long-polling the job state for up to {tries * wait_time} secs.")
+        while time() < deadline:
             try:
-                workflow_job_state = self.get_workflow_job_state(workflow_id=workflow_id, job_id=job_id)
+                workflow_job_state = self.get_workflow_job_state(
+                    workflow_id=workflow_id, job_id=job_id, wait=wait_time)
             except Exception as error:
                 self.logger.exception(f"Checking workflow job state has failed: {error}")
                 return False
@@ -185,7 +249,7 @@ class Harvester:
                 return True
             if workflow_job_state == StateJob.FAILED:
                 return False
-            tries_left -= 1
+        return False
 
     def get_workspace_zip(self, workspace_id: str, download_dir: str) -> str:
         self.logger.info(f"Getting workspace zip of: {workspace_id}")
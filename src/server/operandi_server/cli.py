@@ -1,6 +1,7 @@
-from click import group, option, version_option
+from click import IntRange, group, option, version_option
 from os import environ
 from operandi_utils.validators import DatabaseParamType, QueueServerParamType
+from operandi_server.constants import SERVER_WORKERS
 from operandi_server.server import OperandiServer
 
 __all__ = ["cli"]
@@ -37,7 +38,13 @@ def cli(**kwargs):  # pylint: disable=unused-argument
     help="The URL of the MongoDB, format: mongodb://host:port",
     type=DatabaseParamType()
 )
-def start_server(local_url: str, live_url: str, queue: str, database: str):
+@option(
+    "-w", "--workers",
+    default=environ.get("OPERANDI_SERVER_WORKERS", SERVER_WORKERS),
+    help="The amount of the worker processes of the Operandi Server.",
+    type=IntRange(min=1)
+)
+def start_server(local_url: str, live_url: str, queue: str, database: str, workers: int):
     operandi_server = OperandiServer(
         local_server_url=local_url, live_server_url=live_url, db_url=database, rabbitmq_url=queue)
-    operandi_server.run_server()
+    operandi_server.run_server(workers=workers)
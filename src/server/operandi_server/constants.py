@@ -1,13 +1,75 @@
+from os import cpu_count
+from typing import List
+
 __all__ = [
+    "BATCH_SUBMISSION_MAX_JOBS",
     "DEFAULT_FILE_GRP",
     "DEFAULT_METS_BASENAME",
+    "JOB_STATE_EVENTS_KEEPALIVE",
+    "JOB_STATE_HUB_POLL_INTERVAL",
+    "JOB_STATE_MAX_WAIT",
+    "JOB_STATUS_QUERY_MAX_LIMIT",
+    "LIST_RESOURCES_DEFAULT_LIMIT",
+    "LIST_RESOURCES_MAX_LIMIT",
+    "PRODUCTION_WORKFLOWS_USER_ID",
+    "PROCESS_POOL_BAGIT_PROCESSES",
+    "PROCESS_POOL_MAX_CONCURRENT_TASKS",
+    "PROCESS_POOL_PRELOAD_MODULES",
+    "PROCESS_POOL_TASK_TIMEOUT",
+    "SESSION_CACHE_MAX_SIZE",
+    "SESSION_CACHE_TTL",
+    "SESSION_CACHE_VERSION_CHECK_INTERVAL",
+    "SESSION_TOKEN_TTL",
+    "SERVER_LEADER_LOCK_NAME",
+    "SERVER_LEADER_LOCK_TTL",
+    "SERVER_WORKERS",
     "SERVER_WORKFLOW_JOBS_ROUTER",
     "SERVER_WORKFLOWS_ROUTER",
-    "SERVER_WORKSPACES_ROUTER"
+    "SERVER_WORKSPACES_ROUTER",
+    "UPLOAD_CHUNK_SIZE"
 ]
 
+# Maximal amount of workflow jobs submitted with a single batch request
+BATCH_SUBMISSION_MAX_JOBS: int = 1000
 DEFAULT_FILE_GRP: str = "DEFAULT"
 DEFAULT_METS_BASENAME: str = "mets.xml"
+# Seconds between two keep-alive comments of an idle job state event stream
+JOB_STATE_EVENTS_KEEPALIVE: float = 15
+# Seconds between two loads of the watched job states from the database
+JOB_STATE_HUB_POLL_INTERVAL: float = 1
+# Upper bound of the seconds a long-polling job state request waits for a change
+JOB_STATE_MAX_WAIT: int = 60
+# Maximal amount of workflow job states returned by a single bulk status query
+JOB_STATUS_QUERY_MAX_LIMIT: int = 10000
+LIST_RESOURCES_DEFAULT_LIMIT: int = 100
+LIST_RESOURCES_MAX_LIMIT: int = 1000
+# The user id owning the workflows provided by the Operandi Server, these workflows cannot be replaced
+PRODUCTION_WORKFLOWS_USER_ID: str = "Operandi Server"
+# Amount of the workspace operations running concurrently in separate processes
+PROCESS_POOL_MAX_CONCURRENT_TASKS: int = max(cpu_count() or 1, 2)
+# Amount of processes used by a single bagit task for checksumming
+PROCESS_POOL_BAGIT_PROCESSES: int = 4
+# Modules imported once by the forkserver instead of by each task process
+PROCESS_POOL_PRELOAD_MODULES: List[str] = ["operandi_server.routers.workspace_utils", "operandi_utils.oton"]
+# Default timeout in seconds of a single workspace operation
+PROCESS_POOL_TASK_TIMEOUT: float = 3600
+# Maximal amount of the verified user accounts cached in memory
+SESSION_CACHE_MAX_SIZE: int = 10000
+# Seconds a verified user account is trusted without loading it from the database again
+SESSION_CACHE_TTL: float = 60
+# Seconds a cached user account is trusted without checking its version in the database, this bounds the delay
+# till an account revoked by another server process is rejected
+SESSION_CACHE_VERSION_CHECK_INTERVAL: float = 5
+# Seconds an issued session token is valid for
+SESSION_TOKEN_TTL: int = 3600
+# Name of the database lock held by the leader among the processes of the Operandi Server
+SERVER_LEADER_LOCK_NAME: str = "operandi_server_leader"
+# Seconds till the leader lock of a dead process expires, the leader renews it every third of that time
+SERVER_LEADER_LOCK_TTL: float = 30
+# Default amount of the Uvicorn worker processes of the Operandi Server
+SERVER_WORKERS: int = 1
 SERVER_WORKFLOW_JOBS_ROUTER: str = "workflow_jobs"
 SERVER_WORKFLOWS_ROUTER: str = "workflows"
 SERVER_WORKSPACES_ROUTER: str = "workspaces"
+# Amount of bytes read at once from an uploaded file
+UPLOAD_CHUNK_SIZE: int = 1024 * 1024
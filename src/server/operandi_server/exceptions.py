@@ -32,3 +32,11 @@ class WorkspaceGoneException(WorkspaceException):
 
 class WorkflowJobException(WorkflowException):
     pass
+
+
+class ServerTaskError(Exception):
+    pass
+
+
+class ServerTaskTimeoutError(ServerTaskError):
+    pass
@@ -1,11 +1,11 @@
 import aiofiles
-from io import DEFAULT_BUFFER_SIZE
 from os import environ, listdir, scandir
 from os.path import isdir, isfile, join
 from pathlib import Path
 from shutil import rmtree
 from typing import List, Tuple
 from operandi_utils import generate_id
+from operandi_server.constants import UPLOAD_CHUNK_SIZE
 
 
 def abs_resource_router_dir_path(resource_router: str) -> str:
@@ -98,7 +98,7 @@ def get_resource_file(resource_router: str, resource_id: str, file_ext=None) ->
     raise FileNotFoundError(f"Resource file with ending '{file_ext}' not found in: {resource_dir}")
 
 
-async def receive_resource(file, resource_dst, chunk_size: int = DEFAULT_BUFFER_SIZE):
+async def receive_resource(file, resource_dst, chunk_size: int = UPLOAD_CHUNK_SIZE):
     async with aiofiles.open(file=resource_dst, mode="wb") as fpt:
         content = await file.read(chunk_size)
         while content:
@@ -0,0 +1,96 @@
+from asyncio import CancelledError, Queue, TimeoutError as AsyncTimeoutError, create_task, sleep, wait_for
+from contextlib import asynccontextmanager
+from logging import getLogger
+from typing import AsyncIterator, Dict, List, Optional
+
+from operandi_utils.constants import StateJob
+from operandi_utils.database import db_get_workflow_jobs
+from operandi_server.constants import JOB_STATE_HUB_POLL_INTERVAL
+
+
+class _JobStateSubscription:
+    def __init__(self, job_id: str, last_state: StateJob):
+        self.job_id = job_id
+        # The last job state known to the subscriber, only different states are delivered
+        self.last_state = last_state
+        self.states: Queue = Queue()
+
+
+class JobStateHub:
+    """
+    In-process notification hub of the workflow job state transitions, shared by all SSE streams and
+    long-polling requests of the Operandi Server.
+
+    The job states are changed by the Operandi Broker processes, hence the hub watches the database.
+    A single background task loads the states of all subscribed jobs with one query every `poll_interval`
+    seconds and delivers each change to the subscribers of the job. No queries are sent while there are
+    no subscribers. Each subscriber tracks the last state it knows, so a change that happened between
+    reading the job and subscribing to it is still delivered.
+    """
+    def __init__(self, poll_interval: float = JOB_STATE_HUB_POLL_INTERVAL):
+        self.logger = getLogger("operandi_server.job_state_hub")
+        self.poll_interval = poll_interval
+        # Keys: workflow job ids, values: the subscriptions to the state changes of the job
+        self._subscriptions: Dict[str, List[_JobStateSubscription]] = {}
+        self._poll_task = None
+
+    def start(self) -> None:
+        if not self._poll_task:
+            self._poll_task = create_task(self._poll_job_states())
+
+    async def stop(self) -> None:
+        if not self._poll_task:
+            return
+        self._poll_task.cancel()
+        try:
+            await self._poll_task
+        except CancelledError:
+            pass
+        self._poll_task = None
+
+    @asynccontextmanager
+    async def subscribe(self, job_id: str, last_state: StateJob) -> AsyncIterator[Queue]:
+        """
+        Yields a queue receiving every state of `job_id` that differs from the previously delivered one
+        """
+        subscription = _JobStateSubscription(job_id=job_id, last_state=last_state)
+        self._subscriptions.setdefault(job_id, []).append(subscription)
+        try:
+            yield subscription.states
+        finally:
+            job_subscriptions = self._subscriptions[job_id]
+            job_subscriptions.remove(subscription)
+            if not job_subscriptions:
+                del self._subscriptions[job_id]
+
+    async def wait_for_change(self, job_id: str, last_state: StateJob, timeout: float) -> Optional[StateJob]:
+        """
+        Returns the new state of `job_id` once it differs from `last_state`, or None after `timeout` seconds
+        """
+        async with self.subscribe(job_id=job_id, last_state=last_state) as states:
+            try:
+                return await wait_for(states.get(), timeout=timeout)
+            except AsyncTimeoutError:
+                return None
+
+    async def _poll_job_states(self) -> None:
+        while True:
+            await sleep(self.poll_interval)
+            if not self._subscriptions:
+                continue
+            try:
+                db_workflow_jobs = await db_get_workflow_jobs(job_ids=list(self._subscriptions.keys()))
+            except Exception as error:
+                self.logger.error(f"Failed to load the states of the watched workflow jobs: {error}")
+                continue
+            for db_workflow_job in db_workflow_jobs:
+                self._deliver(job_id=db_workflow_job.job_id, job_state=db_workflow_job.job_state)
+
+    def _deliver(self, job_id: str, job_state: StateJob) -> None:
+        for subscription in self._subscriptions.get(job_id, []):
+            if subscription.last_state == job_state:
+                continue
+            self.logger.debug(
+                f"Workflow job id: {job_id}, old state: {subscription.last_state}, new state: {job_state}")
+            subscription.last_state = job_state
+            subscription.states.put_nowait(job_state)
@@ -0,0 +1,79 @@
+from asyncio import CancelledError, create_task, sleep
+from logging import getLogger
+from os import getpid
+from socket import gethostname
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from operandi_utils.database import db_acquire_server_lock, db_release_server_lock
+from operandi_server.constants import SERVER_LEADER_LOCK_NAME, SERVER_LEADER_LOCK_TTL
+
+
+class ServerLeaderLock:
+    """
+    Elects a single leader among the processes of the Operandi Server through a lock in the database.
+
+    The leader runs `on_elected` once, i.e., the startup work that must not be repeated by each process,
+    and renews the lock every third of `ttl` seconds. The other processes keep trying to acquire the lock,
+    so if the leader dies without releasing it, another process takes over after `ttl` seconds and runs
+    `on_elected` again. If `on_elected` raises, the lock is released, so the startup work is retried by the
+    next process acquiring the lock. Hence, `on_elected` must be idempotent.
+    """
+    def __init__(
+        self, on_elected: Callable[[], Awaitable[None]], lock_name: str = SERVER_LEADER_LOCK_NAME,
+        ttl: float = SERVER_LEADER_LOCK_TTL
+    ):
+        self.logger = getLogger("operandi_server.leader_lock")
+        self.on_elected = on_elected
+        self.lock_name = lock_name
+        self.ttl = ttl
+        self.owner_id = f"{gethostname()}:{getpid()}:{uuid4()}"
+        self.is_leader = False
+        self._renew_task = None
+
+    async def start(self) -> None:
+        """
+        Tries to acquire the lock once, the startup work is done before returning if this process became the leader
+        """
+        await self._try_acquire()
+        if not self._renew_task:
+            self._renew_task = create_task(self._keep_acquiring())
+
+    async def stop(self) -> None:
+        if self._renew_task:
+            self._renew_task.cancel()
+            try:
+                await self._renew_task
+            except CancelledError:
+                pass
+            self._renew_task = None
+        if self.is_leader:
+            await db_release_server_lock(lock_name=self.lock_name, owner_id=self.owner_id)
+            self.is_leader = False
+            self.logger.info(f"Released the leader lock: {self.lock_name}")
+
+    async def _try_acquire(self) -> None:
+        acquired = await db_acquire_server_lock(lock_name=self.lock_name, owner_id=self.owner_id, ttl=self.ttl)
+        if acquired and not self.is_leader:
+            self.logger.info(f"Elected as the leader of the Operandi Server processes: {self.owner_id}")
+            self.is_leader = True
+            try:
+                await self.on_elected()
+            except Exception as error:
+                self.logger.error(f"The startup work of the leader has failed, releasing the leader lock: {error}")
+                self.is_leader = False
+                await db_release_server_lock(lock_name=self.lock_name, owner_id=self.owner_id)
+                raise
+        elif not acquired and self.is_leader:
+            self.logger.warning(f"The leader lock was taken over by another process: {self.lock_name}")
+            self.is_leader = False
+
+    async def _keep_acquiring(self) -> None:
+        while True:
+            await sleep(self.ttl / 3)
+            try:
+                await self._try_acquire()
+            except CancelledError:
+                raise
+            except Exception as error:
+                self.logger.error(f"Failed to acquire or renew the leader lock: {error}")
@@ -1,16 +1,22 @@
 __all__ = [
     "PYDiscovery",
+    "PYSessionToken",
     "PYUserAction",
     "Resource",
     "SbatchArguments",
     "WorkflowArguments",
     "WorkflowRsrc",
     "WorkflowJobRsrc",
+    "WorkflowJobStatus",
+    "WorkflowJobStatusQuery",
+    "WorkflowJobSubmission",
+    "WorkflowJobSubmissionResult",
     "WorkspaceRsrc"
 ]
 
-from .base import Resource, SbatchArguments, WorkflowArguments
+from .base import (
+    Resource, SbatchArguments, WorkflowArguments, WorkflowJobStatusQuery, WorkflowJobSubmission)
 from .discovery import PYDiscovery
-from .user import PYUserAction
-from .workflow import WorkflowRsrc, WorkflowJobRsrc
+from .user import PYSessionToken, PYUserAction
+from .workflow import WorkflowRsrc, WorkflowJobRsrc, WorkflowJobStatus, WorkflowJobSubmissionResult
 from .workspace import WorkspaceRsrc
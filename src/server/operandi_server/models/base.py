@@ -1,8 +1,9 @@
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
+from operandi_utils.constants import StateJob
 from operandi_utils.hpc.constants import HPC_NHR_JOB_DEFAULT_PARTITION
-from ..constants import DEFAULT_FILE_GRP, DEFAULT_METS_BASENAME
+from ..constants import DEFAULT_FILE_GRP, DEFAULT_METS_BASENAME, JOB_STATUS_QUERY_MAX_LIMIT
 
 class Resource(BaseModel):
     user_id: str = Field(..., description="The unique id of the user who created the resource")
@@ -30,3 +31,22 @@ class SbatchArguments(BaseModel):
 
     class Config:
         allow_population_by_field_name = True
+
+class WorkflowJobStatusQuery(BaseModel):
+    job_ids: Optional[List[str]] = Field(None, description="Only the jobs with these ids")
+    user_id: Optional[str] = Field(None, description="Only the jobs created by this user")
+    job_state: Optional[StateJob] = Field(None, description="Only the jobs currently in this state")
+    since: Optional[datetime] = Field(None, description="Only the jobs created at or after this date time")
+    cursor: Optional[str] = Field(None, description="The `X-Next-Cursor` header value of the previous page")
+    limit: int = Field(JOB_STATUS_QUERY_MAX_LIMIT, ge=1, le=JOB_STATUS_QUERY_MAX_LIMIT)
+
+    class Config:
+        allow_population_by_field_name = True
+
+class WorkflowJobSubmission(BaseModel):
+    workflow_args: WorkflowArguments
+    sbatch_args: SbatchArguments = SbatchArguments()
+    details: str = "Workflow job"
+
+    class Config:
+        allow_population_by_field_name = True
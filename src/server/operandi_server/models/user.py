@@ -25,3 +25,12 @@ class PYUserAction(BaseModel):
             details=db_user_account.details,
             action=action
         )
+
+
+class PYSessionToken(BaseModel):
+    access_token: str = Field(..., description="The session token to be sent in the `Authorization: Bearer` header")
+    token_type: str = Field("bearer", description="The type of the token")
+    expires_in: int = Field(..., description="The amount of seconds the token is valid for")
+
+    class Config:
+        allow_population_by_field_name = True
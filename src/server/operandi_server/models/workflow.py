@@ -1,8 +1,10 @@
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, Union
 from operandi_utils.constants import StateJob
-from operandi_utils.database.models import DBWorkflow, DBWorkflowJob, DBWorkspace
+from operandi_utils.database.models import (
+    DBWorkflow, DBWorkflowJob, DBWorkflowJobListEntry, DBWorkflowListEntry, DBWorkspace)
 from operandi_server.constants import SERVER_WORKFLOWS_ROUTER, SERVER_WORKFLOW_JOBS_ROUTER
-from operandi_server.files_manager import get_resource_url
+from operandi_server.files_manager import abs_resource_url, get_resource_url
 from .base import Resource
 from .workspace import WorkspaceRsrc
 
@@ -19,11 +21,11 @@ class WorkflowRsrc(Resource):
         allow_population_by_field_name = True
 
     @staticmethod
-    def from_db_workflow(db_workflow: DBWorkflow):
+    def from_db_workflow(db_workflow: Union[DBWorkflow, DBWorkflowListEntry]):
         return WorkflowRsrc(
             user_id=db_workflow.user_id,
             resource_id=db_workflow.workflow_id,
-            resource_url=get_resource_url(SERVER_WORKFLOWS_ROUTER, db_workflow.workflow_id),
+            resource_url=abs_resource_url(SERVER_WORKFLOWS_ROUTER, db_workflow.workflow_id),
             description=db_workflow.details,
             datetime=db_workflow.datetime
         )
@@ -55,3 +57,30 @@ class WorkflowJobRsrc(Resource):
             workspace_rsrc=WorkspaceRsrc.from_db_workspace(db_workspace),
             datetime=db_workflow_job.datetime
         )
+
+class WorkflowJobSubmissionResult(BaseModel):
+    workspace_id: str = Field(..., description="The workspace id of the submitted workflow job")
+    status_code: int = Field(..., description="The HTTP status code of the submission of this workflow job")
+    detail: Optional[str] = Field(None, description="The reason of a failed submission")
+    job_rsrc: Optional[WorkflowJobRsrc] = Field(None, description="The created workflow job")
+
+    class Config:
+        allow_population_by_field_name = True
+
+class WorkflowJobStatus(BaseModel):
+    job_id: str
+    workflow_id: str
+    workspace_id: str
+    job_state: StateJob
+
+    class Config:
+        allow_population_by_field_name = True
+
+    @staticmethod
+    def from_db_workflow_job(db_workflow_job: Union[DBWorkflowJob, DBWorkflowJobListEntry]):
+        return WorkflowJobStatus(
+            job_id=db_workflow_job.job_id,
+            workflow_id=db_workflow_job.workflow_id,
+            workspace_id=db_workflow_job.workspace_id,
+            job_state=db_workflow_job.job_state
+        )
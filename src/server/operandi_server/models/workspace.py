@@ -1,8 +1,8 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from operandi_utils.constants import StateWorkspace
-from operandi_utils.database.models import DBWorkspace
+from operandi_utils.database.models import DBWorkspace, DBWorkspaceListEntry
 from operandi_server.constants import SERVER_WORKSPACES_ROUTER
-from operandi_server.files_manager import get_resource_url
+from operandi_server.files_manager import abs_resource_url
 from .base import Resource
 
 class WorkspaceRsrc(Resource):
@@ -21,16 +21,18 @@ class WorkspaceRsrc(Resource):
     ocrd_base_version_checksum: Optional[str]
     mets_basename: Optional[str]
     bag_info_adds: Optional[dict]
+    import_files_fetched: Optional[int]
+    import_files_total: Optional[int]
 
     class Config:
         allow_population_by_field_name = True
 
     @staticmethod
-    def from_db_workspace(db_workspace: DBWorkspace):
+    def from_db_workspace(db_workspace: Union[DBWorkspace, DBWorkspaceListEntry]):
         return WorkspaceRsrc(
             user_id=db_workspace.user_id,
             resource_id=db_workspace.workspace_id,
-            resource_url=get_resource_url(SERVER_WORKSPACES_ROUTER, db_workspace.workspace_id),
+            resource_url=abs_resource_url(SERVER_WORKSPACES_ROUTER, db_workspace.workspace_id),
             description=db_workspace.details,
             pages_amount=db_workspace.pages_amount,
             file_groups=db_workspace.file_groups,
@@ -40,5 +42,7 @@ class WorkspaceRsrc(Resource):
             bagit_profile_identifier=db_workspace.bagit_profile_identifier,
             ocrd_base_version_checksum=db_workspace.ocrd_base_version_checksum,
             mets_basename=db_workspace.mets_basename,
-            bag_info_add=db_workspace.bag_info_adds
+            bag_info_add=db_workspace.bag_info_adds,
+            import_files_fetched=db_workspace.import_files_fetched,
+            import_files_total=db_workspace.import_files_total
         )
@@ -0,0 +1,109 @@
+from asyncio import CancelledError, Semaphore, TimeoutError as AsyncTimeoutError, get_running_loop, wait_for
+from logging import getLogger
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from os import killpg, setsid
+from signal import SIGKILL
+from typing import Any, Callable, List
+
+from operandi_server.constants import (
+    PROCESS_POOL_MAX_CONCURRENT_TASKS, PROCESS_POOL_PRELOAD_MODULES, PROCESS_POOL_TASK_TIMEOUT)
+from operandi_server.exceptions import ServerTaskError, ServerTaskTimeoutError
+
+
+def _execute_task(connection: Connection, func: Callable, args: tuple, kwargs: dict) -> None:
+    # The task process leads its own process group, so the processes spawned by the task are killed together with it
+    setsid()
+    try:
+        result = (True, func(*args, **kwargs))
+    except Exception as error:
+        result = (False, error)
+    try:
+        connection.send(result)
+    except Exception as error:
+        # The result or the raised exception could not be pickled
+        connection.send((False, ServerTaskError(f"Failed to send back the result of {func.__name__}: {error}")))
+    finally:
+        connection.close()
+
+
+class ServerProcessPool:
+    """
+    Execution layer for the CPU and IO heavy workspace operations (OCR-D, bagit, file tree operations)
+    that would otherwise block the event loop of the Operandi Server.
+
+    Each task runs in its own process forked from a `forkserver` which has the heavy modules preloaded.
+    That allows to kill a single task once its timeout is reached or its awaiting request is cancelled,
+    without affecting the other tasks.
+    Since the task processes are not daemonic and are outside the Uvicorn process, the tasks may
+    spawn processes on their own, e.g., to checksum with more than `processes=1`. Each task runs in its
+    own session, so killing a task kills the processes it spawned as well. The amount of the
+    concurrently running tasks is bounded, the remaining tasks wait for a free slot.
+    """
+    def __init__(
+        self, max_concurrent_tasks: int = PROCESS_POOL_MAX_CONCURRENT_TASKS,
+        default_timeout: float = PROCESS_POOL_TASK_TIMEOUT, preload_modules: List[str] = None
+    ):
+        self.logger = getLogger("operandi_server.process_pool")
+        self.default_timeout = default_timeout
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self._semaphore = Semaphore(max_concurrent_tasks)
+        self._context = get_context("forkserver")
+        if preload_modules is None:
+            preload_modules = PROCESS_POOL_PRELOAD_MODULES
+        self._context.set_forkserver_preload(preload_modules)
+
+    async def run(self, func: Callable, *args, task_timeout: float = None, **kwargs) -> Any:
+        """
+        Run `func(*args, **kwargs)` in a separate process and return its result. The function and the
+        arguments must be picklable. Exceptions raised by the function are raised again here.
+
+        Raises:
+            ServerTaskTimeoutError: if the task did not finish in `task_timeout` seconds
+            ServerTaskError: if the task process exited without returning a result
+        """
+        if task_timeout is None:
+            task_timeout = self.default_timeout
+        async with self._semaphore:
+            loop = get_running_loop()
+            receiver, sender = self._context.Pipe(duplex=False)
+            process = self._context.Process(target=_execute_task, args=(sender, func, args, kwargs))
+            process.start()
+            # Only the task process keeps the sending end open, hence, EOF is detected if it dies
+            sender.close()
+            readable = loop.create_future()
+            loop.add_reader(receiver.fileno(), lambda: readable.done() or readable.set_result(None))
+            try:
+                await wait_for(readable, timeout=task_timeout)
+                success, result = receiver.recv()
+            except AsyncTimeoutError:
+                self._kill_task(process)
+                message = f"Task {func.__name__} did not finish in {task_timeout} seconds"
+                self.logger.error(message)
+                raise ServerTaskTimeoutError(message)
+            except CancelledError:
+                # The awaiting request is gone, e.g., the client disconnected, the task must not keep running
+                self._kill_task(process)
+                self.logger.warning(f"Task {func.__name__} was cancelled, killed its processes: {process.pid}")
+                raise
+            except EOFError:
+                await loop.run_in_executor(None, process.join)
+                message = f"Task {func.__name__} exited without a result, exit code: {process.exitcode}"
+                self.logger.error(message)
+                raise ServerTaskError(message)
+            finally:
+                loop.remove_reader(receiver.fileno())
+                receiver.close()
+                await loop.run_in_executor(None, process.join)
+        if not success:
+            raise result
+        return result
+
+    @staticmethod
+    def _kill_task(process: BaseProcess) -> None:
+        try:
+            killpg(process.pid, SIGKILL)
+        except ProcessLookupError:
+            # The task has not become a process group leader yet or has already exited
+            process.kill()
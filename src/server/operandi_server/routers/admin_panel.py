@@ -1,38 +1,69 @@
 from logging import getLogger
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
 from operandi_utils.constants import AccountType, ServerApiTag
+from operandi_utils.database import db_update_user_account
 from operandi_utils.utils import send_bag_to_ola_hd
+from operandi_server.constants import PROCESS_POOL_BAGIT_PROCESSES
+from operandi_server.process_pool import ServerProcessPool
+from operandi_server.session_tokens import SessionTokenManager
 from .user import RouterUser
+from .user_utils import AuthCredentials, get_auth_credentials
 from .workspace_utils import create_workspace_bag, get_db_workspace_with_handling, validate_bag_with_handling
 
 
 class RouterAdminPanel:
-    def __init__(self):
+    def __init__(self, process_pool: ServerProcessPool, session_tokens: SessionTokenManager):
         self.logger = getLogger("operandi_server.routers.user")
-        self.user_authenticator = RouterUser()
+        self.process_pool = process_pool
+        self.session_tokens = session_tokens
+        self.user_authenticator = RouterUser(session_tokens)
         self.router = APIRouter(tags=[ServerApiTag.ADMIN])
         self.router.add_api_route(
             path="/admin/push_to_ola_hd",
             endpoint=self.push_to_ola_hd, methods=["POST"], status_code=status.HTTP_201_CREATED,
             summary="Push a workspace to Ola-HD service"
         )
+        self.router.add_api_route(
+            path="/admin/user/{user_id}/approval",
+            endpoint=self.update_user_approval, methods=["PUT"], status_code=status.HTTP_200_OK,
+            summary="Approve or unapprove the user account identified with `user_id`"
+        )
 
-    async def push_to_ola_hd(self, workspace_id: str, auth: HTTPBasicCredentials = Depends(HTTPBasic())):
+    async def _admin_login(self, auth: AuthCredentials):
         py_user_action = await self.user_authenticator.user_login(auth)
         if py_user_action.account_type != AccountType.ADMIN:
             message = f"Admin privileges required for the endpoint"
             self.logger.error(f"{message}")
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=message)
+
+    async def update_user_approval(
+        self, user_id: str, approved: bool, auth: AuthCredentials = Depends(get_auth_credentials)
+    ):
+        await self._admin_login(auth)
+        try:
+            await db_update_user_account(user_id=user_id, approved_user=approved)
+        except RuntimeError as error:
+            message = f"Non-existing DB entry for user id: {user_id}"
+            self.logger.error(f"{message}, error: {error}")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=message)
+        # The session tokens of the account are verified against the database again
+        self.session_tokens.invalidate(user_id)
+        return {"message": f"The approval of user id: {user_id} was set to: {approved}"}
+
+    async def push_to_ola_hd(self, workspace_id: str, auth: AuthCredentials = Depends(get_auth_credentials)):
+        await self._admin_login(auth)
         db_workspace = await get_db_workspace_with_handling(self.logger, workspace_id=workspace_id)
         try:
-            bag_dst = create_workspace_bag(db_workspace=db_workspace)
+            bag_dst = await self.process_pool.run(
+                create_workspace_bag, workspace_dir=db_workspace.workspace_dir,
+                ocrd_identifier=db_workspace.ocrd_identifier, mets_basename=db_workspace.mets_basename,
+                processes=PROCESS_POOL_BAGIT_PROCESSES)
         except Exception as error:
             message = f"Failed to create workspace bag for: {workspace_id}"
             self.logger.error(f"{message}, error: {error}")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
-        validate_bag_with_handling(self.logger, bag_dst=bag_dst)
+        await validate_bag_with_handling(self.logger, self.process_pool, bag_dst=bag_dst)
 
         try:
             pid = send_bag_to_ola_hd(path_to_bag=bag_dst)
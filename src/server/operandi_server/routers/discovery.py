@@ -5,17 +5,18 @@ from logging import getLogger
 from os import cpu_count
 from psutil import virtual_memory
 from fastapi import APIRouter, Depends, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
 from operandi_utils.constants import ServerApiTag
 from operandi_server.models import PYDiscovery
+from operandi_server.session_tokens import SessionTokenManager
 from .user import RouterUser
+from .user_utils import AuthCredentials, get_auth_credentials
 
 
 class RouterDiscovery:
-    def __init__(self):
+    def __init__(self, session_tokens: SessionTokenManager):
         self.logger = getLogger("operandi_server.routers.discovery")
-        self.user_authenticator = RouterUser()
+        self.user_authenticator = RouterUser(session_tokens)
 
         self.router = APIRouter(tags=[ServerApiTag.DISCOVERY])
         self.router.add_api_route(
@@ -25,7 +26,7 @@ class RouterDiscovery:
             response_model=PYDiscovery, response_model_exclude_unset=True, response_model_exclude_none=True
         )
 
-    async def discovery(self, auth: HTTPBasicCredentials = Depends(HTTPBasic())) -> PYDiscovery:
+    async def discovery(self, auth: AuthCredentials = Depends(get_auth_credentials)) -> PYDiscovery:
         await self.user_authenticator.user_login(auth)
         response = PYDiscovery(
             ram=virtual_memory().total / (1024.0 ** 3),
@@ -1,18 +1,20 @@
 from logging import getLogger
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials
 
 from operandi_utils.constants import AccountType, ServerApiTag
-from operandi_utils.database import db_get_processing_stats, db_get_user_account_with_email
+from operandi_utils.database import db_get_processing_stats
 from operandi_server.exceptions import AuthenticationError
-from operandi_server.models import PYUserAction
+from operandi_server.models import PYSessionToken, PYUserAction
+from operandi_server.session_tokens import SessionTokenManager
 from operandi_utils.database.models import DBProcessingStatistics
-from .user_utils import user_auth, user_register_with_handling
+from .user_utils import AuthCredentials, get_auth_credentials, user_auth, user_register_with_handling
 
 
 class RouterUser:
-    def __init__(self):
+    def __init__(self, session_tokens: SessionTokenManager):
         self.logger = getLogger("operandi_server.routers.user")
+        self.session_tokens = session_tokens
         self.router = APIRouter(tags=[ServerApiTag.USER])
         self.router.add_api_route(
             path="/user/login",
@@ -20,6 +22,13 @@ class RouterUser:
             summary="Authenticate a user with their e-mail and password",
             response_model=PYUserAction, response_model_exclude_unset=True, response_model_exclude_none=True
         )
+        self.router.add_api_route(
+            path="/user/token",
+            endpoint=self.issue_session_token, methods=["POST"], status_code=status.HTTP_201_CREATED,
+            summary="Authenticate a user with their e-mail and password and issue a short-lived session token "
+                    "to be used instead of the e-mail and password in the following requests",
+            response_model=PYSessionToken, response_model_exclude_unset=False, response_model_exclude_none=True
+        )
         self.router.add_api_route(
             path="/user/register",
             endpoint=self.user_register, methods=["POST"], status_code=status.HTTP_201_CREATED,
@@ -33,10 +42,18 @@ class RouterUser:
             response_model=DBProcessingStatistics, response_model_exclude_unset=True, response_model_exclude_none=True
         )
 
-    async def user_login(self, auth: HTTPBasicCredentials = Depends(HTTPBasic())) -> PYUserAction:
+    async def user_login(self, auth: AuthCredentials = Depends(get_auth_credentials)) -> PYUserAction:
         """
-        Used for user authentication.
+        Used for user authentication, either with the e-mail and password or with a session token.
         """
+        if isinstance(auth, HTTPAuthorizationCredentials):
+            try:
+                return await self.session_tokens.verify_token(auth.credentials)
+            except AuthenticationError as error:
+                self.logger.error(f"{error}")
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"},
+                    detail=str(error))
         email = auth.username
         password = auth.password
         headers = {"WWW-Authenticate": "Basic"}
@@ -51,6 +68,20 @@ class RouterUser:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, headers=headers, detail=str(error))
         return PYUserAction.from_db_user_account(action="Successfully logged!", db_user_account=db_user_account)
 
+    async def issue_session_token(self, auth: HTTPBasicCredentials = Depends(HTTPBasic())) -> PYSessionToken:
+        """
+        Curl equivalent:
+        `curl -X POST SERVER_ADDR/user/token -u email:password`
+        """
+        headers = {"WWW-Authenticate": "Basic"}
+        try:
+            db_user_account = await user_auth(email=auth.username, password=auth.password)
+        except AuthenticationError as error:
+            self.logger.error(f"{error}")
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, headers=headers, detail=str(error))
+        access_token, expires_in = self.session_tokens.issue_token(db_user_account)
+        return PYSessionToken(access_token=access_token, expires_in=expires_in)
+
     async def user_register(
         self, email: str, password: str, institution_id: str, account_type: AccountType = AccountType.USER,
         details: str = "User Account"
@@ -77,8 +108,7 @@ class RouterUser:
                  f"Please contact the OCR-D team to get your account validated before use."
         return PYUserAction.from_db_user_account(action=action, db_user_account=db_user_account)
 
-    async def user_processing_stats(self, auth: HTTPBasicCredentials = Depends(HTTPBasic())):
-        await self.user_login(auth)
-        db_user_account = await db_get_user_account_with_email(email=auth.username)
-        db_processing_stats = await db_get_processing_stats(db_user_account.user_id)
+    async def user_processing_stats(self, auth: AuthCredentials = Depends(get_auth_credentials)):
+        py_user_action = await self.user_login(auth)
+        db_processing_stats = await db_get_processing_stats(py_user_action.user_id)
         return db_processing_stats
@@ -1,14 +1,28 @@
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials, HTTPBearer
 from hashlib import sha512
 from random import random
-from typing import Tuple
+from typing import Optional, Tuple, Union
 
 from operandi_utils.constants import AccountType
 from operandi_utils.database import (
-    db_create_processing_stats, db_create_user_account, db_get_user_account, db_get_user_account_with_email,
-    DBUserAccount)
+    db_create_processing_stats, db_create_user_account, db_get_user_account_with_email, DBUserAccount)
 from operandi_server.exceptions import AuthenticationError
 
+# Either the e-mail and password of the basic scheme or the session token of the bearer scheme
+AuthCredentials = Union[HTTPBasicCredentials, HTTPAuthorizationCredentials]
+
+
+async def get_auth_credentials(
+    basic: Optional[HTTPBasicCredentials] = Depends(HTTPBasic(auto_error=False)),
+    bearer: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> AuthCredentials:
+    if basic:
+        return basic
+    if bearer:
+        return bearer
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Basic"}, detail="Not authenticated")
 
 
 async def create_user_if_not_available(
@@ -45,7 +59,7 @@ async def user_register_with_handling(
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, headers=headers, detail=message)
     salt, encrypted_password = encrypt_password(password)
     try:
-        await db_get_user_account(email)
+        await db_get_user_account_with_email(email=email)
     except RuntimeError:
         # No user existing with the provided e-mail, register
         db_user_account = await db_create_user_account(
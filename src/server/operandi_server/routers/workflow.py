@@ -1,47 +1,58 @@
+from asyncio import TimeoutError as AsyncTimeoutError, gather, wait_for
+from datetime import datetime
+from hashlib import sha256
 from json import dumps
 from logging import getLogger
 from os import unlink
-from os.path import join
+from os.path import exists, join
 from pathlib import Path
 from shutil import make_archive, copyfile
 from tempfile import mkdtemp
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile
-from fastapi.responses import FileResponse
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from starlette.status import HTTP_404_NOT_FOUND
 
 from operandi_utils import get_nf_workflows_dir
 from operandi_utils.constants import AccountType, ServerApiTag, StateJob, StateWorkspace
 from operandi_utils.database import (
-    db_create_workflow, db_create_workflow_job, db_get_hpc_slurm_job, db_get_workflow, db_update_workspace,
-    db_increase_processing_stats_with_handling)
-from operandi_utils.oton.converter import OTONConverter
-from operandi_utils.rabbitmq import (
-    get_connection_publisher, RABBITMQ_QUEUE_JOB_STATUSES, RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS)
-from operandi_server.constants import SERVER_WORKFLOWS_ROUTER, SERVER_WORKFLOW_JOBS_ROUTER, SERVER_WORKSPACES_ROUTER
+    db_create_workflow, db_create_workflow_job, db_create_workflow_jobs, db_get_hpc_slurm_job, db_get_workflow,
+    db_get_workflows, db_get_workspaces, db_list_workflow_jobs, db_list_workflows, db_update_workflow_jobs_state,
+    db_update_workspace, db_update_workspaces_state, db_upsert_workflows, db_increase_processing_stats_with_handling)
+from operandi_utils.oton import OTONConversionCache
+from operandi_utils.rabbitmq import RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS, RMQAsyncPublisher
+from operandi_server.constants import (
+    BATCH_SUBMISSION_MAX_JOBS, JOB_STATE_EVENTS_KEEPALIVE, JOB_STATE_MAX_WAIT, LIST_RESOURCES_DEFAULT_LIMIT,
+    LIST_RESOURCES_MAX_LIMIT, PRODUCTION_WORKFLOWS_USER_ID, SERVER_WORKFLOWS_ROUTER, SERVER_WORKFLOW_JOBS_ROUTER,
+    SERVER_WORKSPACES_ROUTER)
 from operandi_server.files_manager import (
-    create_resource_dir, delete_resource_dir, get_all_resources_url, get_resource_local, get_resource_url,
-    receive_resource)
-from operandi_server.models import SbatchArguments, WorkflowArguments, WorkflowRsrc, WorkflowJobRsrc
+    create_resource_dir, delete_resource_dir, get_resource_local, get_resource_url, receive_resource)
+from operandi_server.job_state_hub import JobStateHub
+from operandi_server.models import (
+    SbatchArguments, WorkflowArguments, WorkflowRsrc, WorkflowJobRsrc, WorkflowJobStatus, WorkflowJobStatusQuery,
+    WorkflowJobSubmission, WorkflowJobSubmissionResult)
+from operandi_server.process_pool import ServerProcessPool
+from operandi_server.session_tokens import SessionTokenManager
 from .workflow_utils import (
-    get_db_workflow_job_with_handling, get_db_workflow_with_handling, nf_script_uses_mets_server_with_handling)
+    convert_oton_with_handling, format_job_state_event, get_db_workflow_job_with_handling,
+    get_db_workflow_with_handling, nf_script_uses_mets_server_with_handling)
 from .workspace_utils import check_if_file_group_exists_with_handling, get_db_workspace_with_handling
 from .user import RouterUser
+from .user_utils import AuthCredentials, get_auth_credentials
 
 
 class RouterWorkflow:
-    def __init__(self):
+    def __init__(
+        self, process_pool: ServerProcessPool, job_state_hub: JobStateHub, rmq_publisher: RMQAsyncPublisher,
+        session_tokens: SessionTokenManager
+    ):
         self.logger = getLogger("operandi_server.routers.workflow")
-        self.user_authenticator = RouterUser()
-
-        # The workflows available to all users by default
-        self.production_workflows = []
-
-        self.logger.info(f"Trying to connect RMQ Publisher")
-        self.rmq_publisher = get_connection_publisher(enable_acks=True)
-        self.logger.info(f"RMQPublisher connected")
+        self.process_pool = process_pool
+        self.job_state_hub = job_state_hub
+        self.rmq_publisher = rmq_publisher
+        self.user_authenticator = RouterUser(session_tokens)
+        self.oton_cache = OTONConversionCache()
 
         self.router = APIRouter(tags=[ServerApiTag.WORKFLOW])
         self.router.add_api_route(
@@ -73,6 +84,14 @@ class RouterWorkflow:
             summary="Run a workflow job with the specified `workflow_id` and arguments in the request body.",
             response_model=WorkflowJobRsrc, response_model_exclude_unset=True, response_model_exclude_none=True
         )
+        self.router.add_api_route(
+            path="/workflow/{workflow_id}/batch",
+            endpoint=self.submit_batch_to_rabbitmq_queue, methods=["POST"], status_code=status.HTTP_200_OK,
+            summary="Run a batch of workflow jobs with the specified `workflow_id` and a list of arguments in the "
+                    "request body. The submission result of each workflow job is reported separately.",
+            response_model=List[WorkflowJobSubmissionResult], response_model_exclude_unset=True,
+            response_model_exclude_none=True
+        )
         self.router.add_api_route(
             path="/workflow/{workflow_id}/{job_id}",
             endpoint=self.get_workflow_job_status, methods=["GET"], status_code=status.HTTP_200_OK,
@@ -85,9 +104,25 @@ class RouterWorkflow:
             4) FAILED - The workflow job has failed.
             5) SUCCESS - The workflow job has finished successfully.
             6) UNSET - The workflow job state was not set yet.
+            With `wait` seconds set, the response is delayed till the job state changes or the `wait` expires.
             """,
             response_model=WorkflowJobRsrc, response_model_exclude_unset=True, response_model_exclude_none=True
         )
+        self.router.add_api_route(
+            path="/workflow-jobs/status",
+            endpoint=self.query_workflow_jobs_status, methods=["POST"], status_code=status.HTTP_200_OK,
+            summary="Get the states of the workflow jobs matching the list of job ids and/or the filters "
+                    "in the request body.",
+            response_model=List[WorkflowJobStatus], response_model_exclude_unset=False,
+            response_model_exclude_none=True
+        )
+        self.router.add_api_route(
+            path="/workflow/{workflow_id}/{job_id}/events",
+            endpoint=self.stream_workflow_job_events, methods=["GET"], status_code=status.HTTP_200_OK,
+            summary="Stream the state transitions of a job identified with `workflow_id` and `job_id` as "
+                    "Server-Sent Events. The stream ends once the job fails or succeeds.",
+            response_model=None, response_model_exclude_unset=False, response_model_exclude_none=False
+        )
         self.router.add_api_route(
             path="/workflow/{workflow_id}/{job_id}/logs",
             endpoint=self.download_workflow_job_logs, methods=["GET"], status_code=status.HTTP_200_OK,
@@ -109,26 +144,15 @@ class RouterWorkflow:
             summary="Upload a text file containing a workflow in ocrd process format and convert it to a Nextflow script in the desired format (local/docker)"
         )
 
-    def __del__(self):
-        if self.rmq_publisher:
-            self.rmq_publisher.disconnect()
-
-    async def _push_status_request_to_rabbitmq(self, job_id: str):
-        # Create the job status message to be sent to the RabbitMQ queue
-        try:
-            job_status_message = {"job_id": f"{job_id}"}
-            self.logger.debug(f"Encoding the job status RabbitMQ message: {job_status_message}")
-            encoded_wf_message = dumps(job_status_message).encode(encoding="utf-8")
-            self.logger.debug(f"Pushing to the RabbitMQ queue for job statuses: {RABBITMQ_QUEUE_JOB_STATUSES}")
-            self.rmq_publisher.publish_to_queue(queue_name=RABBITMQ_QUEUE_JOB_STATUSES, message=encoded_wf_message)
-        except Exception as error:
-            message = "Failed to push status request to RabbitMQ"
-            self.logger.error(f"{message}, error: {error}")
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
-
     async def insert_production_workflows(self, production_workflows_dir: Path = get_nf_workflows_dir()):
+        """
+        Registers only the new and changed production workflow scripts, identified by the sha256 of their content.
+        The registered workflows are loaded with a single query and the changes are upserted with a single bulk write.
+        """
         wf_detail = "Workflow provided by the Operandi Server"
         self.logger.info(f"Inserting production workflows for Operandi from: {production_workflows_dir}")
+        # Keys: workflow ids, values: the path and the content hash of the shipped nextflow script
+        nf_scripts: Dict[str, Tuple[Path, str]] = {}
         for path in production_workflows_dir.iterdir():
             if not path.is_file():
                 self.logger.info(f"Skipping non-file path: {path}")
@@ -138,34 +162,62 @@ class RouterWorkflow:
                 continue
             # path.stem -> file_name
             # path.name -> file_name.ext
+            nf_scripts[path.stem] = (path, sha256(path.read_bytes()).hexdigest())
+
+        db_workflows = {
+            db_workflow.workflow_id: db_workflow
+            for db_workflow in await db_get_workflows(workflow_ids=list(nf_scripts.keys()))
+        }
+        changed_workflows = []
+        for workflow_id, (path, script_hash) in nf_scripts.items():
+            db_workflow = db_workflows.get(workflow_id, None)
+            if (
+                db_workflow and db_workflow.workflow_script_hash == script_hash and not db_workflow.deleted
+                and db_workflow.user_id == PRODUCTION_WORKFLOWS_USER_ID and exists(db_workflow.workflow_script_path)
+            ):
+                continue
             workflow_id, workflow_dir = create_resource_dir(
-                SERVER_WORKFLOWS_ROUTER, resource_id=path.stem, exists_ok=True)
+                SERVER_WORKFLOWS_ROUTER, resource_id=workflow_id, exists_ok=True)
             nf_script_dest = join(workflow_dir, path.name)
             copyfile(src=path, dst=nf_script_dest)
             uses_mets_server = await nf_script_uses_mets_server_with_handling(self.logger, nf_script_dest)
-            self.logger.info(f"Inserting: {workflow_id}, uses_mets_server: {uses_mets_server}, script path: {nf_script_dest}")
-            await db_create_workflow(
-                user_id="Operandi Server",
-                workflow_id=workflow_id, workflow_dir=workflow_dir, workflow_script_path=nf_script_dest,
-                workflow_script_base=path.name, uses_mets_server=uses_mets_server, details=wf_detail)
-            self.production_workflows.append(workflow_id)
-
-    async def list_workflows(self, auth: HTTPBasicCredentials = Depends(HTTPBasic())) -> List[WorkflowRsrc]:
+            self.logger.info(
+                f"Inserting: {workflow_id}, uses_mets_server: {uses_mets_server}, script path: {nf_script_dest}")
+            changed_workflows.append({
+                "user_id": PRODUCTION_WORKFLOWS_USER_ID, "workflow_id": workflow_id, "workflow_dir": workflow_dir,
+                "workflow_script_base": path.name, "workflow_script_path": nf_script_dest,
+                "workflow_script_hash": script_hash, "uses_mets_server": uses_mets_server, "details": wf_detail})
+        await db_upsert_workflows(workflows=changed_workflows)
+        self.logger.info(
+            f"Registered {len(changed_workflows)} new or changed of {len(nf_scripts)} production workflows")
+
+    async def list_workflows(
+        self, response: Response, user_id: Optional[str] = None, deleted: bool = False,
+        start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, cursor: Optional[str] = None,
+        limit: int = Query(default=LIST_RESOURCES_DEFAULT_LIMIT, ge=1, le=LIST_RESOURCES_MAX_LIMIT),
+        auth: AuthCredentials = Depends(get_auth_credentials)
+    ) -> List[WorkflowRsrc]:
         """
+        The list is paginated, if there are more entries the `X-Next-Cursor` response header
+        contains the `cursor` value to be passed for the next page.
+
         Curl equivalent:
-        `curl SERVER_ADDR/workflow`
+        `curl SERVER_ADDR/workflow?limit=100&cursor={cursor}`
         """
         await self.user_authenticator.user_login(auth)
-        workflows = get_all_resources_url(SERVER_WORKFLOWS_ROUTER)
-        response = []
-        for workflow in workflows:
-            wf_id, wf_url = workflow
-            db_workflow = await db_get_workflow(workflow_id=wf_id)
-            response.append(WorkflowRsrc.from_db_workflow(db_workflow))
-        return response
+        try:
+            db_workflows = await db_list_workflows(
+                user_id=user_id, deleted=deleted, start_date=start_date, end_date=end_date, cursor=cursor,
+                limit=limit)
+        except ValueError as error:
+            self.logger.error(f"{error}")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"{error}")
+        if len(db_workflows) == limit:
+            response.headers["X-Next-Cursor"] = str(db_workflows[-1].id)
+        return [WorkflowRsrc.from_db_workflow(db_workflow) for db_workflow in db_workflows]
 
     async def download_workflow_script(
-        self, workflow_id: str, auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        self, workflow_id: str, auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> FileResponse:
         """
         Curl equivalent:
@@ -181,7 +233,7 @@ class RouterWorkflow:
 
     async def upload_workflow_script(
         self, nextflow_script: UploadFile, details: str = "Nextflow workflow",
-        auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> WorkflowRsrc:
         """
         Curl equivalent:
@@ -205,14 +257,19 @@ class RouterWorkflow:
 
     async def update_workflow_script(
         self, nextflow_script: UploadFile, workflow_id: str, details: str = "Nextflow workflow",
-        auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> WorkflowRsrc:
         """
         Curl equivalent:
         `curl -X PUT SERVER_ADDR/workflow/{workflow_id} -F nextflow_script=example.nf`
         """
         py_user_action = await self.user_authenticator.user_login(auth)
-        if workflow_id in self.production_workflows:
+        # The production workflows are read from the database, since they are inserted by the leader process only
+        try:
+            db_workflow = await db_get_workflow(workflow_id)
+        except RuntimeError:
+            db_workflow = None
+        if db_workflow and db_workflow.user_id == PRODUCTION_WORKFLOWS_USER_ID:
             message = f"Production workflow cannot be replaced. Tried to replace: {workflow_id}"
             self.logger.error(message)
             raise HTTPException(status_code=status.HTTP_405_METHOD_NOT_ALLOWED, detail=message)
@@ -239,15 +296,22 @@ class RouterWorkflow:
         return WorkflowRsrc.from_db_workflow(db_workflow)
 
     async def get_workflow_job_status(
-        self, workflow_id: str, job_id: str, auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        self, workflow_id: str, job_id: str, auth: AuthCredentials = Depends(get_auth_credentials),
+        wait: int = Query(default=0, ge=0, le=JOB_STATE_MAX_WAIT)
     ) -> WorkflowJobRsrc:
         """
         Curl equivalent:
-        `curl -X GET SERVER_ADDR/workflow/{workflow_id}/{job_id}`
+        `curl -X GET SERVER_ADDR/workflow/{workflow_id}/{job_id}?wait=30`
         """
         await self.user_authenticator.user_login(auth)
 
         db_wf_job = await get_db_workflow_job_with_handling(self.logger, job_id=job_id, check_local_existence=True)
+        if wait and db_wf_job.job_state not in [StateJob.FAILED, StateJob.SUCCESS]:
+            new_job_state = await self.job_state_hub.wait_for_change(
+                job_id=job_id, last_state=db_wf_job.job_state, timeout=wait)
+            if new_job_state:
+                db_wf_job = await get_db_workflow_job_with_handling(
+                    self.logger, job_id=job_id, check_local_existence=True)
         workspace_id = db_wf_job.workspace_id
         db_workspace = await get_db_workspace_with_handling(
             self.logger, workspace_id=workspace_id, check_ready=False, check_deleted=True, check_local_existence=True)
@@ -255,9 +319,6 @@ class RouterWorkflow:
         db_workflow = await get_db_workflow_with_handling(
             self.logger, workflow_id=workflow_id, check_deleted=False, check_local_existence=False)
 
-        if db_wf_job.job_state != StateJob.FAILED and db_wf_job.job_state != StateJob.SUCCESS:
-            await self._push_status_request_to_rabbitmq(job_id=job_id)
-
         # TODO: Fix that by getting rid of the FileManager module
         try:
             wf_job_url = get_resource_url(SERVER_WORKFLOW_JOBS_ROUTER, resource_id=db_wf_job.job_id)
@@ -271,16 +332,63 @@ class RouterWorkflow:
         return WorkflowJobRsrc.from_db_workflow_job(
             db_workflow_job=db_wf_job, db_workflow=db_workflow, db_workspace=db_workspace)
 
+    async def query_workflow_jobs_status(
+        self, response: Response, status_query: WorkflowJobStatusQuery,
+        auth: AuthCredentials = Depends(get_auth_credentials)
+    ) -> List[WorkflowJobStatus]:
+        """
+        The states are read with a single query. The list is paginated, if there are more entries
+        the `X-Next-Cursor` response header contains the `cursor` value to be passed for the next page.
+
+        Curl equivalent:
+        `curl -X POST SERVER_ADDR/workflow-jobs/status -H "Content-Type: application/json" -d '{"job_ids": [...]}'`
+        """
+        await self.user_authenticator.user_login(auth)
+        try:
+            db_wf_jobs = await db_list_workflow_jobs(
+                job_ids=status_query.job_ids, user_id=status_query.user_id, job_state=status_query.job_state,
+                start_date=status_query.since, cursor=status_query.cursor, limit=status_query.limit)
+        except ValueError as error:
+            self.logger.error(f"{error}")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"{error}")
+        if len(db_wf_jobs) == status_query.limit:
+            response.headers["X-Next-Cursor"] = str(db_wf_jobs[-1].id)
+        return [WorkflowJobStatus.from_db_workflow_job(db_wf_job) for db_wf_job in db_wf_jobs]
+
+    async def stream_workflow_job_events(
+        self, workflow_id: str, job_id: str, auth: AuthCredentials = Depends(get_auth_credentials)
+    ) -> StreamingResponse:
+        """
+        Curl equivalent:
+        `curl -N -X GET SERVER_ADDR/workflow/{workflow_id}/{job_id}/events -H "accept: text/event-stream"`
+        """
+        await self.user_authenticator.user_login(auth)
+        db_wf_job = await get_db_workflow_job_with_handling(self.logger, job_id=job_id, check_local_existence=False)
+        return StreamingResponse(
+            content=self._job_state_events(job_id=job_id, job_state=db_wf_job.job_state),
+            media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def _job_state_events(self, job_id: str, job_state: StateJob) -> AsyncIterator[str]:
+        # The subscription is released by the generator cleanup once the client disconnects
+        async with self.job_state_hub.subscribe(job_id=job_id, last_state=job_state) as job_states:
+            yield format_job_state_event(job_id=job_id, job_state=job_state)
+            while job_state not in [StateJob.FAILED, StateJob.SUCCESS]:
+                try:
+                    job_state = await wait_for(job_states.get(), timeout=JOB_STATE_EVENTS_KEEPALIVE)
+                except AsyncTimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_job_state_event(job_id=job_id, job_state=job_state)
+
     async def download_workflow_job_logs(
         self, background_tasks: BackgroundTasks, workflow_id: str, job_id: str,
-        auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> FileResponse:
         """
         Curl equivalent:
         `curl -X GET SERVER_ADDR/workflow/{workflow_id}/logs -H "accept: application/vnd.zip" -o foo.zip`
         """
         await self.user_authenticator.user_login(auth)
-        await self._push_status_request_to_rabbitmq(job_id=job_id)
 
         db_wf_job = await get_db_workflow_job_with_handling(self.logger, job_id=job_id, check_local_existence=True)
         job_state = db_wf_job.job_state
@@ -297,14 +405,14 @@ class RouterWorkflow:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         tempdir = mkdtemp(prefix="ocrd-wf-job-zip-")
-        job_archive_path = make_archive(base_name=f"{tempdir}/{job_id}", format="zip", root_dir=wf_job_local)
+        job_archive_path = await self.process_pool.run(
+            make_archive, base_name=f"{tempdir}/{job_id}", format="zip", root_dir=wf_job_local)
         background_tasks.add_task(unlink, job_archive_path)
         return FileResponse(path=job_archive_path, filename=f"{job_id}.zip", media_type="application/zip")
 
     async def download_workflow_job_hpc_log(
-        self, workflow_id: str, job_id: str, auth: HTTPBasicCredentials = Depends(HTTPBasic())):
+        self, workflow_id: str, job_id: str, auth: AuthCredentials = Depends(get_auth_credentials)):
         await self.user_authenticator.user_login(auth)
-        await self._push_status_request_to_rabbitmq(job_id=job_id)
 
         db_wf_job = await get_db_workflow_job_with_handling(self.logger, job_id=job_id, check_local_existence=True)
         job_state = db_wf_job.job_state
@@ -330,7 +438,7 @@ class RouterWorkflow:
 
     async def submit_to_rabbitmq_queue(
         self, workflow_id: str, workflow_args: WorkflowArguments, sbatch_args: SbatchArguments,
-        details: str = "Workflow job", auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        details: str = "Workflow job", auth: AuthCredentials = Depends(get_auth_credentials)
     ):
         py_user_action = await self.user_authenticator.user_login(auth)
         user_account_type = py_user_action.account_type
@@ -357,7 +465,8 @@ class RouterWorkflow:
 
         # Check the availability and readiness of the workspace to be used
         db_workspace = await get_db_workspace_with_handling(self.logger, workspace_id=workspace_id)
-        if not check_if_file_group_exists_with_handling(self.logger, db_workspace, input_file_grp):
+        if not await check_if_file_group_exists_with_handling(
+                self.logger, self.process_pool, db_workspace, input_file_grp):
             message = f"The file group `{input_file_grp}` does not exist in the workspace: {db_workspace.workspace_id}"
             self.logger.error(f"{message}")
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=message)
@@ -391,7 +500,7 @@ class RouterWorkflow:
             user_id=py_user_action.user_id, job_id=job_id, job_dir=job_dir, job_state=job_state,
             workspace_id=workspace_id, workflow_id=workflow_id, details=details)
 
-        self._push_job_to_rabbitmq(
+        await self._push_job_to_rabbitmq(
             user_id=py_user_action.user_id, user_type=user_account_type, workflow_id=workflow_id,
             workspace_id=workspace_id, job_id=job_id, input_file_grp=input_file_grp,
             remove_file_grps=remove_file_grps, partition=partition, cpus=cpus, ram=ram
@@ -401,10 +510,172 @@ class RouterWorkflow:
         return WorkflowJobRsrc.from_db_workflow_job(
             db_workflow_job=db_wf_job, db_workflow=db_workflow, db_workspace=db_workspace)
 
-    def _push_job_to_rabbitmq(
-        self, user_id: str, user_type: AccountType, workflow_id: str, workspace_id: str, job_id: str,
-        input_file_grp: str, remove_file_grps: str, partition: str, cpus: int, ram: int
-    ):
+    async def submit_batch_to_rabbitmq_queue(
+        self, workflow_id: str, submissions: List[WorkflowJobSubmission],
+        auth: AuthCredentials = Depends(get_auth_credentials)
+    ) -> List[WorkflowJobSubmissionResult]:
+        """
+        Validates all submissions together, then creates the valid workflow jobs with a single insert,
+        queues their workspaces with a single update and publishes the jobs as a single batch. The jobs
+        not confirmed by RabbitMQ are failed and their workspaces are released again.
+        """
+        py_user_action = await self.user_authenticator.user_login(auth)
+        user_id = py_user_action.user_id
+        if len(submissions) > BATCH_SUBMISSION_MAX_JOBS:
+            message = f"Too many workflow jobs in a single batch: {len(submissions)}, max: {BATCH_SUBMISSION_MAX_JOBS}"
+            self.logger.error(f"{message}")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=message)
+        queue_name = self._get_job_queue_name_with_handling(user_type=py_user_action.account_type)
+        db_workflow = await get_db_workflow_with_handling(self.logger, workflow_id=workflow_id)
+
+        workspace_ids = [submission.workflow_args.workspace_id for submission in submissions]
+        db_workspaces = {
+            db_workspace.workspace_id: db_workspace
+            for db_workspace in await db_get_workspaces(workspace_ids=list(set(workspace_ids)))
+        }
+        # The failed submissions get their result during the validation, the rest once the jobs are queued
+        results: List[Optional[WorkflowJobSubmissionResult]] = [None] * len(submissions)
+        # Indices of the submissions whose input file group is not listed in the workspace database entry
+        unlisted_file_grp_indices = []
+        for index, submission in enumerate(submissions):
+            workspace_id = workspace_ids[index]
+            db_workspace = db_workspaces.get(workspace_id, None)
+            if not db_workspace:
+                status_code = status.HTTP_404_NOT_FOUND
+                detail = f"Non-existing DB entry for workspace id: {workspace_id}"
+            elif db_workspace.deleted:
+                status_code, detail = status.HTTP_410_GONE, f"Workspace has been deleted: {workspace_id}"
+            elif db_workspace.state != StateWorkspace.READY:
+                status_code = status.HTTP_403_FORBIDDEN
+                detail = f"The workspace is not ready yet, current state: {db_workspace.state}"
+            elif workspace_id in workspace_ids[:index]:
+                status_code = status.HTTP_409_CONFLICT
+                detail = f"The workspace is used by more than one job of the batch: {workspace_id}"
+            else:
+                if submission.workflow_args.input_file_grp not in db_workspace.file_groups:
+                    unlisted_file_grp_indices.append(index)
+                continue
+            self.logger.error(f"{detail}")
+            results[index] = WorkflowJobSubmissionResult(
+                workspace_id=workspace_id, status_code=status_code, detail=detail)
+
+        # The listed file groups may be outdated, hence, the METS files of the workspaces are checked as well
+        file_grp_checks = await gather(*[
+            check_if_file_group_exists_with_handling(
+                self.logger, self.process_pool, db_workspaces[workspace_ids[index]],
+                submissions[index].workflow_args.input_file_grp)
+            for index in unlisted_file_grp_indices
+        ], return_exceptions=True)
+        for index, file_grp_exists in zip(unlisted_file_grp_indices, file_grp_checks):
+            workspace_id = workspace_ids[index]
+            if isinstance(file_grp_exists, HTTPException):
+                status_code, detail = file_grp_exists.status_code, file_grp_exists.detail
+            elif isinstance(file_grp_exists, Exception) or not file_grp_exists:
+                input_file_grp = submissions[index].workflow_args.input_file_grp
+                status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+                detail = f"The file group `{input_file_grp}` does not exist in the workspace: {workspace_id}"
+            else:
+                continue
+            self.logger.error(f"{detail}")
+            results[index] = WorkflowJobSubmissionResult(
+                workspace_id=workspace_id, status_code=status_code, detail=detail)
+
+        # Keys: indices of the valid submissions, values: the workflow job entries to be created
+        jobs: Dict[int, Dict[str, str]] = {}
+        for index, submission in enumerate(submissions):
+            if results[index]:
+                continue
+            try:
+                job_id, job_dir = create_resource_dir(SERVER_WORKFLOW_JOBS_ROUTER)
+            except Exception as error:
+                message = "Failed to create or parse local resources"
+                self.logger.error(f"{message}, error: {error}")
+                results[index] = WorkflowJobSubmissionResult(
+                    workspace_id=workspace_ids[index], status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=message)
+                continue
+            jobs[index] = {
+                "job_id": job_id, "job_dir": job_dir, "workspace_id": workspace_ids[index],
+                "details": submission.details}
+        if not jobs:
+            return results
+
+        queued_job_ids = [job["job_id"] for job in jobs.values()]
+        queued_workspace_ids = [job["workspace_id"] for job in jobs.values()]
+        self.logger.info(f"Updating the state to {StateWorkspace.QUEUED} of {len(queued_workspace_ids)} workspaces")
+        await db_update_workspaces_state(workspace_ids=queued_workspace_ids, state=StateWorkspace.QUEUED)
+        self.logger.info(f"Saving {len(queued_job_ids)} workflow jobs to the database")
+        db_wf_jobs = await db_create_workflow_jobs(
+            user_id=user_id, workflow_id=workflow_id, job_state=StateJob.QUEUED, jobs=list(jobs.values()))
+
+        job_messages = []
+        for index in jobs.keys():
+            workflow_args = submissions[index].workflow_args
+            sbatch_args = submissions[index].sbatch_args
+            job_messages.append(self._create_job_message(
+                user_id=user_id, workflow_id=workflow_id, workspace_id=workspace_ids[index],
+                job_id=jobs[index]["job_id"], input_file_grp=workflow_args.input_file_grp,
+                remove_file_grps=workflow_args.remove_file_grps, partition=sbatch_args.partition,
+                cpus=sbatch_args.cpus, ram=sbatch_args.ram))
+        try:
+            publish_errors = await self.rmq_publisher.publish_batch_to_queue(
+                queue_name=queue_name, messages=job_messages)
+        except Exception as error:
+            message = "Failed to push the workflow jobs to RabbitMQ"
+            self.logger.error(f"{message}, error: {error}")
+            # None of the batch messages was enqueued, hence, the created jobs will never be executed
+            await db_update_workspaces_state(workspace_ids=queued_workspace_ids, state=StateWorkspace.READY)
+            await db_update_workflow_jobs_state(job_ids=queued_job_ids, job_state=StateJob.FAILED)
+            for index in jobs.keys():
+                results[index] = WorkflowJobSubmissionResult(
+                    workspace_id=workspace_ids[index], status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=message)
+            return results
+
+        # Indices of the submissions whose job messages were not confirmed by RabbitMQ
+        unconfirmed_indices = [index for index, error in zip(jobs.keys(), publish_errors) if error]
+        if unconfirmed_indices:
+            message = "Failed to push the workflow job to RabbitMQ"
+            self.logger.error(f"{message}, not confirmed jobs: {len(unconfirmed_indices)}")
+            await db_update_workspaces_state(
+                workspace_ids=[workspace_ids[index] for index in unconfirmed_indices], state=StateWorkspace.READY)
+            await db_update_workflow_jobs_state(
+                job_ids=[jobs[index]["job_id"] for index in unconfirmed_indices], job_state=StateJob.FAILED)
+            for index in unconfirmed_indices:
+                results[index] = WorkflowJobSubmissionResult(
+                    workspace_id=workspace_ids[index], status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=message)
+
+        pages_submitted = sum(
+            db_workspaces[workspace_ids[index]].pages_amount for index in jobs.keys() if not results[index])
+        if pages_submitted:
+            await db_increase_processing_stats_with_handling(
+                self.logger, find_user_id=user_id, pages_submitted=pages_submitted)
+        for index, db_wf_job in zip(jobs.keys(), db_wf_jobs):
+            if results[index]:
+                continue
+            db_workspace = db_workspaces[workspace_ids[index]]
+            db_workspace.state = StateWorkspace.QUEUED
+            results[index] = WorkflowJobSubmissionResult(
+                workspace_id=db_workspace.workspace_id, status_code=status.HTTP_201_CREATED,
+                job_rsrc=WorkflowJobRsrc.from_db_workflow_job(
+                    db_workflow_job=db_wf_job, db_workflow=db_workflow, db_workspace=db_workspace))
+        return results
+
+    def _get_job_queue_name_with_handling(self, user_type: AccountType) -> str:
+        # The jobs are queued based on the user type
+        if user_type == AccountType.HARVESTER:
+            return RABBITMQ_QUEUE_HARVESTER
+        if user_type == AccountType.ADMIN or user_type == AccountType.USER:
+            return RABBITMQ_QUEUE_USERS
+        message = f"The user account type is not valid: {user_type}. Must be one of: {AccountType}"
+        self.logger.error(f"{message}")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=message)
+
+    def _create_job_message(
+        self, user_id: str, workflow_id: str, workspace_id: str, job_id: str, input_file_grp: str,
+        remove_file_grps: str, partition: str, cpus: int, ram: int
+    ) -> bytes:
         # Create the message to be sent to the RabbitMQ queue
         self.logger.info("Creating a workflow job RabbitMQ message")
         workflow_processing_message = {
@@ -419,51 +690,31 @@ class RouterWorkflow:
             "ram": f"{ram}"
         }
         self.logger.info(f"Encoding the workflow job RabbitMQ message: {workflow_processing_message}")
-        encoded_workflow_message = dumps(workflow_processing_message).encode(encoding="utf-8")
+        return dumps(workflow_processing_message).encode(encoding="utf-8")
 
-        # Send the message to a queue based on the user type
-        if user_type == AccountType.HARVESTER:
-            self.logger.info(f"Pushing to the RabbitMQ queue for the harvester: {RABBITMQ_QUEUE_HARVESTER}")
-            self.rmq_publisher.publish_to_queue(queue_name=RABBITMQ_QUEUE_HARVESTER, message=encoded_workflow_message)
-        elif user_type == AccountType.ADMIN or user_type == AccountType.USER:
-            self.logger.info(f"Pushing to the RabbitMQ queue for the users: {RABBITMQ_QUEUE_USERS}")
-            self.rmq_publisher.publish_to_queue(queue_name=RABBITMQ_QUEUE_USERS, message=encoded_workflow_message)
-        else:
-            message = f"The user account type is not valid: {user_type}. Must be one of: {AccountType}"
-            self.logger.error(f"{message}")
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=message)
+    async def _push_job_to_rabbitmq(
+        self, user_id: str, user_type: AccountType, workflow_id: str, workspace_id: str, job_id: str,
+        input_file_grp: str, remove_file_grps: str, partition: str, cpus: int, ram: int
+    ):
+        queue_name = self._get_job_queue_name_with_handling(user_type=user_type)
+        encoded_workflow_message = self._create_job_message(
+            user_id=user_id, workflow_id=workflow_id, workspace_id=workspace_id, job_id=job_id,
+            input_file_grp=input_file_grp, remove_file_grps=remove_file_grps, partition=partition, cpus=cpus, ram=ram)
+        self.logger.info(f"Pushing to the RabbitMQ queue: {queue_name}")
+        await self.rmq_publisher.publish_to_queue(queue_name=queue_name, message=encoded_workflow_message)
 
     # Added by Faizan
     async def convert_txt_to_nextflow(self,
                                       file: UploadFile,
                                       dockerized: bool,
-                                      auth: HTTPBasicCredentials = Depends(HTTPBasic())):
+                                      auth: AuthCredentials = Depends(get_auth_credentials)):
 
         # Authenticate the user
         await self.user_authenticator.user_login(auth)
 
-        # Define upload directory
-        upload_dir = Path("/tmp/uploaded_files")
-        upload_dir.mkdir(parents=True, exist_ok=True)
-
-        # Save the uploaded file to the server
-        file_path = upload_dir / "tmp.txt"
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
-
-        # Create the output Nextflow file path
-        output_file = file_path.with_suffix(".nf")
-        # Use the Converter's convert_OtoN function instead of directly calling OCRDValidator
-        converter = OTONConverter()
-        try:
-            # Call the conversion function (this will also perform validation inside)
-            if dockerized:
-                converter.convert_oton_env_docker(str(file_path), str(output_file))
-            else:
-                converter.convert_oton_env_local(str(file_path), str(output_file))
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-
-        # Return the generated Nextflow (.nf) file as a response
-
-        return FileResponse(output_file, filename=output_file.name)
\ No newline at end of file
+        ocrd_workflow = await file.read()
+        environment = "docker" if dockerized else "local"
+        nf_script_path = await convert_oton_with_handling(
+            self.logger, self.process_pool, self.oton_cache, ocrd_workflow=ocrd_workflow, environment=environment)
+        nf_script_name = f"{Path(file.filename).stem}.nf" if file.filename else "workflow.nf"
+        return FileResponse(nf_script_path, filename=nf_script_name, media_type="application/nextflow-file")
\ No newline at end of file
@@ -1,8 +1,13 @@
 from fastapi import HTTPException, status
+from json import dumps
 from pathlib import Path
 
+from operandi_utils.constants import StateJob
 from operandi_utils.database import db_get_workflow, db_get_workflow_job
 from operandi_utils.database.models import DBWorkflow, DBWorkflowJob
+from operandi_utils.oton import OTONConversionCache
+from operandi_server.exceptions import ServerTaskTimeoutError
+from operandi_server.process_pool import ServerProcessPool
 
 
 async def get_db_workflow_with_handling(
@@ -54,3 +59,29 @@ async def nf_script_uses_mets_server_with_handling(
         message = "Failed to identify whether a mets server is used or not in the provided Nextflow workflow."
         logger.error(f"{message}, error: {error}")
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=message)
+
+
+async def convert_oton_with_handling(
+    logger, process_pool: ServerProcessPool, oton_cache: OTONConversionCache, ocrd_workflow: bytes, environment: str
+) -> str:
+    # Cache hits are served directly, only the conversions are executed outside the event loop
+    nf_script_path = oton_cache.get(ocrd_workflow, environment)
+    if nf_script_path:
+        return nf_script_path
+    message = "Failed to convert the OCR-D workflow to a Nextflow workflow"
+    try:
+        return await process_pool.run(oton_cache.convert, ocrd_workflow, environment)
+    except ValueError as error:
+        logger.error(f"{message}, error: {error}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{error}")
+    except ServerTaskTimeoutError as error:
+        logger.error(f"{message}, error: {error}")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=message)
+    except Exception as error:
+        logger.error(f"{message}, error: {error}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
+
+
+def format_job_state_event(job_id: str, job_state: StateJob) -> str:
+    job_state_data = dumps({"job_id": job_id, "job_state": job_state})
+    return f"event: job_state\ndata: {job_state_data}\n\n"
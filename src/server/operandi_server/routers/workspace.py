@@ -1,38 +1,46 @@
+from datetime import datetime
+from json import dumps
 from logging import getLogger
-from os import unlink
 from pathlib import Path
 from shutil import rmtree
-from typing import List
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile
-from fastapi.responses import FileResponse
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from operandi_utils.bagging import stream_workspace_bag, WorkspaceBagCache
 from operandi_utils.constants import ServerApiTag, StateWorkspace
 from operandi_utils.database import (
-    db_create_workspace, db_get_workspace, db_update_workspace, db_increase_processing_stats_with_handling)
-from operandi_server.constants import SERVER_WORKSPACES_ROUTER, DEFAULT_METS_BASENAME
-from operandi_server.files_manager import (
-    create_resource_dir, delete_resource_dir, get_all_resources_url, get_resource_url, receive_resource)
+    db_create_workspace, db_get_workspace, db_list_workspaces, db_update_workspace,
+    db_increase_processing_stats_with_handling)
+from operandi_utils.rabbitmq import RABBITMQ_QUEUE_WORKSPACE_IMPORTS, RMQAsyncPublisher
+from operandi_server.constants import (
+    DEFAULT_METS_BASENAME, LIST_RESOURCES_DEFAULT_LIMIT, LIST_RESOURCES_MAX_LIMIT, SERVER_WORKSPACES_ROUTER)
+from operandi_server.files_manager import create_resource_dir, delete_resource_dir, get_resource_url, receive_resource
 from operandi_server.models import WorkspaceRsrc
+from operandi_server.process_pool import ServerProcessPool
+from operandi_server.session_tokens import SessionTokenManager
 from .workspace_utils import (
-    create_workspace_bag,
-    create_workspace_bag_from_remote_url,
-    extract_bag_info_with_handling,
-    extract_file_groups_with_handling,
-    extract_pages_with_handling,
-    validate_bag_with_handling,
     get_db_workspace_with_handling,
+    ingest_workspace_bag_with_handling,
     parse_file_groups_with_handling,
     remove_file_groups_with_handling
 )
 from .user import RouterUser
+from .user_utils import AuthCredentials, get_auth_credentials
 
 
 class RouterWorkspace:
-    def __init__(self):
+    def __init__(
+        self, process_pool: ServerProcessPool, rmq_publisher: RMQAsyncPublisher, session_tokens: SessionTokenManager
+    ):
         self.logger = getLogger("operandi_server.routers.workspace")
-        self.user_authenticator = RouterUser()
+        self.process_pool = process_pool
+        self.rmq_publisher = rmq_publisher
+        self.user_authenticator = RouterUser(session_tokens)
+        self.bag_cache = WorkspaceBagCache()
+
         self.router = APIRouter(tags=[ServerApiTag.WORKSPACE])
         self.router.add_api_route(
             path="/workspace",
@@ -46,6 +54,12 @@ class RouterWorkspace:
             summary="Import workspace as an ocrd zip. Returns a `resource_id` associated with the uploaded workspace.",
             response_model=WorkspaceRsrc, response_model_exclude_unset=True, response_model_exclude_none=True
         )
+        self.router.add_api_route(
+            path="/workspace/{workspace_id}/status",
+            endpoint=self.get_workspace_status, methods=["GET"], status_code=status.HTTP_200_OK,
+            summary="Get the state and the import progress of a workspace identified with `workspace_id`.",
+            response_model=WorkspaceRsrc, response_model_exclude_unset=True, response_model_exclude_none=True
+        )
         self.router.add_api_route(
             path="/workspace/{workspace_id}",
             endpoint=self.download_workspace, methods=["GET"], status_code=status.HTTP_200_OK,
@@ -66,8 +80,9 @@ class RouterWorkspace:
         )
         self.router.add_api_route(
             path="/import_external_workspace",
-            endpoint=self.upload_workspace_from_url, methods=["POST"], status_code=status.HTTP_201_CREATED,
-            summary="Import workspace from mets url. Returns a `resource_id` associated with the uploaded workspace.",
+            endpoint=self.upload_workspace_from_url, methods=["POST"], status_code=status.HTTP_202_ACCEPTED,
+            summary="Import workspace from mets url. "
+                    "Returns a `resource_id` associated with the workspace being imported.",
             response_model=WorkspaceRsrc, response_model_exclude_unset=True, response_model_exclude_none=True
         )
         self.router.add_api_route(
@@ -77,26 +92,51 @@ class RouterWorkspace:
             response_model=WorkspaceRsrc, response_model_exclude_unset=True, response_model_exclude_none=True
         )
 
-    async def list_workspaces(self, auth: HTTPBasicCredentials = Depends(HTTPBasic())) -> List[WorkspaceRsrc]:
+    async def list_workspaces(
+        self, response: Response, user_id: Optional[str] = None, state: Optional[StateWorkspace] = None,
+        deleted: bool = False, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = Query(default=LIST_RESOURCES_DEFAULT_LIMIT, ge=1, le=LIST_RESOURCES_MAX_LIMIT),
+        auth: AuthCredentials = Depends(get_auth_credentials)
+    ) -> List[WorkspaceRsrc]:
+        """
+        The list is paginated, if there are more entries the `X-Next-Cursor` response header
+        contains the `cursor` value to be passed for the next page.
+
+        Curl equivalent:
+        `curl -X GET SERVER_ADDR/workspace?limit=100&cursor={cursor}`
+        """
+        await self.user_authenticator.user_login(auth)
+        try:
+            db_workspaces = await db_list_workspaces(
+                user_id=user_id, state=state, deleted=deleted, start_date=start_date, end_date=end_date,
+                cursor=cursor, limit=limit)
+        except ValueError as error:
+            self.logger.error(f"{error}")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"{error}")
+        if len(db_workspaces) == limit:
+            response.headers["X-Next-Cursor"] = str(db_workspaces[-1].id)
+        return [WorkspaceRsrc.from_db_workspace(db_workspace) for db_workspace in db_workspaces]
+
+    async def get_workspace_status(
+        self, workspace_id: str, auth: AuthCredentials = Depends(get_auth_credentials)
+    ) -> WorkspaceRsrc:
         """
         Curl equivalent:
-        `curl -X GET SERVER_ADDR/workspace`
+        `curl -X GET SERVER_ADDR/workspace/{workspace_id}/status`
         """
         await self.user_authenticator.user_login(auth)
-        workspaces = get_all_resources_url(SERVER_WORKSPACES_ROUTER)
-        response = []
-        for workspace in workspaces:
-            ws_id, ws_url = workspace
-            db_workspace = await db_get_workspace(workspace_id=ws_id)
-            # file_groups = extract_file_groups_from_db_model_with_handling(self.logger, db_workspace)
-            # db_workspace = await db_update_workspace(find_workspace_id=ws_id, file_groups=file_groups)
-            response.append(WorkspaceRsrc.from_db_workspace(db_workspace))
-        return response
+        db_workspace = await get_db_workspace_with_handling(
+            self.logger, workspace_id, check_ready=False, check_deleted=True, check_local_existence=False)
+        return WorkspaceRsrc.from_db_workspace(db_workspace)
 
     async def download_workspace(
-        self, background_tasks: BackgroundTasks, workspace_id: str, auth: HTTPBasicCredentials = Depends(HTTPBasic())
-    ) -> FileResponse:
+        self, workspace_id: str, auth: AuthCredentials = Depends(get_auth_credentials)
+    ) -> Union[FileResponse, StreamingResponse]:
         """
+        The OCRD-ZIP is served from the bag cache if the workspace has not changed since the last bagging.
+        Otherwise, it is produced on the fly, streamed in chunks and cached once the stream is completed.
+
         Curl equivalent:
         `curl -X GET SERVER_ADDR/workspace/{workspace_id} -H "accept: application/vnd.ocrd+zip" -o foo.zip`
         """
@@ -104,58 +144,73 @@ class RouterWorkspace:
         db_workspace = await get_db_workspace_with_handling(
             self.logger, workspace_id, check_ready=True, check_deleted=True, check_local_existence=True)
 
-        message = f"No bag was produced for workspace id: {workspace_id}"
         try:
-            bag_path = create_workspace_bag(db_workspace)
+            bag_path = self.bag_cache.get(workspace_id, mets_path=db_workspace.workspace_mets_path)
             if not bag_path:
-                self.logger.error(message)
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=message)
+                # Parsing the METS file is blocking, the chunks are produced in the thread pool by the response
+                bag_stream = self.bag_cache.tee(
+                    workspace_id, mets_path=db_workspace.workspace_mets_path,
+                    chunks=await run_in_threadpool(stream_workspace_bag, db_workspace))
         except Exception as error:
+            message = f"No bag was produced for workspace id: {workspace_id}"
             self.logger.error(f"{message}, error: {error}")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=message)
 
         await db_increase_processing_stats_with_handling(
             self.logger, find_user_id=py_user_action.user_id, pages_downloaded=db_workspace.pages_amount)
 
-        background_tasks.add_task(unlink, bag_path)
-        return FileResponse(path=bag_path, filename=f"{workspace_id}.ocrd.zip", media_type="application/ocrd+zip")
+        if bag_path:
+            return FileResponse(path=bag_path, filename=f"{workspace_id}.ocrd.zip", media_type="application/ocrd+zip")
+        return StreamingResponse(
+            content=bag_stream, media_type="application/ocrd+zip",
+            headers={"Content-Disposition": f'attachment; filename="{workspace_id}.ocrd.zip"'})
 
     async def upload_workspace_from_url(
         self, mets_url: str, preserve_file_grps: str, mets_basename: str = DEFAULT_METS_BASENAME,
-        details: str = f"Workspace imported from a mets file url", auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        details: str = f"Workspace imported from a mets file url",
+        auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> WorkspaceRsrc:
+        """
+        The import runs in the background, the workspace is in the `IMPORTING` state till it finishes.
+        The download progress is reported with `import_files_fetched` and `import_files_total`.
+        """
         py_user_action = await self.user_authenticator.user_login(auth)
         file_grps_to_preserve = parse_file_groups_with_handling(self.logger, file_groups=preserve_file_grps)
         workspace_id, workspace_dir = create_resource_dir(SERVER_WORKSPACES_ROUTER)
 
-        bag_dest = f"{workspace_dir}.zip"
+        db_workspace = await db_create_workspace(
+            user_id=py_user_action.user_id, workspace_id=workspace_id, workspace_dir=workspace_dir, pages_amount=0,
+            file_groups=[], bag_info={"Ocrd-Mets": mets_basename}, state=StateWorkspace.IMPORTING, details=details)
+        await self._push_import_request_to_rabbitmq(
+            workspace_id=workspace_id, mets_url=mets_url, mets_basename=mets_basename,
+            preserve_file_grps=file_grps_to_preserve)
+        return WorkspaceRsrc.from_db_workspace(db_workspace)
+
+    async def _push_import_request_to_rabbitmq(
+        self, workspace_id: str, mets_url: str, mets_basename: str, preserve_file_grps: List[str]
+    ) -> None:
         try:
-            ws_temp_dir = create_workspace_bag_from_remote_url(
-                mets_url=mets_url, workspace_id=workspace_id, bag_dest=bag_dest, mets_basename=mets_basename,
-                preserve_file_grps=file_grps_to_preserve)
+            import_message = {
+                "workspace_id": workspace_id,
+                "mets_url": mets_url,
+                "mets_basename": mets_basename,
+                "preserve_file_grps": preserve_file_grps
+            }
+            self.logger.debug(f"Encoding the workspace import RabbitMQ message: {import_message}")
+            encoded_import_message = dumps(import_message).encode(encoding="utf-8")
+            self.logger.debug(
+                f"Pushing to the RabbitMQ queue for workspace imports: {RABBITMQ_QUEUE_WORKSPACE_IMPORTS}")
+            await self.rmq_publisher.publish_to_queue(
+                queue_name=RABBITMQ_QUEUE_WORKSPACE_IMPORTS, message=encoded_import_message)
         except Exception as error:
-            message = "Failed to create workspace bag from remote url"
+            await db_update_workspace(find_workspace_id=workspace_id, state=StateWorkspace.IMPORT_FAILED)
+            message = "Failed to push the workspace import request to RabbitMQ"
             self.logger.error(f"{message}, error: {error}")
-            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=message)
-
-        rmtree(ws_temp_dir, ignore_errors=True)  # Remove the temp dir
-        rmtree(workspace_dir, ignore_errors=True)  # Remove old workspace dir (if any)
-        validate_bag_with_handling(self.logger, bag_dst=bag_dest)
-        bag_info = extract_bag_info_with_handling(self.logger, bag_dst=bag_dest, ws_dir=workspace_dir)
-        Path(bag_dest).unlink()  # Remove the created zip bag
-        pages_amount = extract_pages_with_handling(self.logger, bag_info, workspace_dir)
-        file_groups = extract_file_groups_with_handling(self.logger, bag_info, workspace_dir)
-
-        user_id = py_user_action.user_id
-        db_workspace = await db_create_workspace(
-            user_id=user_id, workspace_id=workspace_id, workspace_dir=workspace_dir, pages_amount=pages_amount,
-            file_groups=file_groups, bag_info=bag_info, state=StateWorkspace.READY, details=details)
-        await db_increase_processing_stats_with_handling(self.logger, find_user_id=user_id, pages_uploaded=pages_amount)
-        return WorkspaceRsrc.from_db_workspace(db_workspace)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
 
     async def upload_workspace(
         self, workspace: UploadFile, details: str = f"Workspace uploaded as an OCRD zip format",
-        auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> WorkspaceRsrc:
         """
         Curl equivalent:
@@ -171,12 +226,10 @@ class RouterWorkspace:
             self.logger.error(f"{message}, error: {error}")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
 
-        rmtree(ws_dir, ignore_errors=True)  # Remove old workspace dir (if any)
-        validate_bag_with_handling(self.logger, bag_dst=bag_dest)
-        bag_info = extract_bag_info_with_handling(self.logger, bag_dst=bag_dest, ws_dir=ws_dir)
-        Path(bag_dest).unlink()  # Remove the created zip bag
-        pages_amount = extract_pages_with_handling(self.logger, bag_info, ws_dir)
-        file_groups = extract_file_groups_with_handling(self.logger, bag_info, ws_dir)
+        await self.process_pool.run(rmtree, ws_dir, ignore_errors=True)  # Remove old workspace dir (if any)
+        bag_info, pages_amount, file_groups = await ingest_workspace_bag_with_handling(
+            self.logger, self.process_pool, bag_dst=bag_dest, ws_dir=ws_dir)
+        Path(bag_dest).unlink()  # Remove the received zip bag
 
         user_id = py_user_action.user_id
         db_workspace = await db_create_workspace(
@@ -187,7 +240,7 @@ class RouterWorkspace:
 
     async def put_workspace(
         self, workspace: UploadFile, workspace_id: str, details: str = f"Workspace uploaded as an OCRD zip format",
-        auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> WorkspaceRsrc:
         """
         Curl equivalent:
@@ -206,10 +259,11 @@ class RouterWorkspace:
             pass
 
         try:
-            delete_resource_dir(SERVER_WORKSPACES_ROUTER, workspace_id)
+            await self.process_pool.run(delete_resource_dir, SERVER_WORKSPACES_ROUTER, workspace_id)
         except FileNotFoundError:
             # Nothing to be deleted
             pass
+        self.bag_cache.invalidate(workspace_id)
         ws_id, ws_dir = create_resource_dir(SERVER_WORKSPACES_ROUTER, resource_id=workspace_id)
         bag_dest = f"{ws_dir}.zip"
         try:
@@ -219,12 +273,10 @@ class RouterWorkspace:
             self.logger.error(f"{message}, error: {error}")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
 
-        rmtree(ws_dir, ignore_errors=True)  # Remove old workspace dir (if any)
-        validate_bag_with_handling(self.logger, bag_dst=bag_dest)
-        bag_info = extract_bag_info_with_handling(self.logger, bag_dst=bag_dest, ws_dir=ws_dir)
-        Path(bag_dest).unlink()
-        pages_amount = extract_pages_with_handling(self.logger, bag_info, ws_dir)
-        file_groups = extract_file_groups_with_handling(self.logger, bag_info, ws_dir)
+        await self.process_pool.run(rmtree, ws_dir, ignore_errors=True)  # Remove old workspace dir (if any)
+        bag_info, pages_amount, file_groups = await ingest_workspace_bag_with_handling(
+            self.logger, self.process_pool, bag_dst=bag_dest, ws_dir=ws_dir)
+        Path(bag_dest).unlink()  # Remove the received zip bag
 
         user_id = py_user_action.user_id
         db_workspace = await db_create_workspace(
@@ -234,7 +286,7 @@ class RouterWorkspace:
         return WorkspaceRsrc.from_db_workspace(db_workspace)
 
     async def delete_workspace(
-        self, workspace_id: str, auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        self, workspace_id: str, auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> WorkspaceRsrc:
         """
         Curl equivalent:
@@ -248,7 +300,8 @@ class RouterWorkspace:
         workspace_rsrc = WorkspaceRsrc.from_db_workspace(db_workspace)
         try:
             deleted_workspace_url = get_resource_url(SERVER_WORKSPACES_ROUTER, resource_id=workspace_id)
-            delete_resource_dir(SERVER_WORKSPACES_ROUTER, workspace_id)
+            await self.process_pool.run(delete_resource_dir, SERVER_WORKSPACES_ROUTER, workspace_id)
+            self.bag_cache.invalidate(workspace_id)
         except FileNotFoundError as error:
             message = f"Non-existing local entry workspace_id: {workspace_id}"
             self.logger.error(f"{message}, error: {error}")
@@ -257,15 +310,17 @@ class RouterWorkspace:
 
     async def remove_file_group_from_workspace(
         self, workspace_id: str, remove_file_grps: str, recursive: bool = True, force: bool = True,
-        auth: HTTPBasicCredentials = Depends(HTTPBasic())
+        auth: AuthCredentials = Depends(get_auth_credentials)
     ) -> WorkspaceRsrc:
         await self.user_authenticator.user_login(auth)
         db_workspace = await get_db_workspace_with_handling(
             self.logger, workspace_id, check_ready=True, check_deleted=True, check_local_existence=True
         )
         file_grps_to_remove = parse_file_groups_with_handling(self.logger, file_groups=remove_file_grps)
-        remaining_file_groups = remove_file_groups_with_handling(
-            self.logger, db_workspace=db_workspace, file_groups=file_grps_to_remove, recursive=recursive, force=force
+        remaining_file_groups = await remove_file_groups_with_handling(
+            self.logger, self.process_pool, db_workspace=db_workspace, file_groups=file_grps_to_remove,
+            recursive=recursive, force=force
         )
+        self.bag_cache.invalidate(workspace_id)
         db_workspace = await db_update_workspace(find_workspace_id=workspace_id, file_groups=remaining_file_groups)
         return WorkspaceRsrc.from_db_workspace(db_workspace)
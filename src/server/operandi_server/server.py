@@ -1,6 +1,7 @@
 from datetime import datetime
 from logging import getLogger
 from os import environ
+from secrets import token_hex
 from uvicorn import run
 
 from fastapi import FastAPI, status
@@ -8,11 +9,17 @@ from fastapi import FastAPI, status
 from operandi_utils import get_log_file_path_prefix, reconfigure_all_loggers, verify_database_uri
 from operandi_utils.constants import AccountType, LOG_LEVEL_SERVER, OPERANDI_VERSION
 from operandi_utils.database import db_initiate_database
+from operandi_utils.rabbitmq import get_async_connection_publisher
 from operandi_utils import safe_init_logging
 
-from operandi_server.constants import SERVER_WORKFLOW_JOBS_ROUTER, SERVER_WORKFLOWS_ROUTER, SERVER_WORKSPACES_ROUTER
+from operandi_server.constants import (
+    SERVER_WORKERS, SERVER_WORKFLOW_JOBS_ROUTER, SERVER_WORKFLOWS_ROUTER, SERVER_WORKSPACES_ROUTER)
 from operandi_server.files_manager import create_resource_base_dir
+from operandi_server.job_state_hub import JobStateHub
+from operandi_server.leader_lock import ServerLeaderLock
+from operandi_server.process_pool import ServerProcessPool
 from operandi_server.routers import RouterAdminPanel, RouterDiscovery, RouterUser, RouterWorkflow, RouterWorkspace
+from operandi_server.session_tokens import SessionTokenManager
 from operandi_server.routers.user_utils import create_user_if_not_available
 
 
@@ -46,6 +53,11 @@ class OperandiServer(FastAPI):
             raise ValueError(e)
 
         self.rmq_publisher = None
+        self.process_pool = None
+        self.job_state_hub = None
+        self.session_tokens = None
+        self.leader_lock = None
+        self.workflow_router = None
 
         live_server_80 = {"url": self.live_server_url, "description": "The URL of the live OPERANDI server."}
         local_server = {"url": self.local_server_url, "description": "The URL of the local OPERANDI server."}
@@ -67,9 +79,23 @@ class OperandiServer(FastAPI):
             summary="Get information about the server"
         )
 
-    def run_server(self):
+    def run_server(self, workers: int = SERVER_WORKERS):
         host, port = self.local_server_url.split("//")[1].split(":")
-        run(self, host=host, port=int(port))
+        if workers == 1:
+            run(self, host=host, port=int(port))
+            return
+        # Each worker process creates its own server instance from the environment with `create_server`
+        environ["OPERANDI_DB_URL"] = self.db_url
+        environ["OPERANDI_RABBITMQ_URL"] = self.rabbitmq_url
+        environ["OPERANDI_SERVER_URL_LIVE"] = self.live_server_url
+        environ["OPERANDI_SERVER_URL_LOCAL"] = self.local_server_url
+        if not environ.get("OPERANDI_SERVER_TOKEN_SECRET", None):
+            self.logger.warning(
+                "Environment variable not set: OPERANDI_SERVER_TOKEN_SECRET, the worker processes share a random "
+                "secret and the issued tokens are valid only till the server restarts")
+            environ["OPERANDI_SERVER_TOKEN_SECRET"] = token_hex(32)
+        self.logger.info(f"Starting the Operandi Server with {workers} worker processes")
+        run("operandi_server.server:create_server", factory=True, host=host, port=int(port), workers=workers)
 
     async def startup_event(self):
         self.logger.info(f"Operandi local server url: {self.local_server_url}")
@@ -88,15 +114,37 @@ class OperandiServer(FastAPI):
         # Initiate database client
         await db_initiate_database(self.db_url)
 
-        # Insert the default server and harvester credentials to the DB
-        await self.insert_default_accounts()
+        # Shared by all routers, publishes without blocking the event loop
+        self.logger.info(f"Trying to connect RMQAsyncPublisher")
+        self.rmq_publisher = await get_async_connection_publisher(self.rabbitmq_url)
+        self.logger.info(f"RMQAsyncPublisher connected")
+
+        # Blocking workspace operations are executed outside the event loop
+        self.process_pool = ServerProcessPool()
+
+        # Job state changes are pushed to the waiting clients instead of being polled by them
+        self.job_state_hub = JobStateHub()
+        self.job_state_hub.start()
+
+        # Shared by all routers, so the verified accounts are cached once per process
+        self.session_tokens = SessionTokenManager()
 
         # Include the endpoints of the OCR-D WebAPI
         await self.include_webapi_routers()
 
+        # The one-time startup work is done only by the leader among the server processes
+        self.leader_lock = ServerLeaderLock(on_elected=self.leader_startup_event)
+        await self.leader_lock.start()
+
     async def shutdown_event(self):
         # TODO: Gracefully shutdown and clean things here if needed
         self.logger.info(f"The Operandi Server is shutting down.")
+        if self.leader_lock:
+            await self.leader_lock.stop()
+        if self.job_state_hub:
+            await self.job_state_hub.stop()
+        if self.rmq_publisher:
+            await self.rmq_publisher.disconnect()
 
     async def home(self):
         message = f"The home page of the {self.title}"
@@ -108,13 +156,18 @@ class OperandiServer(FastAPI):
         return json_message
 
     async def include_webapi_routers(self):
-        self.include_router(RouterAdminPanel().router)
-        self.include_router(RouterDiscovery().router)
-        self.include_router(RouterUser().router)
-        workflow_router = RouterWorkflow()
-        await workflow_router.insert_production_workflows()
-        self.include_router(workflow_router.router)
-        self.include_router(RouterWorkspace().router)
+        self.include_router(RouterAdminPanel(self.process_pool, self.session_tokens).router)
+        self.include_router(RouterDiscovery(self.session_tokens).router)
+        self.include_router(RouterUser(self.session_tokens).router)
+        self.workflow_router = RouterWorkflow(
+            self.process_pool, self.job_state_hub, self.rmq_publisher, self.session_tokens)
+        self.include_router(self.workflow_router.router)
+        self.include_router(RouterWorkspace(self.process_pool, self.rmq_publisher, self.session_tokens).router)
+
+    async def leader_startup_event(self):
+        # Insert the default server and harvester credentials to the DB
+        await self.insert_default_accounts()
+        await self.workflow_router.insert_production_workflows()
 
     async def insert_default_accounts(self):
         default_admin_user = environ.get("OPERANDI_SERVER_DEFAULT_USERNAME", None)
@@ -147,3 +200,13 @@ class OperandiServer(FastAPI):
                 details="Default harvester account"
             )
             self.logger.info(f"Inserted default harvester account credentials")
+
+
+def create_server() -> OperandiServer:
+    """
+    Factory of the server instances of the Uvicorn worker processes
+    """
+    return OperandiServer(
+        db_url=environ.get("OPERANDI_DB_URL"), rabbitmq_url=environ.get("OPERANDI_RABBITMQ_URL"),
+        live_server_url=environ.get("OPERANDI_SERVER_URL_LIVE"),
+        local_server_url=environ.get("OPERANDI_SERVER_URL_LOCAL"))
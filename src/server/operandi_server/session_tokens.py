@@ -0,0 +1,119 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from hashlib import sha256
+from hmac import compare_digest, new as hmac_new
+from json import dumps, loads
+from logging import getLogger
+from os import environ
+from secrets import token_bytes
+from time import monotonic, time
+from typing import Tuple
+
+from operandi_utils.database import db_get_user_account, db_get_user_account_version, DBUserAccount
+from operandi_server.constants import (
+    SESSION_CACHE_MAX_SIZE, SESSION_CACHE_TTL, SESSION_CACHE_VERSION_CHECK_INTERVAL, SESSION_TOKEN_TTL)
+from operandi_server.exceptions import AuthenticationError
+from operandi_server.models import PYUserAction
+
+
+def _b64encode(data: bytes) -> str:
+    return urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class SessionTokenManager:
+    """
+    Issues and verifies the short-lived bearer tokens of the Operandi Server.
+
+    A token carries the user id and the expiration time signed with HMAC-SHA256, hence, verifying it needs
+    neither the password hashing nor, in most cases, the database. The verified accounts are kept in a bounded
+    LRU cache for `cache_ttl` seconds together with the version of their database entry. At most once per
+    `version_check_interval` seconds and user, a cache hit reads that version with a single projected query
+    and the account is loaded again if it has changed. Hence, an account revoked by another process of the
+    server is rejected after at most `version_check_interval` seconds, by the process revoking it at once
+    through `invalidate`. Changes which bypass the versioned updates are picked up after `cache_ttl` seconds.
+
+    All processes of the server must share the same `secret` to accept the tokens issued by each other.
+    """
+    def __init__(
+        self, secret: str = environ.get("OPERANDI_SERVER_TOKEN_SECRET", None), token_ttl: int = SESSION_TOKEN_TTL,
+        cache_ttl: float = SESSION_CACHE_TTL, cache_max_size: int = SESSION_CACHE_MAX_SIZE,
+        version_check_interval: float = SESSION_CACHE_VERSION_CHECK_INTERVAL
+    ):
+        self.logger = getLogger("operandi_server.session_tokens")
+        if not secret:
+            self.logger.warning(
+                "Environment variable not set: OPERANDI_SERVER_TOKEN_SECRET, the issued tokens are valid only "
+                "till the server process restarts")
+            self._secret = token_bytes(32)
+        else:
+            self._secret = secret.encode("utf-8")
+        self.token_ttl = token_ttl
+        self.cache_ttl = cache_ttl
+        self.cache_max_size = cache_max_size
+        self.version_check_interval = version_check_interval
+        # Keys: user ids, values: the verified user account, the version of its entry, the monotonic times
+        # it was cached at and its version was last checked at
+        self._verified_accounts: OrderedDict[str, Tuple[PYUserAction, int, float, float]] = OrderedDict()
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac_new(self._secret, payload.encode("ascii"), sha256).digest())
+
+    def issue_token(self, db_user_account: DBUserAccount) -> Tuple[str, int]:
+        """
+        Returns a new token of the user account and the amount of seconds it is valid for
+        """
+        claims = {"sub": db_user_account.user_id, "exp": int(time()) + self.token_ttl}
+        payload = _b64encode(dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}", self.token_ttl
+
+    async def verify_token(self, token: str) -> PYUserAction:
+        """
+        Raises:
+            AuthenticationError: if the token is malformed, forged or expired,
+                or if the account is not approved anymore
+        """
+        try:
+            payload, signature = token.split(".")
+            if not compare_digest(signature, self._sign(payload)):
+                raise ValueError("signature mismatch")
+            claims = loads(_b64decode(payload))
+            user_id, expires_at = claims["sub"], claims["exp"]
+        except Exception as error:
+            raise AuthenticationError(f"Invalid session token: {error}")
+        if time() >= expires_at:
+            raise AuthenticationError("The session token has expired")
+
+        try:
+            cached_account = self._verified_accounts.get(user_id, None)
+            now = monotonic()
+            if cached_account and now - cached_account[2] < self.cache_ttl:
+                py_user_action, version, cached_time, checked_time = cached_account
+                if now - checked_time < self.version_check_interval:
+                    self._verified_accounts.move_to_end(user_id)
+                    return py_user_action
+                if await db_get_user_account_version(user_id=user_id) == version:
+                    self._verified_accounts[user_id] = (py_user_action, version, cached_time, now)
+                    self._verified_accounts.move_to_end(user_id)
+                    return py_user_action
+            db_user_account = await db_get_user_account(user_id=user_id)
+        except RuntimeError:
+            self.invalidate(user_id)
+            raise AuthenticationError(f"Not found user account for user id: {user_id}")
+        if db_user_account.deleted or not db_user_account.approved_user:
+            self.invalidate(user_id)
+            raise AuthenticationError(f"The account has not been approved by the admin yet.")
+        py_user_action = PYUserAction.from_db_user_account(
+            action="Successfully logged!", db_user_account=db_user_account)
+        cached_time = monotonic()
+        self._verified_accounts[user_id] = (py_user_action, db_user_account.version, cached_time, cached_time)
+        self._verified_accounts.move_to_end(user_id)
+        while len(self._verified_accounts) > self.cache_max_size:
+            self._verified_accounts.popitem(last=False)
+        return py_user_action
+
+    def invalidate(self, user_id: str) -> None:
+        self._verified_accounts.pop(user_id, None)
@@ -0,0 +1,17 @@
+__all__ = [
+    "BAG_CACHE_DIR_NAME",
+    "BAG_CACHE_MAX_SIZE",
+    "BAG_STREAM_CHUNK_SIZE",
+    "create_workspace_bag_from_remote_url",
+    "download_workspace_files",
+    "ingest_workspace_bag",
+    "stream_workspace_bag",
+    "WorkspaceBagCache",
+    "WorkspaceBagNotValidError"
+]
+
+from .bag_cache import WorkspaceBagCache
+from .bag_streamer import stream_workspace_bag
+from .constants import BAG_CACHE_DIR_NAME, BAG_CACHE_MAX_SIZE, BAG_STREAM_CHUNK_SIZE
+from .workspace_import import (
+    create_workspace_bag_from_remote_url, download_workspace_files, ingest_workspace_bag, WorkspaceBagNotValidError)
@@ -0,0 +1,124 @@
+from glob import glob
+from logging import getLogger
+from os import environ, replace, scandir, stat, unlink, utime
+from os.path import basename, exists, join
+from pathlib import Path
+from tempfile import mkstemp
+from time import time
+from typing import Iterable, Iterator, Optional
+
+from .constants import BAG_CACHE_DIR_NAME, BAG_CACHE_MAX_SIZE, BAG_CACHE_PARTIAL_MAX_AGE
+
+BAG_SUFFIX = ".ocrd.zip"
+PARTIAL_SUFFIX = ".part"
+
+
+class WorkspaceBagCache:
+    """
+    Disk cache of the produced OCRD-ZIP bags, shared between the Operandi Server and the Operandi Broker.
+
+    A cached bag is identified by the workspace id and the modification time and size of the workspace
+    METS file, hence any change of the METS file makes the previously cached bag unreachable. Stale bags
+    are removed either explicitly with `invalidate` or by the LRU eviction once the total cache size
+    exceeds `max_size`. The last access time of a bag is tracked with the modification time of its file.
+    Bags are first written to a temporary file and then atomically renamed, so readers never see
+    partially written bags.
+    """
+    def __init__(self, cache_dir: str = None, max_size: int = BAG_CACHE_MAX_SIZE):
+        self.log = getLogger("operandi_utils.bagging.bag_cache")
+        if not cache_dir:
+            server_base_dir = environ.get("OPERANDI_SERVER_BASE_DIR", None)
+            if not server_base_dir:
+                raise ValueError("Environment variable not set: OPERANDI_SERVER_BASE_DIR")
+            cache_dir = join(server_base_dir, BAG_CACHE_DIR_NAME)
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        Path(self.cache_dir).mkdir(mode=0o777, parents=True, exist_ok=True)
+
+    @staticmethod
+    def _cache_key(mets_path: str) -> str:
+        mets_stat = stat(mets_path)
+        return f"{mets_stat.st_mtime_ns}-{mets_stat.st_size}"
+
+    def _bag_path(self, workspace_id: str, mets_path: str) -> str:
+        return join(self.cache_dir, f"{workspace_id}.{self._cache_key(mets_path)}{BAG_SUFFIX}")
+
+    def get(self, workspace_id: str, mets_path: str) -> Optional[str]:
+        """
+        Returns the path to the cached bag of the current METS file state, or None on a cache miss
+        """
+        bag_path = self._bag_path(workspace_id, mets_path)
+        try:
+            # Mark the bag as recently used
+            utime(bag_path)
+        except FileNotFoundError:
+            return None
+        self.log.debug(f"Bag cache hit for workspace id: {workspace_id}")
+        return bag_path
+
+    def put(self, workspace_id: str, mets_path: str, chunks: Iterable[bytes]) -> str:
+        """
+        Consumes the bag chunks, stores them in the cache and returns the path to the cached bag
+        """
+        for _ in self.tee(workspace_id, mets_path, chunks):
+            pass
+        return self._bag_path(workspace_id, mets_path)
+
+    def tee(self, workspace_id: str, mets_path: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Passes the bag chunks through while writing them to the cache. The bag is stored only if all
+        chunks were consumed, i.e., an interrupted download does not leave a truncated bag behind.
+        """
+        bag_path = self._bag_path(workspace_id, mets_path)
+        fd, partial_path = mkstemp(dir=self.cache_dir, prefix=f"{basename(bag_path)}.", suffix=PARTIAL_SUFFIX)
+        completed = False
+        try:
+            with open(fd, mode="wb") as partial_fp:
+                for chunk in chunks:
+                    partial_fp.write(chunk)
+                    yield chunk
+            replace(partial_path, bag_path)
+            completed = True
+            self.log.info(f"Cached bag of workspace id: {workspace_id}")
+        finally:
+            if not completed and exists(partial_path):
+                unlink(partial_path)
+        self.evict()
+
+    def invalidate(self, workspace_id: str) -> None:
+        for bag_path in glob(join(self.cache_dir, f"{workspace_id}.*{BAG_SUFFIX}")):
+            try:
+                unlink(bag_path)
+                self.log.info(f"Invalidated cached bag: {bag_path}")
+            except FileNotFoundError:
+                pass
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used bags until the total cache size fits into `max_size`
+        """
+        cached_bags = []
+        total_size = 0
+        now = time()
+        for entry in scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            try:
+                entry_stat = entry.stat()
+                if entry.name.endswith(PARTIAL_SUFFIX):
+                    if now - entry_stat.st_mtime > BAG_CACHE_PARTIAL_MAX_AGE:
+                        unlink(entry.path)
+                    continue
+            except FileNotFoundError:
+                continue
+            cached_bags.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+            total_size += entry_stat.st_size
+        for _, size, bag_path in sorted(cached_bags):
+            if total_size <= self.max_size:
+                break
+            try:
+                unlink(bag_path)
+                self.log.info(f"Evicted cached bag: {bag_path}")
+            except FileNotFoundError:
+                pass
+            total_size -= size
@@ -0,0 +1,160 @@
+from datetime import datetime
+from hashlib import sha512
+from os.path import getsize, join
+from re import sub as re_sub
+from requests import get as requests_get
+from typing import Iterator, List, Tuple
+from zipfile import ZIP_DEFLATED, ZIP64_LIMIT, ZipFile
+
+from ocrd import Resolver
+from ocrd.workspace import Workspace
+from ocrd_models.ocrd_page import parse as parse_page, to_xml as page_to_xml
+from ocrd_utils import DEFAULT_METS_BASENAME, MIME_TO_EXT, MIMETYPE_PAGE, VERSION as OCRD_VERSION
+from ocrd_validators.constants import BAGIT_TXT, OCRD_BAGIT_PROFILE_URL
+
+from operandi_utils.constants import OPERANDI_VERSION
+from .constants import BAG_STREAM_CHUNK_SIZE
+
+
+class _ZipStreamBuffer:
+    """
+    Write-only, non-seekable file object collecting the bytes produced by `ZipFile`.
+    Since `tell` and `seek` are missing, `ZipFile` writes data descriptors after each entry instead of
+    seeking back to patch the local headers, hence the produced bytes can be sent to the client right away.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _iter_bag_payload_source(workspace_dir: str, source: str, chunk_size: int) -> Iterator[bytes]:
+    if source.startswith("http://") or source.startswith("https://"):
+        with requests_get(source, stream=True) as response:
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size=chunk_size)
+        return
+    with open(join(workspace_dir, source), mode="rb") as source_fp:
+        while True:
+            chunk = source_fp.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _format_bag_tag_file(tags: dict) -> bytes:
+    lines = []
+    for key in sorted(tags.keys()):
+        value = re_sub(r"\n|\r|(\r\n)", "", str(tags[key]))
+        lines.append(f"{key}: {value}\n")
+    return "".join(lines).encode("utf-8")
+
+
+def stream_workspace_bag(db_workspace, chunk_size: int = BAG_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream the workspace as an OCRD-ZIP without writing the bag to the disk.
+
+    The produced bag has the same layout as the one produced by `WorkspaceBagger.bag`, but the payload
+    files are checksummed while being compressed and the tag files (`bag-info.txt`, manifests) are
+    appended as the last zip entries. The METS file is parsed eagerly, so errors in it are raised before
+    the first chunk is produced. Memory usage is bounded by the `chunk_size` and the METS file size.
+
+    Args:
+         db_workspace (DBWorkspace): database model of the workspace
+         chunk_size (int): amount of bytes read from the payload files at once
+    Returns:
+        iterator over the chunks of the zip archive
+    """
+    mets_basename = db_workspace.mets_basename
+    if not mets_basename:
+        mets_basename = DEFAULT_METS_BASENAME
+    workspace = Workspace(Resolver(), directory=db_workspace.workspace_dir, mets_basename=mets_basename)
+
+    # Same renaming as in `WorkspaceBagger._bag_mets_files`, but applied only to the METS kept in memory
+    payload_files: List[Tuple[str, str, bool]] = []
+    changed_local_filenames = {}
+    for ocrd_file in workspace.mets.find_files():
+        attr = "local_filename" if ocrd_file.local_filename else "url"
+        basename = ocrd_file.basename
+        if not basename:
+            basename = f"{ocrd_file.ID}{MIME_TO_EXT.get(ocrd_file.mimetype, '.xml')}"
+        rel_path = join(ocrd_file.fileGrp, basename)
+        source = str(getattr(ocrd_file, attr))
+        payload_files.append((rel_path, source, ocrd_file.mimetype == MIMETYPE_PAGE))
+        changed_local_filenames[source] = rel_path
+        ocrd_file.local_filename = rel_path
+    mets_bytes = workspace.mets.to_xml()
+
+    bag_info = {
+        "BagIt-Profile-Identifier": OCRD_BAGIT_PROFILE_URL,
+        "Bag-Software-Agent": f"operandi_server {OPERANDI_VERSION} (ocrd/core {OCRD_VERSION})",
+        "Bagging-Date": str(datetime.now()),
+        "Ocrd-Identifier": db_workspace.ocrd_identifier
+    }
+    if db_workspace.ocrd_base_version_checksum:
+        bag_info["Ocrd-Base-Version-Checksum"] = db_workspace.ocrd_base_version_checksum
+    if mets_basename != DEFAULT_METS_BASENAME:
+        bag_info["Ocrd-Mets"] = mets_basename
+
+    def _rewrite_page_file(source: str) -> bytes:
+        pcgts = parse_page(join(workspace.directory, source), silence=True)
+        image_filename = pcgts.get_Page().imageFilename
+        if image_filename in changed_local_filenames:
+            pcgts.get_Page().imageFilename = changed_local_filenames[image_filename]
+        return page_to_xml(pcgts).encode("utf-8")
+
+    def _iter_zip_chunks() -> Iterator[bytes]:
+        sink = _ZipStreamBuffer()
+        manifest_lines = []
+        tag_manifest_lines = []
+        total_bytes = 0
+
+        def _write_entry(zip_file: ZipFile, arc_name: str, chunks: Iterator[bytes], large: bool) -> Iterator[bytes]:
+            nonlocal total_bytes
+            checksum = sha512()
+            with zip_file.open(arc_name, mode="w", force_zip64=large) as entry_fp:
+                for chunk in chunks:
+                    checksum.update(chunk)
+                    entry_fp.write(chunk)
+                    if arc_name.startswith("data/"):
+                        total_bytes += len(chunk)
+                    data = sink.pop()
+                    if data:
+                        yield data
+            if arc_name.startswith("data/"):
+                manifest_lines.append(f"{checksum.hexdigest()}  {arc_name}\n")
+            else:
+                tag_manifest_lines.append(f"{checksum.hexdigest()}  {arc_name}\n")
+
+        with ZipFile(sink, mode="w", compression=ZIP_DEFLATED) as zip_file:
+            yield from _write_entry(zip_file, "bagit.txt", iter([BAGIT_TXT.encode("utf-8")]), large=False)
+            for rel_path, source, is_page in payload_files:
+                if source.startswith("http://") or source.startswith("https://"):
+                    chunks, large = _iter_bag_payload_source(workspace.directory, source, chunk_size), True
+                elif is_page and any(old != new for old, new in changed_local_filenames.items()):
+                    chunks, large = iter([_rewrite_page_file(source)]), False
+                else:
+                    large = getsize(join(workspace.directory, source)) >= ZIP64_LIMIT
+                    chunks = _iter_bag_payload_source(workspace.directory, source, chunk_size)
+                yield from _write_entry(zip_file, f"data/{rel_path}", chunks, large=large)
+            yield from _write_entry(zip_file, f"data/{mets_basename}", iter([mets_bytes]), large=False)
+
+            bag_info["Payload-Oxum"] = f"{total_bytes}.{len(manifest_lines)}"
+            yield from _write_entry(zip_file, "bag-info.txt", iter([_format_bag_tag_file(bag_info)]), large=False)
+            manifest_bytes = "".join(manifest_lines).encode("utf-8")
+            yield from _write_entry(zip_file, "manifest-sha512.txt", iter([manifest_bytes]), large=False)
+            zip_file.writestr("tagmanifest-sha512.txt", "".join(tag_manifest_lines).encode("utf-8"))
+        # Closing the zip file writes the central directory
+        yield sink.pop()
+
+    return _iter_zip_chunks()
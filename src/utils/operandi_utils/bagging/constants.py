@@ -0,0 +1,24 @@
+from typing import List, Tuple
+
+# Amount of bytes read from the workspace files at once when streaming a bag
+BAG_STREAM_CHUNK_SIZE: int = 1024 * 1024
+# Name of the directory inside `OPERANDI_SERVER_BASE_DIR` where the produced bags are cached
+BAG_CACHE_DIR_NAME: str = "bag_cache"
+# Upper bound of the total size of the cached bags, least recently used bags are evicted first
+BAG_CACHE_MAX_SIZE: int = 20 * 1024 ** 3
+# Partially written bags older than that (in seconds) are considered abandoned and removed on eviction
+BAG_CACHE_PARTIAL_MAX_AGE: int = 24 * 60 * 60
+# Seconds to wait before the n-th retry of a failed file download: factor * 2 ** (n - 1)
+DOWNLOAD_BACKOFF_FACTOR: float = 0.5
+# Amount of bytes read at once from a downloaded workspace file
+DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+# Amount of the concurrent (keep-alive) connections to a single host when downloading workspace files
+DOWNLOAD_MAX_CONNECTIONS_PER_HOST: int = 8
+# Amount of the workspace files downloaded concurrently in total
+DOWNLOAD_MAX_WORKERS: int = 32
+# Amount of retries of a single file download on connection errors, server errors or checksum mismatches
+DOWNLOAD_RETRIES: int = 4
+# HTTP status codes of the transient server errors on which a file download is retried
+DOWNLOAD_RETRY_STATUS_CODES: List[int] = [408, 429, 500, 502, 503, 504]
+# Connect and read timeouts in seconds of a single file download request
+DOWNLOAD_TIMEOUT: Tuple[float, float] = (10, 60)
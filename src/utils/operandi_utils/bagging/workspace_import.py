@@ -0,0 +1,315 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from hashlib import algorithms_available, new as hashlib_new
+from os import rename, replace, unlink
+from os.path import dirname, exists, isfile, join, normpath
+from pathlib import Path
+from re import match as re_match
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import BoundedSemaphore, Lock
+from time import sleep
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from zipfile import ZipFile
+
+import bagit
+from bagit_profile import Profile
+from lxml import etree
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from ocrd import Resolver
+from ocrd.workspace import Workspace
+from ocrd.workspace_bagger import WorkspaceBagger
+from ocrd_models import OcrdMets
+from ocrd_models.constants import NAMESPACES
+from ocrd_utils import MIME_TO_EXT
+from ocrd_validators.constants import OCRD_BAGIT_PROFILE, OCRD_BAGIT_PROFILE_URL
+
+from .constants import (
+    BAG_STREAM_CHUNK_SIZE, DOWNLOAD_BACKOFF_FACTOR, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_MAX_CONNECTIONS_PER_HOST,
+    DOWNLOAD_MAX_WORKERS, DOWNLOAD_RETRIES, DOWNLOAD_RETRY_STATUS_CODES, DOWNLOAD_TIMEOUT)
+
+
+class WorkspaceBagNotValidError(Exception):
+    pass
+
+
+class _HostLimiter:
+    """
+    Bounds the amount of the concurrent requests per host
+    """
+    def __init__(self, max_per_host: int):
+        self._lock = Lock()
+        self._max_per_host = max_per_host
+        self._semaphores: Dict[str, BoundedSemaphore] = {}
+
+    def __call__(self, url: str) -> BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = BoundedSemaphore(self._max_per_host)
+            return self._semaphores[host]
+
+
+def _create_download_session(max_connections_per_host: int) -> Session:
+    session = Session()
+    # Retries are handled by the downloader itself, since checksum mismatches must be retried as well.
+    # The connection pools of the default amount of hosts are cached, each keeps up to the per host limit
+    # of connections alive, the concurrency itself is bounded by the host limiter.
+    adapter = HTTPAdapter(pool_maxsize=max_connections_per_host)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _download_file_with_retries(
+    session: Session, host_limiter: _HostLimiter, url: str, file_path: str, checksum: Optional[str],
+    checksum_type: Optional[str], retries: int, backoff_factor: float, timeout: Tuple[float, float]
+) -> None:
+    if checksum_type:
+        checksum_type = checksum_type.lower().replace("-", "")
+        if checksum_type not in algorithms_available:
+            checksum = None
+    Path(dirname(file_path)).mkdir(parents=True, exist_ok=True)
+    part_path = f"{file_path}.part"
+    attempt = 0
+    while True:
+        try:
+            file_hash = hashlib_new(checksum_type) if checksum else None
+            with host_limiter(url):
+                with session.get(url, stream=True, timeout=timeout) as response:
+                    response.raise_for_status()
+                    with open(part_path, mode="wb") as part_fp:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            if file_hash:
+                                file_hash.update(chunk)
+                            part_fp.write(chunk)
+            if file_hash and file_hash.hexdigest().lower() != checksum.lower():
+                raise ValueError(f"Checksum mismatch of {url}, expected {checksum_type}: {checksum}")
+            replace(part_path, file_path)
+            return
+        except (RequestException, ValueError) as error:
+            if exists(part_path):
+                unlink(part_path)
+            status_code = getattr(getattr(error, "response", None), "status_code", None)
+            retryable = status_code is None or status_code in DOWNLOAD_RETRY_STATUS_CODES
+            if not retryable or attempt >= retries:
+                raise
+            attempt += 1
+            sleep(backoff_factor * 2 ** (attempt - 1))
+
+
+def _mets_file_checksums(mets: OcrdMets) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    # The checksum attributes of mets:file are not exposed by OcrdFile, hence parsed from the METS document
+    mets_root = etree.fromstring(mets.to_xml())
+    return {
+        file_el.get("ID"): (file_el.get("CHECKSUM"), file_el.get("CHECKSUMTYPE"))
+        for file_el in mets_root.iterfind(".//mets:file", namespaces=NAMESPACES)
+    }
+
+
+def download_workspace_files(
+    workspace: Workspace, max_workers: int = DOWNLOAD_MAX_WORKERS,
+    max_connections_per_host: int = DOWNLOAD_MAX_CONNECTIONS_PER_HOST, retries: int = DOWNLOAD_RETRIES,
+    backoff_factor: float = DOWNLOAD_BACKOFF_FACTOR, timeout: Tuple[float, float] = DOWNLOAD_TIMEOUT,
+    progress_callback: Callable[[int, int], None] = None
+) -> None:
+    """
+    Download the remote files referenced in the METS file of the workspace concurrently.
+
+    The files are fetched over a shared pool of keep-alive connections, with at most
+    `max_connections_per_host` requests to the same host at once. Failed downloads are retried with
+    exponential backoff. If the METS file provides a checksum for a file, the downloaded content is
+    verified against it. The local file names are set the same way as `Workspace.download_file` does.
+    Files which are not reachable over HTTP(S) are handled by `Workspace.download_file`.
+
+    Args:
+         workspace (Workspace): workspace created from a remote METS file without downloading the files
+         max_workers (int): amount of the files downloaded concurrently in total
+         max_connections_per_host (int): amount of the concurrent requests to a single host
+         retries (int): amount of retries of a single file
+         backoff_factor (float): seconds to wait before the first retry, doubled on each further retry
+         timeout (Tuple[float, float]): connect and read timeouts of a single request
+         progress_callback (Callable[[int, int], None]): called with the amount of the available files
+            and the total amount of files, once before the downloads start and after each finished download
+    """
+    downloads = []
+    files_available = 0
+    mets_checksums = None
+    for ws_file in workspace.find_files():
+        url = ws_file.url
+        if ws_file.local_filename and Path(workspace.directory, ws_file.local_filename).exists():
+            files_available += 1
+            continue
+        if not url or not url.startswith(("http://", "https://")):
+            workspace.download_file(f=ws_file)
+            files_available += 1
+            continue
+        if not ws_file.local_filename:
+            basename = f"{ws_file.ID}{MIME_TO_EXT.get(ws_file.mimetype, '')}" if ws_file.ID else ws_file.basename
+            ws_file.local_filename = join(ws_file.fileGrp, basename)
+        file_path = join(workspace.directory, ws_file.local_filename)
+        if mets_checksums is None:
+            mets_checksums = _mets_file_checksums(workspace.mets)
+        checksum, checksum_type = mets_checksums.get(ws_file.ID, (None, None))
+        downloads.append((url, file_path, checksum, checksum_type))
+    files_total = len(downloads) + files_available
+    if progress_callback:
+        progress_callback(files_available, files_total)
+    if not downloads:
+        return
+
+    host_limiter = _HostLimiter(max_connections_per_host)
+    with _create_download_session(max_connections_per_host) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _download_file_with_retries, session, host_limiter, url, file_path, checksum, checksum_type,
+                    retries, backoff_factor, timeout)
+                for url, file_path, checksum, checksum_type in downloads
+            ]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+                    files_available += 1
+                    if progress_callback:
+                        progress_callback(files_available, files_total)
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+
+def create_workspace_bag_from_remote_url(
+    mets_url: str, workspace_id: str, bag_dest: str, preserve_file_grps: List[str], mets_basename: str = "mets.xml",
+    processes: int = 1, progress_callback: Callable[[int, int], None] = None
+) -> str:
+    """
+    Create a workspace bag from a remote METS file, only the files of `preserve_file_grps` are downloaded.
+    The `progress_callback` is called with the amount of the downloaded files and the total amount of files.
+
+    Returns:
+        path to the temporary workspace directory, to be removed by the caller.
+        If creating the bag fails, the temporary workspace directory is removed before the error is raised.
+    """
+    resolver = Resolver()
+    # Create an OCR-D Workspace from a remote mets URL
+    # without downloading the files referenced in the mets file
+    workspace = resolver.workspace_from_url(
+        mets_url=mets_url, clobber_mets=False, mets_basename=mets_basename, download=False)
+
+    try:
+        remove_groups = [x for x in workspace.mets.file_groups if x not in preserve_file_grps]
+        for group in remove_groups:
+            workspace.remove_file_group(group, recursive=True, force=True)
+        workspace.save_mets()
+        download_workspace_files(workspace, progress_callback=progress_callback)
+
+        # Resolves and downloads all file groups and files in the mets file
+        # Note: processes must be 1 when called inside the Uvicorn process, it would crash the Uvicorn internals
+        WorkspaceBagger(resolver).bag(workspace, dest=bag_dest, ocrd_identifier=workspace_id, processes=processes)
+    except Exception:
+        rmtree(workspace.directory, ignore_errors=True)
+        raise
+    return workspace.directory
+
+
+def _safe_bag_entry_path(bag_dir: str, entry_name: str) -> str:
+    entry_path = normpath(join(bag_dir, entry_name))
+    if not entry_path.startswith(join(bag_dir, "")):
+        raise WorkspaceBagNotValidError(f"Bag entry outside of the bag directory: {entry_name}")
+    return entry_path
+
+
+def ingest_workspace_bag(
+    bag_dest: str, workspace_dir: str, chunk_size: int = BAG_STREAM_CHUNK_SIZE
+) -> Tuple[dict, int, List[str]]:
+    """
+    Validate the OCRD-ZIP and turn it into a workspace in a single pass over the zip entries.
+
+    Each entry is extracted once into a staging bag next to the workspace directory while being hashed,
+    so the bagit manifests are checked against the computed checksums without reading the files again.
+    The OCR-D bagit profile and the bagit structure (Payload-Oxum, completeness) are checked on the
+    staging bag, then its payload directory is moved to become the workspace directory. The METS file
+    is parsed once to get both the amount of physical pages and the file groups.
+
+    Args:
+         bag_dest (str): path to the OCRD-ZIP
+         workspace_dir (str): path to the not yet existing workspace directory
+         chunk_size (int): amount of bytes extracted from a zip entry at once
+    Returns:
+        the bag info, the amount of physical pages, the file groups
+    Raises:
+        WorkspaceBagNotValidError: if the bag does not conform to the OCRD-ZIP specification,
+            uses an unsupported checksum algorithm or contains a malformed METS file
+    """
+    profile_validator = Profile(OCRD_BAGIT_PROFILE_URL, profile=OCRD_BAGIT_PROFILE)
+    try:
+        profile_validator.validate_serialization(bag_dest)
+    except Exception as error:
+        raise WorkspaceBagNotValidError(f"Error during workspace validation: {error}") from error
+
+    staging_dir = mkdtemp(prefix=".ingest-", dir=dirname(workspace_dir))
+    try:
+        checksums = {}
+        with ZipFile(bag_dest, mode="r") as zip_fp:
+            entries = [entry for entry in zip_fp.infolist() if not entry.is_dir()]
+            # Hash with the algorithms of the manifests available in the bag, OCR-D requires sha512
+            algorithms = {"sha512"}
+            for entry in entries:
+                manifest_match = re_match(r"^(?:tag)?manifest-(\w+)\.txt$", entry.filename)
+                if manifest_match:
+                    algorithm = manifest_match.group(1)
+                    if algorithm not in algorithms_available:
+                        raise WorkspaceBagNotValidError(f"Unsupported checksum algorithm of {entry.filename}")
+                    algorithms.add(algorithm)
+            for entry in entries:
+                entry_path = _safe_bag_entry_path(staging_dir, entry.filename)
+                Path(dirname(entry_path)).mkdir(parents=True, exist_ok=True)
+                hashes = {algorithm: hashlib_new(algorithm) for algorithm in algorithms}
+                with zip_fp.open(entry, mode="r") as entry_fp, open(entry_path, mode="wb") as file_fp:
+                    while True:
+                        chunk = entry_fp.read(chunk_size)
+                        if not chunk:
+                            break
+                        for entry_hash in hashes.values():
+                            entry_hash.update(chunk)
+                        file_fp.write(chunk)
+                checksums[normpath(entry.filename)] = {
+                    algorithm: entry_hash.hexdigest() for algorithm, entry_hash in hashes.items()}
+
+        try:
+            bag = bagit.Bag(staging_dir)
+            # Structure, bagit.txt, fetch.txt, Payload-Oxum and completeness checks, without checksumming
+            bag.validate(completeness_only=True)
+        except bagit.BagError as error:
+            raise WorkspaceBagNotValidError(f"Error during workspace validation: {error}") from error
+        if not profile_validator.validate(bag):
+            raise WorkspaceBagNotValidError(f"Error during workspace validation: {profile_validator.report}")
+        mismatches = []
+        for entry_path, expected_hashes in bag.entries.items():
+            for algorithm, expected_hash in expected_hashes.items():
+                computed_hash = checksums.get(normpath(entry_path), {}).get(algorithm, None)
+                if computed_hash != expected_hash:
+                    mismatches.append(f"{entry_path} ({algorithm}): expected {expected_hash}, found {computed_hash}")
+        if mismatches:
+            raise WorkspaceBagNotValidError(f"Checksum validation failed: {'; '.join(mismatches)}")
+
+        bag_info = dict(bag.info)
+        mets_basename = bag_info.get("Ocrd-Mets", "mets.xml")
+        mets_path = join(staging_dir, "data", mets_basename)
+        if not isfile(mets_path):
+            raise WorkspaceBagNotValidError(f"The METS file is missing in the bag: data/{mets_basename}")
+        try:
+            mets = OcrdMets(filename=mets_path)
+            pages_amount = len(mets.physical_pages)
+            file_groups = mets.file_groups
+        except Exception as error:
+            message = f"Error when parsing the METS file data/{mets_basename}: {error}"
+            raise WorkspaceBagNotValidError(message) from error
+        rename(join(staging_dir, "data"), workspace_dir)
+    finally:
+        rmtree(staging_dir, ignore_errors=True)
+    return bag_info, pages_amount, file_groups
@@ -158,6 +158,8 @@ class StateJobSlurm(str, Enum):
 
 
 class StateWorkspace(str, Enum):
+    IMPORTING = "IMPORTING"
+    IMPORT_FAILED = "IMPORT_FAILED"
     RUNNING = "RUNNING"
     QUEUED = "QUEUED"
     PENDING = "PENDING"
@@ -1,54 +1,94 @@
 __all__ = [
     "DBHPCSlurmJob",
+    "DBServerLock",
+    "DBUnitOfWork",
     "DBUserAccount",
+    "DBVersionConflictError",
     "DBWorkflow",
     "DBWorkflowJob",
+    "DBWorkflowJobListEntry",
+    "DBWorkflowListEntry",
     "DBWorkspace",
+    "DBWorkspaceListEntry",
+    "db_acquire_server_lock",
     "db_create_hpc_slurm_job",
     "db_create_processing_stats",
     "db_create_user_account",
     "db_create_workflow",
     "db_create_workflow_job",
+    "db_create_workflow_jobs",
     "db_create_workspace",
     "db_get_hpc_slurm_job",
     "db_get_processing_stats",
     "db_get_user_account",
+    "db_get_user_account_version",
     "db_get_user_account_with_email",
     "db_get_workflow",
     "db_get_workflow_job",
+    "db_get_workflow_jobs",
+    "db_get_workflow_jobs_in_states",
+    "db_get_workflows",
     "db_get_workspace",
+    "db_get_workspaces",
     "db_increase_processing_stats",
     "db_increase_processing_stats_with_handling",
     "db_initiate_database",
+    "db_list_workflow_jobs",
+    "db_list_workflows",
+    "db_list_workspaces",
+    "db_partial_update",
+    "db_release_server_lock",
     "db_update_hpc_slurm_job",
     "db_update_user_account",
     "db_update_workflow",
     "db_update_workflow_job",
+    "db_update_workflow_jobs_state",
     "db_update_workspace",
+    "db_update_workspaces_state",
+    "db_upsert_workflows",
+    "sync_db_acquire_server_lock",
     "sync_db_create_hpc_slurm_job",
     "sync_db_create_processing_stats",
     "sync_db_create_user_account",
     "sync_db_create_workflow",
     "sync_db_create_workflow_job",
+    "sync_db_create_workflow_jobs",
     "sync_db_create_workspace",
     "sync_db_get_hpc_slurm_job",
     "sync_db_get_processing_stats",
     "sync_db_get_user_account",
+    "sync_db_get_user_account_version",
     "sync_db_get_user_account_with_email",
     "sync_db_get_workflow",
     "sync_db_get_workflow_job",
+    "sync_db_get_workflow_jobs",
+    "sync_db_get_workflow_jobs_in_states",
+    "sync_db_get_workflows",
     "sync_db_get_workspace",
+    "sync_db_get_workspaces",
     "sync_db_increase_processing_stats",
     "sync_db_initiate_database",
+    "sync_db_list_workflow_jobs",
+    "sync_db_list_workflows",
+    "sync_db_list_workspaces",
+    "sync_db_release_server_lock",
     "sync_db_update_hpc_slurm_job",
     "sync_db_update_user_account",
     "sync_db_update_workflow",
     "sync_db_update_workflow_job",
+    "sync_db_update_workflow_jobs_state",
     "sync_db_update_workspace",
+    "sync_db_update_workspaces_state",
+    "sync_db_upsert_workflows",
 ]
 
 from .base import db_initiate_database, sync_db_initiate_database
-from .models import DBHPCSlurmJob, DBUserAccount, DBWorkflow, DBWorkflowJob, DBWorkspace
+from .db_partial_update import db_partial_update, DBVersionConflictError
+from .db_unit_of_work import DBUnitOfWork
+from .models import (
+    DBHPCSlurmJob, DBServerLock, DBUserAccount, DBWorkflow, DBWorkflowJob, DBWorkflowJobListEntry, DBWorkflowListEntry,
+    DBWorkspace, DBWorkspaceListEntry
+)
 from .db_hpc_slurm_job import (
     db_create_hpc_slurm_job,
     db_get_hpc_slurm_job,
@@ -60,36 +100,60 @@ from .db_hpc_slurm_job import (
 from .db_user_account import (
     db_create_user_account,
     db_get_user_account,
+    db_get_user_account_version,
     db_get_user_account_with_email,
     db_update_user_account,
     sync_db_create_user_account,
     sync_db_get_user_account,
+    sync_db_get_user_account_version,
     sync_db_get_user_account_with_email,
     sync_db_update_user_account
 )
 from .db_workflow import (
     db_create_workflow,
     db_get_workflow,
+    db_get_workflows,
+    db_list_workflows,
     db_update_workflow,
+    db_upsert_workflows,
     sync_db_create_workflow,
     sync_db_get_workflow,
-    sync_db_update_workflow
+    sync_db_get_workflows,
+    sync_db_list_workflows,
+    sync_db_update_workflow,
+    sync_db_upsert_workflows
 )
 from .db_workflow_job import (
     db_create_workflow_job,
+    db_create_workflow_jobs,
     db_get_workflow_job,
+    db_get_workflow_jobs,
+    db_get_workflow_jobs_in_states,
+    db_list_workflow_jobs,
     db_update_workflow_job,
+    db_update_workflow_jobs_state,
     sync_db_create_workflow_job,
+    sync_db_create_workflow_jobs,
     sync_db_get_workflow_job,
-    sync_db_update_workflow_job
+    sync_db_get_workflow_jobs,
+    sync_db_get_workflow_jobs_in_states,
+    sync_db_list_workflow_jobs,
+    sync_db_update_workflow_job,
+    sync_db_update_workflow_jobs_state
 )
 from .db_workspace import (
     db_create_workspace,
     db_get_workspace,
+    db_get_workspaces,
+    db_list_workspaces,
     db_update_workspace,
+    db_update_workspaces_state,
     sync_db_create_workspace,
     sync_db_get_workspace,
-    sync_db_update_workspace
+    sync_db_get_workspaces,
+    sync_db_list_workspaces,
+    sync_db_update_workspace,
+    sync_db_update_workspaces_state
 )
 from .db_processing_statistics import (
     db_create_processing_stats,
@@ -100,3 +164,9 @@ from .db_processing_statistics import (
     sync_db_get_processing_stats,
     sync_db_increase_processing_stats
 )
+from .db_server_lock import (
+    db_acquire_server_lock,
+    db_release_server_lock,
+    sync_db_acquire_server_lock,
+    sync_db_release_server_lock
+)
@@ -1,26 +1,96 @@
-from logging import getLogger
+from logging import getLogger, Logger
 from os import environ
-from beanie import init_beanie
+from typing import Any, List, Tuple, Type
+from beanie import Document, init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
 
 from operandi_utils import call_sync
-from .models import DBHPCSlurmJob, DBProcessingStatistics, DBUserAccount, DBWorkflow, DBWorkflowJob, DBWorkspace
+from .constants import (
+    DB_CONNECT_TIMEOUT_MS, DB_MAX_IDLE_TIME_MS, DB_MAX_POOL_SIZE, DB_MIN_POOL_SIZE, DB_SERVER_SELECTION_TIMEOUT_MS,
+    DB_REPORTED_DUPLICATES, DB_SOCKET_TIMEOUT_MS, DB_SYNC_MAX_POOL_SIZE, DB_SYNC_MIN_POOL_SIZE,
+    DB_WAIT_QUEUE_TIMEOUT_MS)
+from .models import (
+    DBHPCSlurmJob, DBProcessingStatistics, DBServerLock, DBUserAccount, DBWorkflow, DBWorkflowJob, DBWorkspace)
+
+# The unique indexes of the identifying fields. Not declared in the `Settings` of the document models,
+# since entries created before the indexes existed may hold duplicates which make `init_beanie` fail.
+_UNIQUE_INDEXES: List[Tuple[Type[Document], str]] = [
+    (DBProcessingStatistics, "user_id"),
+    (DBUserAccount, "email"),
+    (DBUserAccount, "user_id"),
+    (DBWorkflow, "workflow_id"),
+    (DBWorkflowJob, "job_id"),
+    (DBWorkspace, "workspace_id")
+]
 
 
 async def db_initiate_database(
-    db_url: str = environ.get("OPERANDI_DB_URL"), db_name: str = environ.get("OPERANDI_DB_NAME")
+    db_url: str = environ.get("OPERANDI_DB_URL"), db_name: str = environ.get("OPERANDI_DB_NAME"),
+    max_pool_size: int = DB_MAX_POOL_SIZE, min_pool_size: int = DB_MIN_POOL_SIZE
 ):
     logger = getLogger("operandi_utils.database.base")
     logger.info(f"MongoDB URL: {db_url}")
     logger.info(f"MongoDB Name: {db_name}")
-    doc_models = [DBHPCSlurmJob, DBProcessingStatistics, DBUserAccount, DBWorkflow, DBWorkflowJob, DBWorkspace]
-    client = AsyncIOMotorClient(db_url)
+    doc_models = [
+        DBHPCSlurmJob, DBProcessingStatistics, DBServerLock, DBUserAccount, DBWorkflow, DBWorkflowJob, DBWorkspace]
+    client = AsyncIOMotorClient(
+        db_url, maxPoolSize=max_pool_size, minPoolSize=min_pool_size, maxIdleTimeMS=DB_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=DB_SERVER_SELECTION_TIMEOUT_MS, connectTimeoutMS=DB_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=DB_SOCKET_TIMEOUT_MS, waitQueueTimeoutMS=DB_WAIT_QUEUE_TIMEOUT_MS)
     # Documentation: https://beanie-odm.dev/
+    # Also creates the missing indexes declared in the `Settings` of the document models
     await init_beanie(database=client.get_default_database(default=db_name), document_models=doc_models)
+    await db_create_unique_indexes(logger)
+
+
+async def db_find_duplicate_values(document_model: Type[Document], field: str, limit: int) -> List[Any]:
+    """
+    Returns up to `limit` values of the field which are held by more than one entry
+    """
+    pipeline = [
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit}
+    ]
+    return [entry["_id"] async for entry in document_model.get_motor_collection().aggregate(pipeline)]
+
+
+async def db_create_unique_indexes(
+    logger: Logger, unique_indexes: List[Tuple[Type[Document], str]] = None
+) -> List[Tuple[Type[Document], str]]:
+    """
+    Creates the missing unique indexes and returns the ones which could not be created. Fields holding duplicate
+    values are reported and left without a unique index instead of failing the startup, the duplicates must be
+    resolved manually, e.g., accounts registered twice with the same email before the registration check was fixed.
+    """
+    failed_indexes = []
+    for document_model, field in unique_indexes or _UNIQUE_INDEXES:
+        collection = document_model.get_motor_collection()
+        index_name = f"{field}_1"
+        index_information = await collection.index_information()
+        if index_information.get(index_name, {}).get("unique", False):
+            continue
+        duplicates = await db_find_duplicate_values(document_model, field, limit=DB_REPORTED_DUPLICATES)
+        if duplicates:
+            logger.error(
+                f"Not creating the unique index of `{collection.name}.{field}`, "
+                f"duplicate values (first {DB_REPORTED_DUPLICATES}): {duplicates}")
+            failed_indexes.append((document_model, field))
+            continue
+        try:
+            await collection.create_index([(field, ASCENDING)], name=index_name, unique=True)
+        except OperationFailure as error:
+            # Also raised for duplicates inserted meanwhile or a conflicting non-unique index with the same name
+            logger.error(f"Failed to create the unique index of `{collection.name}.{field}`: {error}")
+            failed_indexes.append((document_model, field))
+    return failed_indexes
 
 
 @call_sync
 async def sync_db_initiate_database(
-    db_url: str = environ.get("OPERANDI_DB_URL"), db_name: str = environ.get("OPERANDI_DB_NAME")
+    db_url: str = environ.get("OPERANDI_DB_URL"), db_name: str = environ.get("OPERANDI_DB_NAME"),
+    max_pool_size: int = DB_SYNC_MAX_POOL_SIZE, min_pool_size: int = DB_SYNC_MIN_POOL_SIZE
 ):
-    await db_initiate_database(db_url, db_name)
+    await db_initiate_database(db_url, db_name, max_pool_size, min_pool_size)
@@ -0,0 +1,21 @@
+# Maximal and minimal amount of the pooled MongoDB connections of the Operandi Server
+DB_MAX_POOL_SIZE: int = 100
+DB_MIN_POOL_SIZE: int = 0
+# Maximal and minimal amount of the pooled MongoDB connections of a broker worker process. The synchronous
+# database calls of a worker are sequential, with only a single bulk write per collection running concurrently
+DB_SYNC_MAX_POOL_SIZE: int = 8
+DB_SYNC_MIN_POOL_SIZE: int = 2
+
+# Milliseconds to wait for an available MongoDB server before failing the operation
+DB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+# Milliseconds to wait for a new connection to be established
+DB_CONNECT_TIMEOUT_MS: int = 5000
+# Milliseconds to wait for the response of a single operation before failing it
+DB_SOCKET_TIMEOUT_MS: int = 60000
+# Milliseconds to wait for a free pooled connection before failing the operation
+DB_WAIT_QUEUE_TIMEOUT_MS: int = 10000
+# Milliseconds after which an idle pooled connection is closed
+DB_MAX_IDLE_TIME_MS: int = 300000
+
+# Maximal amount of duplicate values reported for a field which is missing its unique index
+DB_REPORTED_DUPLICATES: int = 10
@@ -1,7 +1,14 @@
+from typing import Optional
 from datetime import datetime
 from operandi_utils import call_sync, StateJobSlurm
+from .db_partial_update import db_partial_update
 from .models import DBHPCSlurmJob
 
+_HPC_SLURM_JOB_UPDATABLE_FIELDS = [
+    "workflow_job_id", "hpc_slurm_job_id", "hpc_slurm_job_state", "hpc_batch_script_path", "hpc_slurm_workspace_path",
+    "deleted", "details"
+]
+
 
 async def db_create_hpc_slurm_job(
     user_id: str, workflow_job_id: str, hpc_slurm_job_id: str, hpc_batch_script_path: str,
@@ -45,32 +52,24 @@ async def sync_db_get_hpc_slurm_job(workflow_job_id: str) -> DBHPCSlurmJob:
     return await db_get_hpc_slurm_job(workflow_job_id)
 
 
-async def db_update_hpc_slurm_job(find_workflow_job_id: str, **kwargs) -> DBHPCSlurmJob:
-    db_hpc_slurm_job = await db_get_hpc_slurm_job(workflow_job_id=find_workflow_job_id)
-    model_keys = list(db_hpc_slurm_job.__dict__.keys())
-    for key, value in kwargs.items():
-        if key not in model_keys:
-            raise ValueError(f"Field not available: {key}")
-        if key == "workflow_job_id":
-            db_hpc_slurm_job.workflow_job_id = value
-        elif key == "hpc_slurm_job_id":
-            db_hpc_slurm_job.hpc_slurm_job_id = value
-        elif key == "hpc_slurm_job_state":
-            db_hpc_slurm_job.hpc_slurm_job_state = value
-        elif key == "hpc_batch_script_path":
-            db_hpc_slurm_job.hpc_batch_script_path = value
-        elif key == "hpc_slurm_workspace_path":
-            db_hpc_slurm_job.hpc_slurm_workspace_path = value
-        elif key == "deleted":
-            db_hpc_slurm_job.deleted = value
-        elif key == "details":
-            db_hpc_slurm_job.details = value
-        else:
-            raise ValueError(f"Field not updatable: {key}")
-    await db_hpc_slurm_job.save()
+async def db_update_hpc_slurm_job(
+    find_workflow_job_id: str, expected_version: Optional[int] = None, **kwargs
+) -> DBHPCSlurmJob:
+    """
+    Sets the `kwargs` fields with a single atomic write. If `expected_version` is provided,
+    DBVersionConflictError is raised when the entry has been updated by another writer meanwhile.
+    """
+    db_hpc_slurm_job = await db_partial_update(
+        DBHPCSlurmJob, find_query={"workflow_job_id": find_workflow_job_id},
+        updatable_fields=_HPC_SLURM_JOB_UPDATABLE_FIELDS, set_fields=kwargs, expected_version=expected_version)
+    if not db_hpc_slurm_job:
+        raise RuntimeError(f"No DB hpc slurm job entry found for id: {find_workflow_job_id}")
     return db_hpc_slurm_job
 
 
 @call_sync
-async def sync_db_update_hpc_slurm_job(find_workflow_job_id: str, **kwargs) -> DBHPCSlurmJob:
-    return await db_update_hpc_slurm_job(find_workflow_job_id=find_workflow_job_id, **kwargs)
+async def sync_db_update_hpc_slurm_job(
+    find_workflow_job_id: str, expected_version: Optional[int] = None, **kwargs
+) -> DBHPCSlurmJob:
+    return await db_update_hpc_slurm_job(
+        find_workflow_job_id=find_workflow_job_id, expected_version=expected_version, **kwargs)
@@ -0,0 +1,58 @@
+from typing import Any, Dict, Iterable, Optional, Type, TypeVar
+from beanie import Document
+from beanie.odm.utils.encoder import Encoder
+from beanie.odm.utils.parsing import parse_obj
+from pymongo import ReturnDocument
+
+DocumentType = TypeVar("DocumentType", bound=Document)
+
+
+class DBVersionConflictError(RuntimeError):
+    """
+    The entry exists, but has been updated by another writer since the expected version was read
+    """
+    pass
+
+
+def _check_update_fields(document_model: Type[Document], updatable_fields: Iterable[str], fields: Dict[str, Any]):
+    for key in fields.keys():
+        if key not in document_model.__fields__:
+            raise ValueError(f"Field not available: {key}")
+        if key not in updatable_fields:
+            raise ValueError(f"Field not updatable: {key}")
+
+
+async def db_partial_update(
+    document_model: Type[DocumentType], find_query: Dict[str, Any], updatable_fields: Iterable[str],
+    set_fields: Optional[Dict[str, Any]] = None, inc_fields: Optional[Dict[str, int]] = None,
+    expected_version: Optional[int] = None
+) -> Optional[DocumentType]:
+    """
+    Applies `$set` of `set_fields` and `$inc` of `inc_fields` to the entry matching `find_query` with a single
+    atomic write and returns the updated entry, or None if no entry matches. Each update increments the `version`
+    of the entry. If `expected_version` is provided, the update is applied only if the entry still has that version,
+    otherwise DBVersionConflictError is raised.
+    """
+    set_fields = set_fields or {}
+    inc_fields = inc_fields or {}
+    _check_update_fields(document_model, updatable_fields, set_fields)
+    _check_update_fields(document_model, updatable_fields, inc_fields)
+    update = {"$inc": {**inc_fields, "version": 1}}
+    if set_fields:
+        update["$set"] = set_fields
+
+    update_query = dict(find_query)
+    if expected_version is not None:
+        # Entries created before the version field was introduced have no version, same as version 0
+        update_query["version"] = expected_version if expected_version else {"$in": [0, None]}
+    encoder = Encoder()
+    collection = document_model.get_motor_collection()
+    updated_entry = await collection.find_one_and_update(
+        encoder.encode(update_query), encoder.encode(update), return_document=ReturnDocument.AFTER)
+    if updated_entry:
+        return parse_obj(document_model, updated_entry)
+    if expected_version is not None and await collection.count_documents(encoder.encode(find_query), limit=1):
+        raise DBVersionConflictError(
+            f"The entry of {collection.name} matching {find_query} has been updated "
+            f"concurrently, expected version: {expected_version}")
+    return None
@@ -1,7 +1,13 @@
 from fastapi import HTTPException, status
 from operandi_utils import call_sync
+from .db_partial_update import db_partial_update
 from .models import DBProcessingStatistics
 
+_PROCESSING_STATISTICS_COUNTERS = [
+    "pages_uploaded", "pages_submitted", "pages_succeed", "pages_failed", "pages_downloaded", "pages_cancel"
+]
+
+
 async def db_create_processing_stats(institution_id: str, user_id: str) -> DBProcessingStatistics:
     db_processing_stats = await DBProcessingStatistics.find_one(
         DBProcessingStatistics.institution_id == institution_id,
@@ -33,28 +39,17 @@ async def sync_db_get_processing_stats(user_id: str) -> DBProcessingStatistics:
 
 
 async def db_increase_processing_stats(find_user_id: str, **kwargs) -> DBProcessingStatistics:
-    db_processing_stats = await db_get_processing_stats(user_id=find_user_id)
-    model_keys = list(db_processing_stats.__dict__.keys())
+    """
+    Increases the `kwargs` counters with a single atomic `$inc`, hence, concurrent increases are never lost
+    """
     for key, value in kwargs.items():
-        if key not in model_keys:
-            raise ValueError(f"Field not available: {key}")
         if value < 0:
             raise ValueError(f"Negative value cannot be used to increase usage statistics for key: {key}")
-        if key == "pages_uploaded":
-            db_processing_stats.pages_uploaded += value
-        elif key == "pages_submitted":
-            db_processing_stats.pages_submitted += value
-        elif key == "pages_succeed":
-            db_processing_stats.pages_succeed += value
-        elif key == "pages_cancel":
-            db_processing_stats.pages_cancel += value
-        elif key == "pages_failed":
-            db_processing_stats.pages_failed = +value
-        elif key == "pages_downloaded":
-            db_processing_stats.pages_downloaded = +value
-        else:
-            raise ValueError(f"Field not updatable: {key}")
-    await db_processing_stats.save()
+    db_processing_stats = await db_partial_update(
+        DBProcessingStatistics, find_query={"user_id": find_user_id},
+        updatable_fields=_PROCESSING_STATISTICS_COUNTERS, inc_fields=kwargs)
+    if not db_processing_stats:
+        raise RuntimeError(f"No DB processing statistics entry found for user id: {find_user_id}")
     return db_processing_stats
 
 async def db_increase_processing_stats_with_handling(logger, find_user_id: str, **kwargs) -> DBProcessingStatistics:
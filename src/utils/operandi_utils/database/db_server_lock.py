@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from operandi_utils import call_sync
+from .models import DBServerLock
+
+
+async def db_acquire_server_lock(lock_name: str, owner_id: str, ttl: float) -> bool:
+    """
+    Acquires the lock for `ttl` seconds if it is free or expired, or renews it if `owner_id` already holds it.
+    Returns whether `owner_id` holds the lock afterwards.
+    """
+    # The expiration times are compared across processes and hosts, hence, stored in UTC
+    now = datetime.now(timezone.utc)
+    find_query = {"lock_name": lock_name, "$or": [{"owner_id": owner_id}, {"expires_at": {"$lt": now}}]}
+    update = {"$set": {"owner_id": owner_id, "expires_at": now + timedelta(seconds=ttl)}}
+    try:
+        # The upsert creates the lock if missing, an existing lock held by another owner makes it violate
+        # the unique index on the lock name instead of being overwritten
+        await DBServerLock.get_motor_collection().update_one(find_query, update, upsert=True)
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+@call_sync
+async def sync_db_acquire_server_lock(lock_name: str, owner_id: str, ttl: float) -> bool:
+    return await db_acquire_server_lock(lock_name, owner_id, ttl)
+
+
+async def db_release_server_lock(lock_name: str, owner_id: str) -> bool:
+    """
+    Releases the lock if `owner_id` holds it, returns whether it was released
+    """
+    result = await DBServerLock.get_motor_collection().delete_one({"lock_name": lock_name, "owner_id": owner_id})
+    return bool(result.deleted_count)
+
+
+@call_sync
+async def sync_db_release_server_lock(lock_name: str, owner_id: str) -> bool:
+    return await db_release_server_lock(lock_name, owner_id)
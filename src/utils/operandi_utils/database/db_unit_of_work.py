@@ -0,0 +1,128 @@
+from asyncio import gather
+from typing import Any, Dict, Iterable, List, Optional, Type, Union
+from beanie import Document
+from beanie.odm.utils.dump import get_dict
+from beanie.odm.utils.encoder import Encoder
+from pymongo import InsertOne, UpdateOne
+
+from operandi_utils import call_sync
+from .db_hpc_slurm_job import _HPC_SLURM_JOB_UPDATABLE_FIELDS
+from .db_partial_update import _check_update_fields
+from .db_processing_statistics import _PROCESSING_STATISTICS_COUNTERS
+from .db_workflow_job import _WORKFLOW_JOB_UPDATABLE_FIELDS
+from .db_workspace import _WORKSPACE_UPDATABLE_FIELDS
+from .models import DBHPCSlurmJob, DBProcessingStatistics, DBWorkflowJob, DBWorkspace
+
+
+class _StagedUpdate:
+    def __init__(self, find_query: Dict[str, Any]):
+        self.find_query = find_query
+        self.set_fields: Dict[str, Any] = {}
+        self.inc_fields: Dict[str, int] = {}
+
+    def to_operation(self, encoder: Encoder) -> UpdateOne:
+        update = {"$inc": {**self.inc_fields, "version": 1}}
+        if self.set_fields:
+            update["$set"] = self.set_fields
+        return UpdateOne(encoder.encode(self.find_query), encoder.encode(update))
+
+
+class DBUnitOfWork:
+    """
+    Collects the changes of a worker across the collections and writes them on `flush` with a single `bulk_write`
+    per touched collection, all sent concurrently. Changes staged for the same entry are coalesced into one update,
+    the last `$set` of a field wins and the `$inc` of a field are summed up. The changes are applied in the order
+    they were first staged.
+
+    States which the user waits for should be flushed right after staging them, the rest can be accumulated and
+    flushed together, e.g., when the handling of a message is finished.
+    """
+    def __init__(self):
+        # Keys: document models, values: the staged inserts and updates of the collection of the model
+        self._staged: Dict[Type[Document], List[Union[Document, _StagedUpdate]]] = {}
+        # Keys: document models and the find query of an entry, values: the staged update of the entry
+        self._staged_updates: Dict[tuple, _StagedUpdate] = {}
+
+    def __len__(self) -> int:
+        return sum(len(staged) for staged in self._staged.values())
+
+    def stage_insert(self, document: Document) -> None:
+        self._staged.setdefault(type(document), []).append(document)
+
+    def stage_update(
+        self, document_model: Type[Document], find_query: Dict[str, Any], updatable_fields: Iterable[str],
+        set_fields: Optional[Dict[str, Any]] = None, inc_fields: Optional[Dict[str, int]] = None
+    ) -> None:
+        set_fields = set_fields or {}
+        inc_fields = inc_fields or {}
+        _check_update_fields(document_model, updatable_fields, set_fields)
+        _check_update_fields(document_model, updatable_fields, inc_fields)
+        update_key = (document_model, tuple(sorted(find_query.items())))
+        staged_update = self._staged_updates.get(update_key, None)
+        if not staged_update:
+            staged_update = _StagedUpdate(find_query=find_query)
+            self._staged_updates[update_key] = staged_update
+            self._staged.setdefault(document_model, []).append(staged_update)
+        staged_update.set_fields.update(set_fields)
+        for key, value in inc_fields.items():
+            staged_update.inc_fields[key] = staged_update.inc_fields.get(key, 0) + value
+
+    def stage_hpc_slurm_job_update(self, find_workflow_job_id: str, **kwargs) -> None:
+        self.stage_update(
+            DBHPCSlurmJob, find_query={"workflow_job_id": find_workflow_job_id},
+            updatable_fields=_HPC_SLURM_JOB_UPDATABLE_FIELDS, set_fields=kwargs)
+
+    def stage_processing_stats_increase(self, find_user_id: str, **kwargs) -> None:
+        for key, value in kwargs.items():
+            if value < 0:
+                raise ValueError(f"Negative value cannot be used to increase usage statistics for key: {key}")
+        self.stage_update(
+            DBProcessingStatistics, find_query={"user_id": find_user_id},
+            updatable_fields=_PROCESSING_STATISTICS_COUNTERS, inc_fields=kwargs)
+
+    def stage_workflow_job_update(self, find_job_id: str, **kwargs) -> None:
+        self.stage_update(
+            DBWorkflowJob, find_query={"job_id": find_job_id}, updatable_fields=_WORKFLOW_JOB_UPDATABLE_FIELDS,
+            set_fields=kwargs)
+
+    def stage_workspace_update(self, find_workspace_id: str, **kwargs) -> None:
+        self.stage_update(
+            DBWorkspace, find_query={"workspace_id": find_workspace_id}, updatable_fields=_WORKSPACE_UPDATABLE_FIELDS,
+            set_fields=kwargs)
+
+    async def flush(self) -> int:
+        """
+        Writes all staged changes and returns the amount of inserted and modified entries. The staged changes are
+        discarded even if writing them fails, since the outcome of a partially applied bulk write is unknown.
+
+        Raises:
+            RuntimeError: if some staged updates matched no entry, the updates of the other entries are applied
+        """
+        staged, self._staged, self._staged_updates = self._staged, {}, {}
+        if not staged:
+            return 0
+        encoder = Encoder()
+        bulk_writes = []
+        staged_update_counts = []
+        for document_model, staged_changes in staged.items():
+            operations = []
+            for staged_change in staged_changes:
+                if isinstance(staged_change, _StagedUpdate):
+                    operations.append(staged_change.to_operation(encoder))
+                else:
+                    operations.append(InsertOne(get_dict(staged_change, to_db=True)))
+            bulk_writes.append(document_model.get_motor_collection().bulk_write(operations, ordered=True))
+            staged_update_counts.append(sum(isinstance(change, _StagedUpdate) for change in staged_changes))
+        bulk_write_results = await gather(*bulk_writes)
+        unmatched = [
+            f"{document_model.__name__}: {result.matched_count} of {staged_update_count}"
+            for document_model, staged_update_count, result in zip(staged, staged_update_counts, bulk_write_results)
+            if result.matched_count != staged_update_count
+        ]
+        if unmatched:
+            raise RuntimeError(f"Not all staged updates matched an entry, matched updates: {', '.join(unmatched)}")
+        return sum(result.inserted_count + result.modified_count for result in bulk_write_results)
+
+    @call_sync
+    async def sync_flush(self) -> int:
+        return await self.flush()
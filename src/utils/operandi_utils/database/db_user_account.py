@@ -1,8 +1,14 @@
+from typing import Optional
 from datetime import datetime
 from operandi_utils import call_sync, generate_id
 from ..constants import AccountType
+from .db_partial_update import db_partial_update
 from .models import DBUserAccount
 
+_USER_ACCOUNT_UPDATABLE_FIELDS = [
+    "institution_id", "email", "encrypted_pass", "salt", "account_type", "approved_user", "deleted", "details"
+]
+
 
 async def db_create_user_account(
     institution_id: str, email: str, encrypted_pass: str, salt: str, account_type: AccountType = AccountType.USER,
@@ -44,6 +50,23 @@ async def sync_db_get_user_account(user_id: str) -> DBUserAccount:
     return await db_get_user_account(user_id)
 
 
+async def db_get_user_account_version(user_id: str) -> int:
+    """
+    Reads only the version of the user account, e.g., to check whether a cached copy of the entry is still current
+    """
+    db_entry = await DBUserAccount.get_motor_collection().find_one(
+        {"user_id": user_id}, projection={"_id": 0, "version": 1})
+    if not db_entry:
+        raise RuntimeError(f"No DB user account entry found for user_id: {user_id}")
+    # Entries created before the version field was introduced have no version, same as version 0
+    return db_entry.get("version", None) or 0
+
+
+@call_sync
+async def sync_db_get_user_account_version(user_id: str) -> int:
+    return await db_get_user_account_version(user_id)
+
+
 async def db_get_user_account_with_email(email: str) -> DBUserAccount:
     db_user_account = await DBUserAccount.find_one(DBUserAccount.email == email)
     if not db_user_account:
@@ -56,34 +79,19 @@ async def sync_db_get_user_account_with_email(email: str) -> DBUserAccount:
     return await db_get_user_account(email)
 
 
-async def db_update_user_account(user_id: str, **kwargs) -> DBUserAccount:
-    db_user_account = await db_get_user_account(user_id=user_id)
-    model_keys = list(db_user_account.__dict__.keys())
-    for key, value in kwargs.items():
-        if key not in model_keys:
-            raise ValueError(f"Field not available: {key}")
-        if key == "institution_id":
-            db_user_account.institution_id = value
-        elif key == "email":
-            db_user_account.email = value
-        elif key == "encrypted_pass":
-            db_user_account.encrypted_pass = value
-        elif key == "salt":
-            db_user_account.salt = value
-        elif key == "account_type":
-            db_user_account.account_type = value
-        elif key == "approved_user":
-            db_user_account.approved_user = value
-        elif key == "deleted":
-            db_user_account.deleted = value
-        elif key == "details":
-            db_user_account.details = value
-        else:
-            raise ValueError(f"Field not updatable: {key}")
-    await db_user_account.save()
+async def db_update_user_account(user_id: str, expected_version: Optional[int] = None, **kwargs) -> DBUserAccount:
+    """
+    Sets the `kwargs` fields with a single atomic write. If `expected_version` is provided,
+    DBVersionConflictError is raised when the entry has been updated by another writer meanwhile.
+    """
+    db_user_account = await db_partial_update(
+        DBUserAccount, find_query={"user_id": user_id}, updatable_fields=_USER_ACCOUNT_UPDATABLE_FIELDS,
+        set_fields=kwargs, expected_version=expected_version)
+    if not db_user_account:
+        raise RuntimeError(f"No DB user account entry found for user_id: {user_id}")
     return db_user_account
 
 
 @call_sync
-async def sync_db_update_user_account(user_id: str, **kwargs) -> DBUserAccount:
-    return await db_update_user_account(user_id=user_id, **kwargs)
+async def sync_db_update_user_account(user_id: str, expected_version: Optional[int] = None, **kwargs) -> DBUserAccount:
+    return await db_update_user_account(user_id=user_id, expected_version=expected_version, **kwargs)
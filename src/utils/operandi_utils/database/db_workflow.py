@@ -1,6 +1,15 @@
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+from beanie import PydanticObjectId
+from pymongo import UpdateOne
 from operandi_utils import call_sync
-from .models import DBWorkflow
+from .db_partial_update import db_partial_update
+from .models import DBWorkflow, DBWorkflowListEntry
+
+_WORKFLOW_UPDATABLE_FIELDS = [
+    "workflow_id", "workflow_dir", "workflow_script_base", "workflow_script_path", "workflow_script_hash",
+    "workflow_script_version", "uses_mets_server", "deleted", "details"
+]
 
 
 # TODO: This also updates to satisfy the PUT method in the Workflow Manager - fix this
@@ -54,32 +63,103 @@ async def sync_db_get_workflow(workflow_id: str) -> DBWorkflow:
     return await db_get_workflow(workflow_id)
 
 
-async def db_update_workflow(find_workflow_id: str, **kwargs) -> DBWorkflow:
-    db_workflow = await db_get_workflow(workflow_id=find_workflow_id)
-    model_keys = list(db_workflow.__dict__.keys())
-    for key, value in kwargs.items():
-        if key not in model_keys:
-            raise ValueError(f"Field not available: {key}")
-        if key == "workflow_id":
-            db_workflow.workflow_id = value
-        elif key == "workflow_dir":
-            db_workflow.workflow_dir = value
-        elif key == "workflow_script_base":
-            db_workflow.workflow_script_base = value
-        elif key == "workflow_script_path":
-            db_workflow.workflow_script_path = value
-        elif key == "uses_mets_server":
-            db_workflow.uses_mets_server = value
-        elif key == "deleted":
-            db_workflow.deleted = value
-        elif key == "details":
-            db_workflow.details = value
-        else:
-            raise ValueError(f"Field not updatable: {key}")
-    await db_workflow.save()
+async def db_get_workflows(workflow_ids: List[str]) -> List[DBWorkflow]:
+    return await DBWorkflow.find({"workflow_id": {"$in": workflow_ids}}).to_list()
+
+
+@call_sync
+async def sync_db_get_workflows(workflow_ids: List[str]) -> List[DBWorkflow]:
+    return await db_get_workflows(workflow_ids)
+
+
+async def db_upsert_workflows(workflows: List[Dict[str, Any]]) -> int:
+    """
+    Inserts the new workflows and replaces the scripts of the existing ones with a single bulk write, keyed by
+    the `workflow_id`. Each entry of `workflows` contains the `user_id`, `workflow_id`, `workflow_dir`,
+    `workflow_script_base`, `workflow_script_path`, `workflow_script_hash`, `uses_mets_server` and `details`
+    of a workflow. The `workflow_script_version` of each upserted workflow is incremented.
+    Returns the amount of inserted and modified entries.
+    """
+    created_at = datetime.now()
+    operations = []
+    for workflow in workflows:
+        set_fields = {
+            "user_id": workflow["user_id"],
+            "workflow_dir": workflow["workflow_dir"],
+            "workflow_script_base": workflow["workflow_script_base"],
+            "workflow_script_path": workflow["workflow_script_path"],
+            "workflow_script_hash": workflow["workflow_script_hash"],
+            "uses_mets_server": workflow["uses_mets_server"],
+            "deleted": False,
+            "details": workflow.get("details", "Workflow")
+        }
+        operations.append(UpdateOne(
+            {"workflow_id": workflow["workflow_id"]},
+            {"$set": set_fields, "$setOnInsert": {"datetime": created_at},
+             "$inc": {"workflow_script_version": 1, "version": 1}},
+            upsert=True))
+    if not operations:
+        return 0
+    result = await DBWorkflow.get_motor_collection().bulk_write(operations, ordered=False)
+    return result.upserted_count + result.modified_count
+
+
+@call_sync
+async def sync_db_upsert_workflows(workflows: List[Dict[str, Any]]) -> int:
+    return await db_upsert_workflows(workflows)
+
+
+async def db_list_workflows(
+    user_id: Optional[str] = None, deleted: Optional[bool] = False, start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 100
+) -> List[DBWorkflowListEntry]:
+    """
+    Fetch a page of workflow entries with a single query. Entries are sorted by their object id, the `cursor`
+    is the id of the last entry of the previous page. Raises ValueError if the cursor is not a valid object id.
+    """
+    query = {}
+    if user_id:
+        query["user_id"] = user_id
+    if deleted is not None:
+        query["deleted"] = deleted
+    if start_date or end_date:
+        query["datetime"] = {}
+        if start_date:
+            query["datetime"]["$gte"] = start_date
+        if end_date:
+            query["datetime"]["$lte"] = end_date
+    if cursor:
+        try:
+            query["_id"] = {"$gt": PydanticObjectId(cursor)}
+        except Exception as error:
+            raise ValueError(f"Invalid cursor: {cursor}") from error
+    return await DBWorkflow.find(
+        query, projection_model=DBWorkflowListEntry, sort="+_id", limit=limit).to_list()
+
+
+@call_sync
+async def sync_db_list_workflows(
+    user_id: Optional[str] = None, deleted: Optional[bool] = False, start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 100
+) -> List[DBWorkflowListEntry]:
+    return await db_list_workflows(user_id, deleted, start_date, end_date, cursor, limit)
+
+
+async def db_update_workflow(find_workflow_id: str, expected_version: Optional[int] = None, **kwargs) -> DBWorkflow:
+    """
+    Sets the `kwargs` fields with a single atomic write. If `expected_version` is provided,
+    DBVersionConflictError is raised when the entry has been updated by another writer meanwhile.
+    """
+    db_workflow = await db_partial_update(
+        DBWorkflow, find_query={"workflow_id": find_workflow_id}, updatable_fields=_WORKFLOW_UPDATABLE_FIELDS,
+        set_fields=kwargs, expected_version=expected_version)
+    if not db_workflow:
+        raise RuntimeError(f"No DB workflow entry found for id: {find_workflow_id}")
     return db_workflow
 
 
 @call_sync
-async def sync_db_update_workflow(find_workflow_id: str, **kwargs) -> DBWorkflow:
-    return await db_update_workflow(find_workflow_id=find_workflow_id, **kwargs)
+async def sync_db_update_workflow(
+    find_workflow_id: str, expected_version: Optional[int] = None, **kwargs
+) -> DBWorkflow:
+    return await db_update_workflow(find_workflow_id=find_workflow_id, expected_version=expected_version, **kwargs)
@@ -1,7 +1,15 @@
 from datetime import datetime
+from typing import Dict, List, Optional
+from beanie import PydanticObjectId
 from operandi_utils import call_sync
 from operandi_utils.constants import StateJob
-from .models import DBWorkflowJob
+from .db_partial_update import db_partial_update
+from .models import DBWorkflowJob, DBWorkflowJobListEntry
+
+_WORKFLOW_JOB_UPDATABLE_FIELDS = [
+    "job_id", "job_dir", "job_state", "workflow_id", "workspace_id", "workflow_dir", "workspace_dir",
+    "hpc_slurm_job_id", "deleted", "details"
+]
 
 
 async def db_create_workflow_job(
@@ -30,6 +38,39 @@ async def sync_db_create_workflow_job(
     return await db_create_workflow_job(user_id, job_id, job_dir, job_state, workflow_id, workspace_id, details)
 
 
+async def db_create_workflow_jobs(
+    user_id: str, workflow_id: str, job_state: StateJob, jobs: List[Dict[str, str]]
+) -> List[DBWorkflowJob]:
+    """
+    Inserts the workflow jobs with a single query. Each entry of `jobs` contains
+    the `job_id`, `job_dir`, `workspace_id` and `details` of a workflow job.
+    """
+    created_at = datetime.now()
+    db_workflow_jobs = [
+        DBWorkflowJob(
+            user_id=user_id,
+            job_id=job["job_id"],
+            job_dir=job["job_dir"],
+            job_state=job_state,
+            workflow_id=workflow_id,
+            workspace_id=job["workspace_id"],
+            datetime=created_at,
+            details=job.get("details", "Workflow-Job")
+        )
+        for job in jobs
+    ]
+    if db_workflow_jobs:
+        await DBWorkflowJob.insert_many(db_workflow_jobs)
+    return db_workflow_jobs
+
+
+@call_sync
+async def sync_db_create_workflow_jobs(
+    user_id: str, workflow_id: str, job_state: StateJob, jobs: List[Dict[str, str]]
+) -> List[DBWorkflowJob]:
+    return await db_create_workflow_jobs(user_id, workflow_id, job_state, jobs)
+
+
 async def db_get_workflow_job(job_id: str) -> DBWorkflowJob:
     db_workflow_job = await DBWorkflowJob.find_one(DBWorkflowJob.job_id == job_id)
     if not db_workflow_job:
@@ -42,38 +83,88 @@ async def sync_db_get_workflow_job(job_id: str) -> DBWorkflowJob:
     return await db_get_workflow_job(job_id)
 
 
-async def db_update_workflow_job(find_job_id: str, **kwargs) -> DBWorkflowJob:
-    db_workflow_job = await db_get_workflow_job(job_id=find_job_id)
-    model_keys = list(db_workflow_job.__dict__.keys())
-    for key, value in kwargs.items():
-        if key not in model_keys:
-            raise ValueError(f"Field not available: {key}")
-        if key == "job_id":
-            db_workflow_job.job_id = value
-        elif key == "job_dir":
-            db_workflow_job.job_dir = value
-        elif key == "job_state":
-            db_workflow_job.job_state = value
-        elif key == "workflow_id":
-            db_workflow_job.workflow_id = value
-        elif key == "workspace_id":
-            db_workflow_job.workspace_id = value
-        elif key == "workflow_dir":
-            db_workflow_job.workflow_dir = value
-        elif key == "workspace_dir":
-            db_workflow_job.workspace_dir = value
-        elif key == "hpc_slurm_job_id":
-            db_workflow_job.hpc_slurm_job_id = value
-        elif key == "deleted":
-            db_workflow_job.deleted = value
-        elif key == "details":
-            db_workflow_job.details = value
-        else:
-            raise ValueError(f"Field not updatable: {key}")
-    await db_workflow_job.save()
+async def db_get_workflow_jobs(job_ids: List[str]) -> List[DBWorkflowJob]:
+    return await DBWorkflowJob.find({"job_id": {"$in": job_ids}}).to_list()
+
+
+@call_sync
+async def sync_db_get_workflow_jobs(job_ids: List[str]) -> List[DBWorkflowJob]:
+    return await db_get_workflow_jobs(job_ids)
+
+
+async def db_get_workflow_jobs_in_states(job_states: List[StateJob]) -> List[DBWorkflowJob]:
+    return await DBWorkflowJob.find({"job_state": {"$in": job_states}}).to_list()
+
+
+@call_sync
+async def sync_db_get_workflow_jobs_in_states(job_states: List[StateJob]) -> List[DBWorkflowJob]:
+    return await db_get_workflow_jobs_in_states(job_states)
+
+
+async def db_list_workflow_jobs(
+    job_ids: Optional[List[str]] = None, user_id: Optional[str] = None, job_state: Optional[StateJob] = None,
+    start_date: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 1000
+) -> List[DBWorkflowJobListEntry]:
+    """
+    Fetch a page of workflow job entries with a single query. Entries are sorted by their object id, the `cursor`
+    is the id of the last entry of the previous page. Raises ValueError if the cursor is not a valid object id.
+    """
+    query = {}
+    if job_ids is not None:
+        query["job_id"] = {"$in": job_ids}
+    if user_id:
+        query["user_id"] = user_id
+    if job_state:
+        query["job_state"] = job_state
+    if start_date:
+        query["datetime"] = {"$gte": start_date}
+    if cursor:
+        try:
+            query["_id"] = {"$gt": PydanticObjectId(cursor)}
+        except Exception as error:
+            raise ValueError(f"Invalid cursor: {cursor}") from error
+    return await DBWorkflowJob.find(
+        query, projection_model=DBWorkflowJobListEntry, sort="+_id", limit=limit).to_list()
+
+
+@call_sync
+async def sync_db_list_workflow_jobs(
+    job_ids: Optional[List[str]] = None, user_id: Optional[str] = None, job_state: Optional[StateJob] = None,
+    start_date: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 1000
+) -> List[DBWorkflowJobListEntry]:
+    return await db_list_workflow_jobs(job_ids, user_id, job_state, start_date, cursor, limit)
+
+
+async def db_update_workflow_jobs_state(job_ids: List[str], job_state: StateJob) -> int:
+    """
+    Sets the state of all workflow jobs in `job_ids` with a single write, returns the amount of updated entries
+    The versions of the entries are incremented, so writers holding a previous version fail their checked updates.
+    """
+    update_result = await DBWorkflowJob.find({"job_id": {"$in": job_ids}}).update_many(
+        {"$set": {"job_state": job_state}, "$inc": {"version": 1}})
+    return update_result.modified_count
+
+
+@call_sync
+async def sync_db_update_workflow_jobs_state(job_ids: List[str], job_state: StateJob) -> int:
+    return await db_update_workflow_jobs_state(job_ids, job_state)
+
+
+async def db_update_workflow_job(find_job_id: str, expected_version: Optional[int] = None, **kwargs) -> DBWorkflowJob:
+    """
+    Sets the `kwargs` fields with a single atomic write. If `expected_version` is provided,
+    DBVersionConflictError is raised when the entry has been updated by another writer meanwhile.
+    """
+    db_workflow_job = await db_partial_update(
+        DBWorkflowJob, find_query={"job_id": find_job_id}, updatable_fields=_WORKFLOW_JOB_UPDATABLE_FIELDS,
+        set_fields=kwargs, expected_version=expected_version)
+    if not db_workflow_job:
+        raise RuntimeError(f"No DB workflow job entry found for id: {find_job_id}")
     return db_workflow_job
 
 
 @call_sync
-async def sync_db_update_workflow_job(find_job_id: str, **kwargs) -> DBWorkflowJob:
-    return await db_update_workflow_job(find_job_id=find_job_id, **kwargs)
+async def sync_db_update_workflow_job(
+    find_job_id: str, expected_version: Optional[int] = None, **kwargs
+) -> DBWorkflowJob:
+    return await db_update_workflow_job(find_job_id=find_job_id, expected_version=expected_version, **kwargs)
@@ -1,9 +1,17 @@
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from os.path import join
+from beanie import PydanticObjectId
 from operandi_utils import call_sync
 from operandi_utils.constants import StateWorkspace
-from .models import DBWorkspace
+from .db_partial_update import db_partial_update
+from .models import DBWorkspace, DBWorkspaceListEntry
+
+_WORKSPACE_UPDATABLE_FIELDS = [
+    "workspace_id", "workspace_dir", "workspace_mets_path", "pages_amount", "file_groups", "state", "ocrd_identifier",
+    "bagit_profile_identifier", "ocrd_base_version_checksum", "mets_basename", "bag_info_adds", "deleted", "details",
+    "import_files_fetched", "import_files_total"
+]
 
 
 # TODO: This also updates to satisfy the PUT method in the Workspace Manager - fix this
@@ -16,8 +24,9 @@ async def db_create_workspace(
     mets_basename = default_mets_basename
     workspace_mets_path = join(workspace_dir, mets_basename)
     ocrd_base_version_checksum = None
-    ocrd_identifier = bag_info.pop("Ocrd-Identifier")
-    bagit_profile_identifier = bag_info.pop("BagIt-Profile-Identifier")
+    # Both are missing for workspaces which are still being imported
+    ocrd_identifier = bag_info.pop("Ocrd-Identifier", None)
+    bagit_profile_identifier = bag_info.pop("BagIt-Profile-Identifier", None)
     if "Ocrd-Mets" in bag_info:
         mets_basename = bag_info.pop("Ocrd-Mets")
         workspace_mets_path = join(workspace_dir, mets_basename)  # Replace it with the real path
@@ -50,6 +59,7 @@ async def db_create_workspace(
         db_workspace.mets_basename = mets_basename
         db_workspace.pages_amount = pages_amount
         db_workspace.file_groups = file_groups
+        db_workspace.state = state
         db_workspace.ocrd_identifier = ocrd_identifier
         db_workspace.bagit_profile_identifier = bagit_profile_identifier
         db_workspace.ocrd_base_version_checksum = ocrd_base_version_checksum
@@ -65,7 +75,7 @@ async def sync_db_create_workspace(
     state: StateWorkspace = StateWorkspace.UNSET, details: str = "Workspace"
 ) -> DBWorkspace:
     return await db_create_workspace(
-        user_id, workspace_id, workspace_dir, pages_amount, file_groups, bag_info, state, details)
+        user_id, workspace_id, workspace_dir, pages_amount, file_groups, bag_info, state, details=details)
 
 
 async def db_get_workspace(workspace_id: str) -> DBWorkspace:
@@ -80,44 +90,85 @@ async def sync_db_get_workspace(workspace_id: str) -> DBWorkspace:
     return await db_get_workspace(workspace_id)
 
 
-async def db_update_workspace(find_workspace_id: str, **kwargs) -> DBWorkspace:
-    db_workspace = await db_get_workspace(workspace_id=find_workspace_id)
-    model_keys = list(db_workspace.__dict__.keys())
-    for key, value in kwargs.items():
-        if key not in model_keys:
-            raise ValueError(f"Field not available: {key}")
-        if key == "workspace_id":
-            db_workspace.workspace_id = value
-        elif key == "workspace_dir":
-            db_workspace.workspace_dir = value
-        elif key == "workspace_mets_path":
-            db_workspace.workspace_mets_path = value
-        elif key == "pages_amount":
-            db_workspace.pages_amount = value
-        elif key == "file_groups":
-            db_workspace.file_groups = value
-        elif key == "state":
-            db_workspace.state = value
-        elif key == "ocrd_identifier":
-            db_workspace.ocrd_identifier = value
-        elif key == "bagit_profile_identifier":
-            db_workspace.bagit_profile_identifier = value
-        elif key == "ocrd_base_version_checksum":
-            db_workspace.ocrd_base_version_checksum = value
-        elif key == "mets_basename":
-            db_workspace.ocrd_mets = value
-        elif key == "bag_info_adds":
-            db_workspace.bag_info_adds = value
-        elif key == "deleted":
-            db_workspace.deleted = value
-        elif key == "details":
-            db_workspace.details = value
-        else:
-            raise ValueError(f"Field not updatable: {key}")
-    await db_workspace.save()
+async def db_get_workspaces(workspace_ids: List[str]) -> List[DBWorkspace]:
+    return await DBWorkspace.find({"workspace_id": {"$in": workspace_ids}}).to_list()
+
+
+@call_sync
+async def sync_db_get_workspaces(workspace_ids: List[str]) -> List[DBWorkspace]:
+    return await db_get_workspaces(workspace_ids)
+
+
+async def db_list_workspaces(
+    user_id: Optional[str] = None, state: Optional[StateWorkspace] = None, deleted: Optional[bool] = False,
+    start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, cursor: Optional[str] = None,
+    limit: int = 100
+) -> List[DBWorkspaceListEntry]:
+    """
+    Fetch a page of workspace entries with a single query. Entries are sorted by their object id, the `cursor`
+    is the id of the last entry of the previous page. Raises ValueError if the cursor is not a valid object id.
+    """
+    query = {}
+    if user_id:
+        query["user_id"] = user_id
+    if state:
+        query["state"] = state
+    if deleted is not None:
+        query["deleted"] = deleted
+    if start_date or end_date:
+        query["datetime"] = {}
+        if start_date:
+            query["datetime"]["$gte"] = start_date
+        if end_date:
+            query["datetime"]["$lte"] = end_date
+    if cursor:
+        try:
+            query["_id"] = {"$gt": PydanticObjectId(cursor)}
+        except Exception as error:
+            raise ValueError(f"Invalid cursor: {cursor}") from error
+    return await DBWorkspace.find(
+        query, projection_model=DBWorkspaceListEntry, sort="+_id", limit=limit).to_list()
+
+
+@call_sync
+async def sync_db_list_workspaces(
+    user_id: Optional[str] = None, state: Optional[StateWorkspace] = None, deleted: Optional[bool] = False,
+    start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, cursor: Optional[str] = None,
+    limit: int = 100
+) -> List[DBWorkspaceListEntry]:
+    return await db_list_workspaces(user_id, state, deleted, start_date, end_date, cursor, limit)
+
+
+async def db_update_workspaces_state(workspace_ids: List[str], state: StateWorkspace) -> int:
+    """
+    Sets the state of all workspaces in `workspace_ids` with a single write, returns the amount of updated entries
+    The versions of the entries are incremented, so writers holding a previous version fail their checked updates.
+    """
+    update_result = await DBWorkspace.find({"workspace_id": {"$in": workspace_ids}}).update_many(
+        {"$set": {"state": state}, "$inc": {"version": 1}})
+    return update_result.modified_count
+
+
+@call_sync
+async def sync_db_update_workspaces_state(workspace_ids: List[str], state: StateWorkspace) -> int:
+    return await db_update_workspaces_state(workspace_ids, state)
+
+
+async def db_update_workspace(find_workspace_id: str, expected_version: Optional[int] = None, **kwargs) -> DBWorkspace:
+    """
+    Sets the `kwargs` fields with a single atomic write. If `expected_version` is provided,
+    DBVersionConflictError is raised when the entry has been updated by another writer meanwhile.
+    """
+    db_workspace = await db_partial_update(
+        DBWorkspace, find_query={"workspace_id": find_workspace_id}, updatable_fields=_WORKSPACE_UPDATABLE_FIELDS,
+        set_fields=kwargs, expected_version=expected_version)
+    if not db_workspace:
+        raise RuntimeError(f"No DB workspace entry found for id: {find_workspace_id}")
     return db_workspace
 
 
 @call_sync
-async def sync_db_update_workspace(find_workspace_id: str, **kwargs) -> DBWorkspace:
-    return await db_update_workspace(find_workspace_id=find_workspace_id, **kwargs)
+async def sync_db_update_workspace(
+    find_workspace_id: str, expected_version: Optional[int] = None, **kwargs
+) -> DBWorkspace:
+    return await db_update_workspace(find_workspace_id=find_workspace_id, expected_version=expected_version, **kwargs)
@@ -1,6 +1,8 @@
 from typing import List, Optional
-from beanie import Document
+from beanie import Document, PydanticObjectId
 from datetime import datetime
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 from operandi_utils.constants import AccountType, StateJob, StateJobSlurm, StateWorkspace
 
 
@@ -19,6 +21,7 @@ class DBUserAccount(Document):
         deleted:        Whether the entry has been deleted locally from the server
         datetime        Shows the created date time of the entry
         details         Extra user specified details about this entry
+        version         Incremented by each partial update, used for optimistic concurrency checks
 
     By default, the registered user's account is not validated.
     An admin must manually validate the account by assigning True value.
@@ -33,6 +36,7 @@ class DBUserAccount(Document):
     deleted: bool = False
     datetime = datetime.now()
     details: Optional[str]
+    version: int = 0
 
     class Settings:
         name = "user_accounts"
@@ -50,6 +54,7 @@ class DBProcessingStatistics(Document):
         pages_failed:       Total amount of failed pages
         pages_downloaded:   Total amount of pages downloaded as a workspace from the server
         pages_cancel:       Total amount of cancelled pages
+        version:            Incremented by each partial update, used for optimistic concurrency checks
     """
     institution_id: str
     user_id: str
@@ -59,10 +64,30 @@ class DBProcessingStatistics(Document):
     pages_failed: int = 0
     pages_downloaded: int = 0
     pages_cancel: int = 0
+    version: int = 0
 
     class Settings:
         name = "processing_statistics"
 
+class DBServerLock(Document):
+    """
+    Model to store a lock shared by the processes of the Operandi Server in the database
+
+    Attributes:
+        lock_name:      Unique name of the lock
+        owner_id:       Unique id of the process holding the lock
+        expires_at:     The lock is free after that date time (UTC) unless renewed by the owner
+    """
+    lock_name: str
+    owner_id: str
+    expires_at: datetime
+
+    class Settings:
+        name = "server_locks"
+        indexes = [
+            IndexModel([("lock_name", ASCENDING)], unique=True)
+        ]
+
 class DBHPCSlurmJob(Document):
     """
     Model to store an HPC slurm job in the MongoDB
@@ -77,6 +102,7 @@ class DBHPCSlurmJob(Document):
         deleted                     Whether the entry has been deleted locally from the server
         datetime                    Shows the created date time of the entry
         details                     Extra user specified details about this entry
+        version                     Incremented by each partial update, used for optimistic concurrency checks
     """
     user_id: str
     workflow_job_id: str
@@ -87,9 +113,14 @@ class DBHPCSlurmJob(Document):
     deleted: bool = False
     datetime = datetime.now()
     details: Optional[str]
+    version: int = 0
 
     class Settings:
         name = "hpc_slurm_jobs"
+        # Not unique, a redelivered workflow job message submits another slurm job for the same workflow job
+        indexes = [
+            IndexModel([("workflow_job_id", ASCENDING)])
+        ]
 
 class DBWorkflow(Document):
     """
@@ -101,23 +132,54 @@ class DBWorkflow(Document):
         workflow_dir            Workflow directory full path on the server
         workflow_script_base    The name of the nextflow script file
         workflow_script_path    Nextflow workflow file full path on the server
+        workflow_script_hash    The sha256 of the nextflow script content, set for the production workflows
+        workflow_script_version Incremented each time a changed production workflow script is registered
         uses_mets_server        Whether the NF script forwards requests to a workspace mets server
         deleted                 Whether the entry has been deleted locally from the server
         datetime                Shows the created date time of the entry
         details                 Extra user specified details about this entry
+        version                 Incremented by each partial update, used for optimistic concurrency checks
     """
     user_id: str
     workflow_id: str
     workflow_dir: str
     workflow_script_base: str
     workflow_script_path: str
+    workflow_script_hash: Optional[str]
+    workflow_script_version: int = 0
     uses_mets_server: bool
     deleted: bool = False
     datetime = datetime.now()
     details: Optional[str]
+    version: int = 0
 
     class Settings:
         name = "workflows"
+        # The listings filter by user and page through the entries sorted by object id, as do the ones of jobs and
+        # workspaces. The unique indexes of the id fields are created separately, see `db_create_unique_indexes`
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)])
+        ]
+
+
+class DBWorkflowListEntry(BaseModel):
+    """
+    Projection of the `DBWorkflow` fields required for listing workflows.
+
+    Attributes:
+        id                      The database object id of the entry, used as a pagination cursor
+        user_id                 Unique id of the user who created the entry
+        workflow_id             Unique id of the workflow
+        deleted                 Whether the entry has been deleted locally from the server
+        datetime                Shows the created date time of the entry
+        details                 Extra user specified details about this entry
+    """
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: str
+    workflow_id: str
+    deleted: bool = False
+    datetime: datetime
+    details: Optional[str]
 
 
 class DBWorkflowJob(Document):
@@ -137,6 +199,7 @@ class DBWorkflowJob(Document):
         deleted             Whether the entry has been deleted locally from the server
         datetime            Shows the created date time of the entry
         details             Extra user specified details about this entry
+        version             Incremented by each partial update, used for optimistic concurrency checks
     """
     user_id: str
     job_id: str
@@ -150,9 +213,36 @@ class DBWorkflowJob(Document):
     deleted: bool = False
     datetime = datetime.now()
     details: Optional[str]
+    version: int = 0
 
     class Settings:
         name = "workflow_jobs"
+        indexes = [
+            IndexModel([("job_state", ASCENDING)]),
+            IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)])
+        ]
+
+
+class DBWorkflowJobListEntry(BaseModel):
+    """
+    Projection of the `DBWorkflowJob` fields required for querying the states of workflow jobs.
+
+    Attributes:
+        id                  The database object id of the entry, used as a pagination cursor
+        user_id             Unique id of the user who created the entry
+        job_id              Unique id of the workflow job
+        workflow_id         Unique id of the workflow used by the workflow job
+        workspace_id        Unique id of the workspace used by the workflow job
+        job_state           The state of the workflow job inside the server
+        datetime            Shows the created date time of the entry
+    """
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: str
+    job_id: str
+    workflow_id: str
+    workspace_id: str
+    job_state: StateJob = StateJob.UNSET
+    datetime: datetime
 
 
 class DBWorkspace(Document):
@@ -177,6 +267,9 @@ class DBWorkspace(Document):
         deleted                     Whether the entry has been deleted locally from the server
         datetime                    Shows the created date time of the entry
         details                     Extra user specified details about this entry
+        import_files_fetched        The amount of the already downloaded files of a workspace being imported
+        import_files_total          The total amount of files to be downloaded for a workspace being imported
+        version                     Incremented by each partial update, used for optimistic concurrency checks
     """
     user_id: str
     workspace_id: str
@@ -193,6 +286,52 @@ class DBWorkspace(Document):
     deleted: bool = False
     datetime = datetime.now()
     details: Optional[str]
+    import_files_fetched: Optional[int]
+    import_files_total: Optional[int]
+    version: int = 0
 
     class Settings:
         name = "workspaces"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)])
+        ]
+
+
+class DBWorkspaceListEntry(BaseModel):
+    """
+    Projection of the `DBWorkspace` fields required for listing workspaces.
+
+    Attributes:
+        id                          The database object id of the entry, used as a pagination cursor
+        user_id                     Unique id of the user who created the entry
+        workspace_id                Unique id of the workspace
+        pages_amount                The amount of the physical pages, used for creating page ranges
+        file_groups                 The list of available file groups
+        state                       Whether the workspace is currently being processed or not
+        ocrd_identifier             Ocrd-Identifier (mandatory)
+        bagit_profile_identifier    BagIt-Profile-Identifier (mandatory)
+        ocrd_base_version_checksum  Ocrd-Base-Version-Checksum (mandatory)
+        mets_basename               Alternative name to the default "mets.xml"
+        bag_info_adds               Bag-info.txt can also contain additional key-value-pairs which are saved here
+        deleted                     Whether the entry has been deleted locally from the server
+        datetime                    Shows the created date time of the entry
+        details                     Extra user specified details about this entry
+        import_files_fetched        The amount of the already downloaded files of a workspace being imported
+        import_files_total          The total amount of files to be downloaded for a workspace being imported
+    """
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: str
+    workspace_id: str
+    pages_amount: int
+    file_groups: List[str]
+    state: StateWorkspace = StateWorkspace.UNSET
+    ocrd_identifier: Optional[str]
+    bagit_profile_identifier: Optional[str]
+    ocrd_base_version_checksum: Optional[str]
+    mets_basename: Optional[str]
+    bag_info_adds: Optional[dict]
+    deleted: bool = False
+    datetime: datetime
+    details: Optional[str]
+    import_files_fetched: Optional[int]
+    import_files_total: Optional[int]
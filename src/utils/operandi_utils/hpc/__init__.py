@@ -1,5 +1,16 @@
-__all__ = ["NHRConnector", "NHRExecutor", "NHRTransfer"]
+__all__ = [
+    "get_ssh_session_manager",
+    "NHRAsyncClient",
+    "NHRConnector",
+    "NHRExecutor",
+    "NHRTransfer",
+    "SSHConnectionPool",
+    "SSHSessionManager"
+]
 
+from operandi_utils.hpc.nhr_async_client import NHRAsyncClient
 from operandi_utils.hpc.nhr_connector import NHRConnector
 from operandi_utils.hpc.nhr_executor import NHRExecutor
 from operandi_utils.hpc.nhr_transfer import NHRTransfer
+from operandi_utils.hpc.ssh_connection_pool import SSHConnectionPool
+from operandi_utils.hpc.ssh_session_manager import get_ssh_session_manager, SSHSessionManager
@@ -16,6 +16,7 @@ set -e
 # $10 - Amount of pages in the workspace
 # $11 - Boolean flag showing whether a mets server is utilized or not
 # $12 - File groups to be removed from the workspace after the processing
+# $13 - Boolean flag showing whether the results are streamed back instead of being zipped
 
 SIF_PATH="/mnt/lustre-emmy-hdd/projects/project_pwieder_ocr_nhr/ocrd_all_maximum_image.sif"
 SIF_PATH_IN_NODE="${TMP_LOCAL}/ocrd_all_maximum_image.sif"
@@ -36,6 +37,7 @@ FORKS=$9
 PAGES=${10}
 USE_METS_SERVER=${11}
 FILE_GROUPS_TO_REMOVE=${12}
+STREAM_RESULTS=${13}
 
 WORKFLOW_JOB_DIR="${SCRATCH_BASE}/${WORKFLOW_JOB_ID}"
 NF_SCRIPT_PATH="${WORKFLOW_JOB_DIR}/${NEXTFLOW_SCRIPT_ID}"
@@ -122,6 +124,13 @@ transfer_requirements_to_node_storage() {
 }
 
 unzip_workflow_job_dir() {
+  if [ ! -f "${WORKFLOW_JOB_DIR}.zip" ] && [ -d "${WORKFLOW_JOB_DIR}" ]; then
+    # The slurm workspace was streamed and extracted during the transfer
+    echo "Using the already extracted slurm workspace dir: ${WORKFLOW_JOB_DIR}"
+    cd "${WORKFLOW_JOB_DIR}" || exit 1
+    return
+  fi
+
   if [ ! -f "${WORKFLOW_JOB_DIR}.zip" ]; then
     echo "Required scratch slurm workspace zip is not available: ${WORKFLOW_JOB_DIR}.zip"
     exit 1
@@ -253,9 +262,17 @@ remove_file_groups_from_workspace() {
   fi
 }
 
-zip_results() {
+remove_symlinks() {
   # Delete symlinks created for the Nextflow workers
   find "${WORKFLOW_JOB_DIR}" -type l -delete
+}
+
+zip_results() {
+  if [ "$1" == "true" ] ; then
+    # The results are streamed back as tar archives, zips of them would only be extra copies on the scratch
+    echo "Skipping the zipping of results since they are streamed"
+    return
+  fi
   # Create a zip of the ocrd workspace dir
   cd "${WORKSPACE_DIR}" && zip -r "${WORKSPACE_ID}.zip" "." -x "*.sock" > "workspace_zipping.log"
   # Create a zip of the Nextflow run results by excluding the ocrd workspace dir
@@ -276,5 +293,6 @@ start_mets_server "$USE_METS_SERVER"
 execute_nextflow_workflow "$USE_METS_SERVER"
 stop_mets_server "$USE_METS_SERVER"
 remove_file_groups_from_workspace "$FILE_GROUPS_TO_REMOVE"
-zip_results
+remove_symlinks
+zip_results "$STREAM_RESULTS"
 clear_data_from_computing_node
@@ -1,4 +1,4 @@
-from paramiko import SFTPClient, SSHClient, Transport
+from paramiko import SFTPClient, SSHClient, SSHException, Transport
 
 
 def is_sftp_conn_responsive(logger, sftp_client: SFTPClient) -> bool:
@@ -32,6 +32,6 @@ def is_transport_responsive(logger, transport: Transport) -> bool:
         # Nevertheless this still returns false-positives...!!!
         # https://github.com/paramiko/paramiko/issues/2026
         return True
-    except EOFError as error:
-        logger.error(f"is_transport_responsive EOFError: {error}")
+    except (EOFError, OSError, SSHException) as error:
+        logger.error(f"is_transport_responsive {error.__class__.__name__}: {error}")
         return False
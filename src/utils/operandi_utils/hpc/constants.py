@@ -1,4 +1,5 @@
 __all__ = [
+    "HPC_ASYNC_MAX_OPERATIONS_PER_HOST",
     "HPC_BATCH_SUBMIT_WORKFLOW_JOB",
     "HPC_DIR_BATCH_SCRIPTS",
     "HPC_DIR_SLURM_WORKSPACES",
@@ -10,7 +11,17 @@ __all__ = [
     "HPC_JOB_QOS_LONG",
     "HPC_JOB_QOS_SHORT",
     "HPC_JOB_QOS_VERY_LONG",
+    "HPC_SSH_COMMAND_POLL_INTERVAL",
+    "HPC_SSH_CONNECT_TIMEOUT",
     "HPC_SSH_CONNECTION_TRY_TIMES",
+    "HPC_SSH_KEEPALIVE_INTERVAL",
+    "HPC_SSH_MAX_SESSIONS",
+    "HPC_SSH_PROBE_INTERVAL",
+    "HPC_SSH_RECONNECT_MAX_WAIT",
+    "HPC_SSH_RECONNECT_WAIT",
+    "HPC_SSH_RECV_BUFFER_SIZE",
+    "HPC_TRANSFER_STREAM_COMPRESSION",
+    "HPC_TRANSFER_STREAMING",
     "HPC_NHR_PROJECT",
     "HPC_NHR_CLUSTERS",
     "HPC_WRAPPER_SUBMIT_WORKFLOW_JOB",
@@ -63,7 +74,8 @@ HPC_DIR_SLURM_WORKSPACES = "slurm_workspaces"
 # TODO: Fix the constant file name - it should be automatically resolved
 HPC_BATCH_SUBMIT_WORKFLOW_JOB = f"{HPC_NHR_SCRATCH_EMMY_HDD}/{HPC_DIR_BATCH_SCRIPTS}/batch_submit_workflow_job.sh"
 HPC_WRAPPER_SUBMIT_WORKFLOW_JOB = f"{HPC_NHR_SCRATCH_EMMY_HDD}/{HPC_DIR_BATCH_SCRIPTS}/wrapper_submit_workflow_job.sh"
-HPC_WRAPPER_CHECK_WORKFLOW_JOB_STATUS = f"{HPC_NHR_SCRATCH_EMMY_HDD}/{HPC_DIR_BATCH_SCRIPTS}/wrapper_check_workflow_job_status.sh"
+HPC_WRAPPER_CHECK_WORKFLOW_JOB_STATUS = (
+    f"{HPC_NHR_SCRATCH_EMMY_HDD}/{HPC_DIR_BATCH_SCRIPTS}/wrapper_check_workflow_job_status.sh")
 
 HPC_JOB_DEADLINE_TIME_REGULAR = "48:00:00"
 HPC_JOB_DEADLINE_TIME_TEST = "0:30:00"
@@ -76,3 +88,26 @@ HPC_JOB_QOS_DEFAULT = "48h"  # The default deadline for non-specified QOS is 48h
 HPC_JOB_QOS_LONG = "7d"
 HPC_JOB_QOS_VERY_LONG = "14d"
 HPC_SSH_CONNECTION_TRY_TIMES = 30
+# Seconds to wait for the TCP connection, the key exchange and the authentication of a new SSH connection
+HPC_SSH_CONNECT_TIMEOUT: float = 30
+# Seconds between two keepalive packets sent over an idle SSH transport
+HPC_SSH_KEEPALIVE_INTERVAL: int = 30
+# Maximal amount of sessions opened concurrently over a single SSH transport, OpenSSH allows 10 by default
+HPC_SSH_MAX_SESSIONS: int = 8
+# An SSH transport idle for longer than that (in seconds) is probed with `send_ignore` before being reused
+HPC_SSH_PROBE_INTERVAL: float = 10
+# Seconds to wait before the first reconnection try, doubled with each failed try up to the max wait
+HPC_SSH_RECONNECT_WAIT: float = 1
+HPC_SSH_RECONNECT_MAX_WAIT: float = 30
+# Upper bound of the seconds a running command waits for its output before checking for a timeout or a cancellation
+HPC_SSH_COMMAND_POLL_INTERVAL: float = 0.5
+# Maximal amount of bytes read from an output stream of a command at once
+HPC_SSH_RECV_BUFFER_SIZE: int = 32768
+# Maximal amount of HPC operations of an asyncio client running concurrently against a single host,
+# operations beyond that stay in flight and wait for a free slot
+HPC_ASYNC_MAX_OPERATIONS_PER_HOST: int = HPC_SSH_MAX_SESSIONS
+# Stream the slurm workspaces as tar archives over exec channels instead of packing local zip copies and uploading
+# them over SFTP, the results are fetched back as tar streams as well
+HPC_TRANSFER_STREAMING: bool = True
+# Whether the tar streams are gzip compressed, mostly not worth it since the workspace images are compressed anyway
+HPC_TRANSFER_STREAM_COMPRESSION: bool = False
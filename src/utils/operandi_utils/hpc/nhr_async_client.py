@@ -0,0 +1,93 @@
+from asyncio import AbstractEventLoop, get_running_loop, Semaphore, sleep
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from weakref import WeakKeyDictionary
+
+from .constants import HPC_ASYNC_MAX_OPERATIONS_PER_HOST
+from .nhr_executor import NHRExecutor
+from .nhr_transfer import NHRTransfer
+
+# Keys: event loops, values: the semaphores limiting the concurrent operations per host within that loop
+_host_semaphores: "WeakKeyDictionary[AbstractEventLoop, Dict[str, Semaphore]]" = WeakKeyDictionary()
+
+
+def _host_semaphore(host: str, max_operations: int) -> Semaphore:
+    loop_semaphores = _host_semaphores.setdefault(get_running_loop(), {})
+    if host not in loop_semaphores:
+        loop_semaphores[host] = Semaphore(max_operations)
+    return loop_semaphores[host]
+
+
+class NHRAsyncClient:
+    """
+    Awaitable HPC operations of NHRExecutor and NHRTransfer for asyncio code.
+
+    This is not a native asyncio SSH client, the blocking paramiko operations are offloaded to a pool of
+    `max_operations` worker threads, so awaiting them does not block the event loop. The operations run over
+    the SSH transport shared by the process, commands in their own exec channels and transfers in their own
+    SFTP channels. At most `max_operations` operations per host run at once, across all clients of the event
+    loop, further operations wait for a free slot. Use `connect` to create a client from a coroutine, since
+    opening the SSH connection blocks. Cancelling an awaiting operation does not interrupt the part that
+    already runs in a worker thread.
+    """
+    def __init__(
+        self, executor: NHRExecutor, transfer: NHRTransfer, max_operations: int = HPC_ASYNC_MAX_OPERATIONS_PER_HOST
+    ) -> None:
+        self.executor = executor
+        self.transfer = transfer
+        self.host = self.executor.session_manager.connection_pool.host
+        self.max_operations = max_operations
+        self._thread_pool = ThreadPoolExecutor(
+            max_workers=max_operations, thread_name_prefix=f"{self.__class__.__name__}[{self.host}]")
+
+    @classmethod
+    async def connect(cls, max_operations: int = HPC_ASYNC_MAX_OPERATIONS_PER_HOST) -> "NHRAsyncClient":
+        """
+        Creates a client, the SSH connection of the process is opened in a worker thread if not open yet
+        """
+        loop = get_running_loop()
+        executor = await loop.run_in_executor(None, NHRExecutor)
+        transfer = await loop.run_in_executor(None, NHRTransfer)
+        return cls(executor=executor, transfer=transfer, max_operations=max_operations)
+
+    async def trigger_slurm_job(self, **kwargs: Any) -> str:
+        """
+        Accepts the same arguments as `NHRExecutor.trigger_slurm_job` and returns the slurm job id
+        """
+        return await self._run(partial(self.executor.trigger_slurm_job, **kwargs))
+
+    async def check_slurm_job_state(self, slurm_job_id: str, tries: int = 10, wait_time: int = 2) -> Optional[str]:
+        # The waits between the tries do not hold a slot of the host
+        for try_number in range(tries):
+            slurm_job_state = await self._run(
+                partial(self.executor.check_slurm_job_state, slurm_job_id=slurm_job_id, tries=1, wait_time=0))
+            if slurm_job_state or try_number == tries - 1:
+                return slurm_job_state
+            await sleep(wait_time)
+        return None
+
+    async def put_file(self, local_src: Path, remote_dst: Path) -> None:
+        await self._run(partial(self._transfer_in_own_session, self.transfer.put_file, local_src, remote_dst))
+
+    async def get_file(self, remote_src: Path, local_dst: Path) -> None:
+        await self._run(partial(self._transfer_in_own_session, self.transfer.get_file, remote_src, local_dst))
+
+    async def put_dir(self, local_src: Path, remote_dst: Path) -> None:
+        await self._run(partial(self._transfer_in_own_session, self.transfer.put_dir, local_src, remote_dst))
+
+    async def get_dir(self, remote_src: Path, local_dst: Path) -> None:
+        await self._run(partial(self._transfer_in_own_session, self.transfer.get_dir, remote_src, local_dst))
+
+    def close(self) -> None:
+        self._thread_pool.shutdown(wait=True)
+
+    async def _run(self, operation: Callable[[], Any]) -> Any:
+        async with _host_semaphore(self.host, self.max_operations):
+            return await get_running_loop().run_in_executor(self._thread_pool, operation)
+
+    def _transfer_in_own_session(self, transfer_method: Callable[..., None], src: Path, dst: Path) -> None:
+        # The shared SFTP client of the process must not be used by concurrent threads
+        with self.transfer.session_manager.sftp_session() as sftp_client:
+            transfer_method(src, dst, sftp_client=sftp_client)
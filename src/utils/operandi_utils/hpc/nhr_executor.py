@@ -1,11 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
 from pathlib import Path
-from time import sleep
+from select import select
+from threading import Event
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Tuple
 
 from operandi_utils.constants import StateJobSlurm
 from .constants import (
     HPC_JOB_DEADLINE_TIME_TEST, HPC_JOB_QOS_DEFAULT, HPC_NHR_JOB_DEFAULT_PARTITION, HPC_BATCH_SUBMIT_WORKFLOW_JOB,
-    HPC_WRAPPER_SUBMIT_WORKFLOW_JOB, HPC_WRAPPER_CHECK_WORKFLOW_JOB_STATUS
+    HPC_WRAPPER_SUBMIT_WORKFLOW_JOB, HPC_WRAPPER_CHECK_WORKFLOW_JOB_STATUS, HPC_SSH_COMMAND_POLL_INTERVAL,
+    HPC_SSH_MAX_SESSIONS, HPC_SSH_RECV_BUFFER_SIZE, HPC_TRANSFER_STREAMING
 )
 from .nhr_connector import NHRConnector
 
@@ -13,30 +18,83 @@ class NHRExecutor(NHRConnector):
     def __init__(self) -> None:
         logger = getLogger(name=self.__class__.__name__)
         super().__init__(logger)
-        _ = self.ssh_client  # forces a connection
+        _ = self.transport  # forces a connection
 
     # Execute blocking commands and wait for an output and return code
-    def execute_blocking(self, command, timeout=None, environment=None):
-        stdin, stdout, stderr = self.ssh_client.exec_command(
-            command=command, timeout=timeout, environment=environment)
-
-        # TODO: Not satisfied with this but fast conversion from
-        #  SSHLibrary to Paramiko is needed for testing
-        while not stdout.channel.exit_status_ready():
-            sleep(1)
-            continue
-
-        output = stdout.readlines()
-        err = stderr.readlines()
-        return_code = stdout.channel.recv_exit_status()
+    def execute_blocking(
+        self, command: str, timeout: Optional[float] = None, environment: Optional[Dict[str, str]] = None,
+        cancel_event: Optional[Event] = None
+    ) -> Tuple[List[str], List[str], int]:
+        """
+        Runs the command in its own channel and returns its stdout lines, stderr lines and exit status.
+
+        Both output streams are read as soon as data arrives, so commands with a large output do not stall
+        on a full channel window, and the call returns as soon as the command exits. Raises TimeoutError if
+        the command is not done within `timeout` seconds and InterruptedError once `cancel_event` is set.
+        The channel of the command is closed in both cases. Commands of different threads run concurrently.
+        """
+        deadline = monotonic() + timeout if timeout is not None else None
+        stdout, stderr = bytearray(), bytearray()
+        with self.session_manager.exec_channel() as channel:
+            if environment:
+                channel.update_environment(environment)
+            channel.exec_command(command)
+            channel.shutdown_write()
+            while True:
+                eof_received = channel.eof_received
+                while channel.recv_ready():
+                    stdout += channel.recv(HPC_SSH_RECV_BUFFER_SIZE)
+                while channel.recv_stderr_ready():
+                    stderr += channel.recv_stderr(HPC_SSH_RECV_BUFFER_SIZE)
+                if eof_received and channel.exit_status_ready():
+                    break
+                wait_time = self._command_wait_time(command, deadline, cancel_event)
+                if eof_received:
+                    # Both streams are drained, only the exit status is still to be received
+                    channel.status_event.wait(wait_time)
+                else:
+                    # The channel becomes readable once any of the streams has data or is closed
+                    select([channel], [], [], wait_time)
+            return_code = channel.recv_exit_status()
+        output = stdout.decode(encoding="utf-8", errors="replace").splitlines(keepends=True)
+        err = stderr.decode(encoding="utf-8", errors="replace").splitlines(keepends=True)
         return output, err, return_code
 
+    def execute_concurrently(
+        self, commands: List[str], timeout: Optional[float] = None, cancel_event: Optional[Event] = None
+    ) -> List[Tuple[List[str], List[str], int]]:
+        """
+        Runs the commands concurrently over the shared transport and returns their results in the same order
+        """
+        with ThreadPoolExecutor(max_workers=max(min(len(commands), HPC_SSH_MAX_SESSIONS), 1)) as executor:
+            futures = [
+                executor.submit(self.execute_blocking, command, timeout=timeout, cancel_event=cancel_event)
+                for command in commands
+            ]
+            return [future.result() for future in futures]
+
+    @staticmethod
+    def _command_wait_time(command: str, deadline: Optional[float], cancel_event: Optional[Event]) -> float:
+        if cancel_event and cancel_event.is_set():
+            raise InterruptedError(f"Cancelled the command: {command}")
+        if deadline is None:
+            return HPC_SSH_COMMAND_POLL_INTERVAL
+        remaining_time = deadline - monotonic()
+        if remaining_time <= 0:
+            raise TimeoutError(f"The command did not finish in time: {command}")
+        return min(remaining_time, HPC_SSH_COMMAND_POLL_INTERVAL)
+
     def trigger_slurm_job(
         self, workflow_job_id: str, nextflow_script_path: Path, input_file_grp: str,
         workspace_id: str, mets_basename: str, nf_process_forks: int, ws_pages_amount: int, use_mets_server: bool,
         file_groups_to_remove: str, cpus: int = 2, ram: int = 8, job_deadline_time: str = HPC_JOB_DEADLINE_TIME_TEST,
-        partition: str = HPC_NHR_JOB_DEFAULT_PARTITION, qos: str = HPC_JOB_QOS_DEFAULT
+        partition: str = HPC_NHR_JOB_DEFAULT_PARTITION, qos: str = HPC_JOB_QOS_DEFAULT,
+        stream_results: bool = HPC_TRANSFER_STREAMING
     ) -> str:
+        """
+        Submits the workflow job and returns the slurm job id. If `stream_results` is set, the results are
+        not zipped in the HPC since they are fetched as tar streams, see `NHRTransfer.stream_and_unpack_slurm_workspace`
+        """
         if ws_pages_amount < nf_process_forks:
             self.logger.warning(
                 "The amount of workspace pages is less than the amount of requested Nextflow process forks. "
@@ -46,6 +104,7 @@ class NHRExecutor(NHRConnector):
 
         nextflow_script_id = nextflow_script_path.name
         use_mets_server_bash_flag = "true" if use_mets_server else "false"
+        stream_results_bash_flag = "true" if stream_results else "false"
 
         command = f"{HPC_WRAPPER_SUBMIT_WORKFLOW_JOB}"
 
@@ -71,6 +130,7 @@ class NHRExecutor(NHRConnector):
         command += f" {ws_pages_amount}"
         command += f" {use_mets_server_bash_flag}"
         command += f" {file_groups_to_remove}"
+        command += f" {stream_results_bash_flag}"
 
         self.logger.info(f"About to execute a force command: {command}")
         output, err, return_code = self.execute_blocking(command)
@@ -92,11 +152,11 @@ class NHRExecutor(NHRConnector):
             self.logger.info(f"Command output: {output}")
             self.logger.info(f"Command err: {err}")
             self.logger.info(f"Command return code: {return_code}")
-            if output:
-                if len(output) < 3:
-                    self.logger.warning("The output has returned with less than 3 lines. "
-                                        "The job has not been listed yet.")
-                    continue
+            # Each try without a listed job waits, the command itself returns right after the job state query
+            if output and len(output) < 3:
+                self.logger.warning("The output has returned with less than 3 lines. "
+                                    "The job has not been listed yet.")
+            elif output:
                 # Split the last line and get the second element,
                 # i.e., the state element in the requested output format
                 slurm_job_state = output[-2].split()[1]
@@ -104,7 +164,6 @@ class NHRExecutor(NHRConnector):
                 if slurm_job_state.startswith('---'):
                     self.logger.warning("The output is dashes. The job has not been listed yet.")
                     slurm_job_state = None
-                    continue
             if slurm_job_state:
                 break
             tries -= 1
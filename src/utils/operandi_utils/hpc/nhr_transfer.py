@@ -2,52 +2,46 @@ from logging import getLogger
 from os import listdir, makedirs, symlink
 from os.path import isdir, split
 from pathlib import Path
+from shlex import quote
 from shutil import rmtree, copytree
 from stat import S_ISDIR
+import tarfile
 from tempfile import mkdtemp
 from time import sleep
-from typing import Tuple
+from typing import List, Optional, Tuple
+
+from paramiko import Channel, SFTPClient
 
 from operandi_utils import make_zip_archive, unpack_zip_archive
+from .constants import HPC_TRANSFER_STREAM_COMPRESSION
 from .nhr_connector import NHRConnector
 
+# Extracted members must stay inside the destination, where the `data` filter of tarfile is available
+TAR_EXTRACT_OPTIONS = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+
+
+class _ChannelWriter:
+    """
+    The minimal file object interface over which tarfile writes a stream into the stdin of a remote command
+    """
+    def __init__(self, channel: Channel) -> None:
+        self.channel = channel
+
+    def write(self, data: bytes) -> int:
+        self.channel.sendall(data)
+        return len(data)
+
+
 class NHRTransfer(NHRConnector):
     def __init__(self) -> None:
         logger = getLogger(name=self.__class__.__name__)
         super().__init__(logger)
         self._operandi_data_root = ""
-        self._sftp_client = None
-        self._sftp_reconnect_tries = 5
-        self._sftp_reconnect_tries_remaining = self._sftp_reconnect_tries
         _ = self.sftp_client  # forces a connection
 
     @property
-    def sftp_client(self):
-        if self._sftp_client:
-            self._sftp_client.close()
-            self._ssh_client = None
-        self._sftp_client = self.ssh_client.open_sftp()
-        # self._sftp_client.get_channel().get_transport().set_keepalive(30)
-
-        """
-        try:
-            # Note: This extra check is required against aggressive
-            # Firewalls that ignore the keepalive option!
-            self._sftp_client.get_channel().get_transport().send_ignore()
-            self._sftp_reconnect_tries_remaining = self._sftp_reconnect_tries
-        except Exception as error:
-            self.logger.warning(f"SFTP client failed to send ignore, connection is broken: {error}")
-            if self._sftp_client:
-                self._sftp_client.close()
-                self._sftp_client = None
-            if self._sftp_reconnect_tries_remaining < 0:
-                raise Exception(f"Failed to reconnect {self._sftp_reconnect_tries} times: {error}")
-            self.logger.info(f"Reconnecting the SFTP client, try times: {self._sftp_reconnect_tries_remaining}")
-            self._sftp_reconnect_tries_remaining -= 1
-            return self.sftp_client  # recursive call to itself to try again
-        return self._sftp_client
-        """
-        return self._sftp_client
+    def sftp_client(self) -> SFTPClient:
+        return self.session_manager.sftp_client
 
     def create_slurm_workspace_zip(
         self, ocrd_workspace_dir: Path, workflow_job_id: str, nextflow_script_path: Path,
@@ -88,7 +82,7 @@ class NHRTransfer(NHRConnector):
     def put_slurm_workspace(self, local_src_slurm_zip: Path, workflow_job_id: str) -> Path:
         self.logger.info(f"Workflow job id to be used: {workflow_job_id}")
         hpc_dst_slurm_zip = Path(self.slurm_workspaces_dir, f"{workflow_job_id}.zip")
-        _ = self.sftp_client  # Force reconnect of the SFTP Client
+        _ = self.sftp_client  # Reconnects the SFTP client if the connection is broken
         self.put_file(local_src=local_src_slurm_zip, remote_dst=hpc_dst_slurm_zip)
         self.logger.info(f"Put file from local src: {local_src_slurm_zip}, to remote dst: {hpc_dst_slurm_zip}")
         self.logger.info(f"Leaving put_slurm_workspace, returning: {hpc_dst_slurm_zip}")
@@ -115,6 +109,41 @@ class NHRTransfer(NHRConnector):
         Path(local_src_slurm_zip).unlink(missing_ok=True)
         return local_src_slurm_zip, hpc_dst
 
+    def stream_slurm_workspace(
+        self, ocrd_workspace_dir: Path, workflow_job_id: str, nextflow_script_path: Path,
+        compress: bool = HPC_TRANSFER_STREAM_COMPRESSION
+    ) -> Path:
+        """
+        Streams the slurm workspace, i.e., the Nextflow script and the OCR-D workspace, as a tar archive
+        directly into a remote `tar -x` without any local temporary copy. Returns the slurm workspace dir in the HPC.
+        """
+        self.logger.info(f"Entering stream_slurm_workspace")
+        self.logger.info(f"ocrd_workspace_dir: {ocrd_workspace_dir}")
+        self.logger.info(f"workflow_job_id: {workflow_job_id}")
+        self.logger.info(f"nextflow_script_path: {nextflow_script_path}")
+        hpc_dst_slurm_workspace = Path(self.slurm_workspaces_dir, workflow_job_id)
+        tar_options = "-xzf" if compress else "-xf"
+        command = (
+            f"mkdir -p {quote(self.slurm_workspaces_dir)} && "
+            f"tar {tar_options} - -C {quote(self.slurm_workspaces_dir)}")
+        with self.session_manager.exec_channel() as channel:
+            channel.exec_command(command)
+            # The symlinks are followed, as with the copied tree of the zip transfer
+            try:
+                with tarfile.open(
+                    fileobj=_ChannelWriter(channel), mode="w|gz" if compress else "w|", dereference=True
+                ) as tar_stream:
+                    tar_stream.add(name=nextflow_script_path, arcname=f"{workflow_job_id}/{nextflow_script_path.name}")
+                    tar_stream.add(name=ocrd_workspace_dir, arcname=f"{workflow_job_id}/{ocrd_workspace_dir.name}")
+            except OSError:
+                # The channel is closed when the remote tar fails, its error output tells why
+                self._check_tar_stream_exit(channel=channel, command=command)
+                raise
+            channel.shutdown_write()
+            self._check_tar_stream_exit(channel=channel, command=command)
+        self.logger.info(f"Streamed the slurm workspace to remote dst: {hpc_dst_slurm_workspace}")
+        return hpc_dst_slurm_workspace
+
     def _download_file_with_retries(self, remote_src, local_dst, try_times: int = 100, sleep_time: int = 3):
         if try_times < 0 or sleep_time < 0:
             raise ValueError("Negative value passed as a parameter for time")
@@ -192,7 +221,7 @@ class NHRTransfer(NHRConnector):
             self.logger.info(f"Removed the temp workspace zip: {unpack_src}")
 
     def get_and_unpack_slurm_workspace(self, ocrd_workspace_dir: Path, workflow_job_dir: Path, slurm_job_id: str):
-        _ = self.sftp_client  # Force reconnect of the SFTP Client
+        _ = self.sftp_client  # Reconnects the SFTP client if the connection is broken
         wf_job_zip_path = self._download_workflow_job_zip(local_wf_job_dir=workflow_job_dir)
         self._unzip_workflow_job_dir(wf_job_zip_path, workflow_job_dir, True)
 
@@ -206,6 +235,10 @@ class NHRTransfer(NHRConnector):
         ws_zip_path = self._download_workspace_zip(ocrd_workspace_dir, workflow_job_dir)
         self._unzip_workspace_dir(ws_zip_path, ocrd_workspace_dir)
 
+        self._symlink_workspace_into_workflow_job(ocrd_workspace_dir, workflow_job_dir)
+        self.logger.info(f"Leaving get_and_unpack_slurm_workspace")
+
+    def _symlink_workspace_into_workflow_job(self, ocrd_workspace_dir: Path, workflow_job_dir: Path) -> None:
         # Remove the workspace dir from the local workflow job dir,
         # and then create a symlink of the workspace dir inside the
         # workflow job dir
@@ -216,58 +249,121 @@ class NHRTransfer(NHRConnector):
             raise Exception(
                 f"Error when symlink: {error}, src: {ocrd_workspace_dir}, dst: {workspace_dir_in_workflow_job}")
         self.logger.info(f"Symlinked from src: {ocrd_workspace_dir}, to dst: {workspace_dir_in_workflow_job}")
-        self.logger.info(f"Leaving get_and_unpack_slurm_workspace")
 
-    def mkdir_p(self, remote_path, mode=0o766):
-        if remote_path == '/':
-            self._sftp_client.chdir('/')  # absolute path so change directory to root
-            return False
-        if remote_path == '':
-            return False  # top-level relative directory must exist
+    def stream_and_unpack_slurm_workspace(
+        self, ocrd_workspace_dir: Path, workflow_job_dir: Path, slurm_job_id: str,
+        compress: bool = HPC_TRANSFER_STREAM_COMPRESSION
+    ):
+        """
+        The streaming counterpart of `get_and_unpack_slurm_workspace`, the results are fetched as tar streams
+        of a remote `tar -c` and unpacked on the fly, without the zip archives of the results
+        """
+        workflow_job_id = Path(workflow_job_dir).name
+        workspace_id = Path(ocrd_workspace_dir).name
+        hpc_src_workflow_job_dir = Path(self.slurm_workspaces_dir, workflow_job_id)
+        self._fetch_tar_stream(
+            remote_src=hpc_src_workflow_job_dir, local_dst=workflow_job_dir, compress=compress,
+            exclude=[f"./{workspace_id}", f"./{workflow_job_id}.zip"])
+        self.logger.info(f"Streamed the workflow job dir from HPC source: {hpc_src_workflow_job_dir}")
+
+        # Remove the workspace dir from the local storage,
+        # before transferring the results to avoid potential
+        # overwrite errors or duplications
+        rmtree(ocrd_workspace_dir, ignore_errors=True)
+        self.logger.info(f"Removed tree dirs: {ocrd_workspace_dir}")
+        hpc_src_workspace_dir = Path(hpc_src_workflow_job_dir, workspace_id)
+        self._fetch_tar_stream(
+            remote_src=hpc_src_workspace_dir, local_dst=ocrd_workspace_dir, compress=compress,
+            exclude=["*.sock", f"./{workspace_id}.zip"])
+        self.logger.info(f"Streamed the workspace dir from HPC source: {hpc_src_workspace_dir}")
+        self._symlink_workspace_into_workflow_job(ocrd_workspace_dir, workflow_job_dir)
+        self.logger.info(f"Leaving stream_and_unpack_slurm_workspace")
+
+    def _fetch_tar_stream(self, remote_src: Path, local_dst: Path, compress: bool, exclude: List[str]) -> None:
+        tar_options = "-czf" if compress else "-cf"
+        exclude_options = "".join(f" --exclude={quote(pattern)}" for pattern in exclude)
+        command = f"tar {tar_options} -{exclude_options} -C {quote(str(remote_src))} ."
+        makedirs(name=local_dst, exist_ok=True)
+        with self.session_manager.exec_channel() as channel:
+            channel.exec_command(command)
+            channel.shutdown_write()
+            try:
+                with tarfile.open(fileobj=channel.makefile("rb"), mode="r|gz" if compress else "r|") as tar_stream:
+                    tar_stream.extractall(path=local_dst, **TAR_EXTRACT_OPTIONS)
+            except tarfile.TarError:
+                # A failing remote tar leaves an empty or truncated stream, its error output tells why
+                self._check_tar_stream_exit(channel=channel, command=command)
+                raise
+            self._check_tar_stream_exit(channel=channel, command=command)
+
+    @staticmethod
+    def _check_tar_stream_exit(channel: Channel, command: str) -> None:
+        err = channel.makefile_stderr("rb").read().decode(encoding="utf-8", errors="replace").strip()
+        return_code = channel.recv_exit_status()
+        if return_code:
+            raise Exception(f"Remote tar stream failed with return code {return_code}: {err}, command: {command}")
+
+    def mkdir_p(self, remote_path, mode=0o766, sftp_client: Optional[SFTPClient] = None) -> bool:
+        """
+        Creates the remote directory and its missing parent directories, returns True if it was created.
+        The working directory of the SFTP client is not changed, so concurrent transfers do not interfere.
+        """
+        sftp_client = sftp_client or self.sftp_client
+        remote_path = str(remote_path).rstrip('/')
+        if not remote_path:
+            return False  # the root or the top-level relative directory must exist
+        try:
+            sftp_client.stat(remote_path)
+            return False  # directory exists
+        except IOError:
+            pass
+        self.mkdir_p(remote_path=split(remote_path)[0], mode=mode, sftp_client=sftp_client)  # make parent directories
         try:
-            self._sftp_client.chdir(remote_path)  # subdirectory exists
-        except IOError as error:
-            dir_name, base_name = split(remote_path.rstrip('/'))
-            self.mkdir_p(dir_name)  # make parent directories
-            self._sftp_client.mkdir(path=base_name, mode=mode)  # subdirectory missing, so created it
-            self._sftp_client.chdir(base_name)
-            return True
-
-    def get_file(self, remote_src, local_dst):
+            sftp_client.mkdir(path=remote_path, mode=mode)
+        except IOError:
+            # The directory may have been created meanwhile by a concurrent transfer
+            sftp_client.stat(remote_path)
+            return False
+        return True
+
+    def get_file(self, remote_src, local_dst, sftp_client: Optional[SFTPClient] = None):
+        sftp_client = sftp_client or self.sftp_client
         makedirs(name=Path(local_dst).parent.absolute(), exist_ok=True)
-        self._sftp_client.get(remotepath=str(remote_src), localpath=str(local_dst))
+        sftp_client.get(remotepath=str(remote_src), localpath=str(local_dst))
 
-    def get_dir(self, remote_src, local_dst, mode=0o766):
+    def get_dir(self, remote_src, local_dst, mode=0o766, sftp_client: Optional[SFTPClient] = None):
         """
         Downloads the contents of the remote source directory to the local destination directory.
         The remote source directory needs to exist.
         All subdirectories in source are created under destination.
         """
+        sftp_client = sftp_client or self.sftp_client
         makedirs(name=local_dst, mode=mode, exist_ok=True)
-        for item in self._sftp_client.listdir(str(remote_src)):
+        for item in sftp_client.listdir(str(remote_src)):
             item_src = Path(remote_src, item)
             item_dst = Path(local_dst, item)
-            if S_ISDIR(self._sftp_client.lstat(str(item_src)).st_mode):
-                self.get_dir(remote_src=item_src, local_dst=item_dst, mode=mode)
+            if S_ISDIR(sftp_client.lstat(str(item_src)).st_mode):
+                self.get_dir(remote_src=item_src, local_dst=item_dst, mode=mode, sftp_client=sftp_client)
             else:
-                self.get_file(remote_src=item_src, local_dst=item_dst)
+                self.get_file(remote_src=item_src, local_dst=item_dst, sftp_client=sftp_client)
 
-    def put_file(self, local_src, remote_dst):
-        self.mkdir_p(remote_path=str(Path(remote_dst).parent.absolute()))
-        self._sftp_client.put(localpath=str(local_src), remotepath=str(remote_dst))
+    def put_file(self, local_src, remote_dst, sftp_client: Optional[SFTPClient] = None):
+        sftp_client = sftp_client or self.sftp_client
+        self.mkdir_p(remote_path=str(Path(remote_dst).parent.absolute()), sftp_client=sftp_client)
+        sftp_client.put(localpath=str(local_src), remotepath=str(remote_dst))
 
-    def put_dir(self, local_src, remote_dst, mode=0o766):
+    def put_dir(self, local_src, remote_dst, mode=0o766, sftp_client: Optional[SFTPClient] = None):
         """
         Uploads the contents of the local source directory to the remote destination directory.
         The remote destination directory needs to exist.
         All subdirectories in source are created under destination.
         """
-        self.mkdir_p(remote_path=str(remote_dst), mode=mode)
+        sftp_client = sftp_client or self.sftp_client
+        self.mkdir_p(remote_path=str(remote_dst), mode=mode, sftp_client=sftp_client)
         for item in listdir(str(local_src)):
             item_src = Path(local_src, item)
             item_dst = Path(remote_dst, item)
             if isdir(item_src):
-                self.put_dir(local_src=item_src, remote_dst=item_dst, mode=mode)
+                self.put_dir(local_src=item_src, remote_dst=item_dst, mode=mode, sftp_client=sftp_client)
             else:
-                self._sftp_client.chdir(str(remote_dst))
-                self.put_file(local_src=item_src, remote_dst=item_dst)
+                self.put_file(local_src=item_src, remote_dst=item_dst, sftp_client=sftp_client)
@@ -0,0 +1,140 @@
+from contextlib import contextmanager
+from logging import Logger
+from pathlib import Path
+from threading import BoundedSemaphore, Lock
+from time import monotonic, sleep
+from typing import Iterator, Optional
+
+from paramiko import AuthenticationException, AutoAddPolicy, Channel, RSAKey, SSHClient, SSHException, Transport
+
+from .connection_utils import is_transport_responsive
+from .constants import (
+    HPC_SSH_CONNECT_TIMEOUT, HPC_SSH_CONNECTION_TRY_TIMES, HPC_SSH_KEEPALIVE_INTERVAL, HPC_SSH_MAX_SESSIONS,
+    HPC_SSH_PROBE_INTERVAL, HPC_SSH_RECONNECT_MAX_WAIT, HPC_SSH_RECONNECT_WAIT
+)
+
+
+class SSHConnectionPool:
+    """
+    Keeps a single authenticated SSH transport to a host alive and opens the sessions of the commands over it,
+    hence, only the first command pays for the TCP connection, the key exchange and the authentication.
+
+    The transport sends keepalive packets every `keepalive_interval` seconds. Before reusing a transport idle
+    for longer than `probe_interval` seconds, its liveness is probed with `send_ignore`, since firewalls may
+    drop idle connections silently. A dead transport is replaced, the reconnection is retried with an
+    exponential backoff. At most `max_sessions` sessions are open at once, further sessions wait for a free slot.
+    The pool is thread-safe.
+    """
+    def __init__(
+        self, logger: Logger, host: str, username: str, key_path: Path, key_pass: Optional[str] = None,
+        port: int = 22, max_sessions: int = HPC_SSH_MAX_SESSIONS, keepalive_interval: int = HPC_SSH_KEEPALIVE_INTERVAL,
+        probe_interval: float = HPC_SSH_PROBE_INTERVAL, reconnect_tries: int = HPC_SSH_CONNECTION_TRY_TIMES
+    ) -> None:
+        self.logger = logger
+        self.host = host
+        self.port = port
+        self.username = username
+        self.key_path = key_path
+        self.key_pass = key_pass
+        self.max_sessions = max_sessions
+        self.keepalive_interval = keepalive_interval
+        self.probe_interval = probe_interval
+        self.reconnect_tries = reconnect_tries
+
+        self._ssh_client: Optional[SSHClient] = None
+        self._transport_lock = Lock()
+        self._sessions = BoundedSemaphore(max_sessions)
+        # The monotonic time the transport was last known to be alive
+        self._last_alive = 0.0
+
+    def get_transport(self) -> Transport:
+        """
+        Returns the live transport, reconnects if the current one is dead
+        """
+        with self._transport_lock:
+            transport = self._ssh_client.get_transport() if self._ssh_client else None
+            if transport and self._is_alive(transport):
+                return transport
+            self._close_client()
+            self._ssh_client = self._connect_with_backoff()
+            self._last_alive = monotonic()
+            return self._ssh_client.get_transport()
+
+    @contextmanager
+    def open_session(self) -> Iterator[Channel]:
+        """
+        Yields a new session channel over the shared transport and closes it afterwards
+        """
+        with self._sessions:
+            try:
+                channel = self.get_transport().open_session()
+            except (EOFError, OSError, SSHException) as error:
+                # The transport died after being checked, a new transport is opened with the next try
+                self.logger.warning(f"Failed to open a session, reconnecting: {error}")
+                self.invalidate()
+                channel = self.get_transport().open_session()
+            try:
+                yield channel
+            finally:
+                channel.close()
+            self._last_alive = monotonic()
+
+    def invalidate(self) -> None:
+        """
+        Closes the current transport, the next session opens a new one
+        """
+        with self._transport_lock:
+            self._close_client()
+
+    def close(self) -> None:
+        self.invalidate()
+
+    def _is_alive(self, transport: Transport) -> bool:
+        if not transport.is_active():
+            self.logger.warning(f"The SSH transport to {self.host} is not active anymore")
+            return False
+        if monotonic() - self._last_alive < self.probe_interval:
+            return True
+        if not is_transport_responsive(self.logger, transport):
+            return False
+        self._last_alive = monotonic()
+        return True
+
+    def _close_client(self) -> None:
+        if self._ssh_client:
+            self._ssh_client.close()
+            self._ssh_client = None
+
+    def _connect_with_backoff(self) -> SSHClient:
+        wait = HPC_SSH_RECONNECT_WAIT
+        for attempt in range(1, self.reconnect_tries + 1):
+            try:
+                return self._connect()
+            except AuthenticationException:
+                # Retrying with the same credentials does not help
+                raise
+            except (EOFError, OSError, SSHException) as error:
+                self.logger.warning(
+                    f"Connecting to {self.host}:{self.port} failed, try {attempt}/{self.reconnect_tries}: {error}")
+                if attempt == self.reconnect_tries:
+                    raise ConnectionError(
+                        f"Failed to connect to {self.host}:{self.port} after {self.reconnect_tries} tries: {error}")
+                sleep(wait)
+                wait = min(wait * 2, HPC_SSH_RECONNECT_MAX_WAIT)
+
+    def _connect(self) -> SSHClient:
+        ssh_client = SSHClient()
+        ssh_client.set_missing_host_key_policy(AutoAddPolicy())
+        hpc_pkey = RSAKey.from_private_key_file(str(self.key_path), self.key_pass)
+        self.logger.info(f"Connecting to hpc frontend server {self.host}:{self.port} with username: {self.username}")
+        try:
+            ssh_client.connect(
+                hostname=self.host, port=self.port, username=self.username, pkey=hpc_pkey, passphrase=self.key_pass,
+                timeout=HPC_SSH_CONNECT_TIMEOUT, banner_timeout=HPC_SSH_CONNECT_TIMEOUT,
+                auth_timeout=HPC_SSH_CONNECT_TIMEOUT)
+        except BaseException:
+            ssh_client.close()
+            raise
+        ssh_client.get_transport().set_keepalive(self.keepalive_interval)
+        self.logger.debug(f"Successfully connected to the hpc frontend server")
+        return ssh_client
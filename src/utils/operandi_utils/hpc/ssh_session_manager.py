@@ -0,0 +1,185 @@
+from contextlib import contextmanager
+from logging import getLogger
+from os import register_at_fork
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import Dict, Iterator, Optional, Tuple
+
+from paramiko import Channel, SFTPClient
+
+from .ssh_connection_pool import SSHConnectionPool
+
+CHANNEL_KIND_EXEC = "exec"
+CHANNEL_KIND_SFTP = "sftp"
+
+
+class SSHChannelMetrics:
+    """
+    Counters of the channels of a single kind opened by a session manager
+    """
+    def __init__(self) -> None:
+        self.opened: int = 0
+        self.failed: int = 0
+        self.active: int = 0
+        # Seconds until a channel was opened and seconds the channels were in use, summed over all channels
+        self.open_seconds: float = 0.0
+        self.busy_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "opened": self.opened,
+            "failed": self.failed,
+            "active": self.active,
+            "open_seconds": round(self.open_seconds, 6),
+            "busy_seconds": round(self.busy_seconds, 6)
+        }
+
+
+class SSHSessionManager:
+    """
+    Multiplexes the exec and SFTP channels of a process over a single authenticated SSH transport,
+    similar to the ControlMaster of OpenSSH. The channels are opened on demand, an exec channel per command
+    and a single SFTP channel which is reused as long as it is open and belongs to the live transport.
+
+    The transports cannot be shared across processes, use `get_ssh_session_manager` to get the manager
+    of the current process. The metrics of the channels are kept per channel kind.
+    """
+    def __init__(self, connection_pool: SSHConnectionPool) -> None:
+        self.logger = getLogger("operandi_utils.hpc.ssh_session_manager")
+        self.connection_pool = connection_pool
+        self._sftp_client: Optional[SFTPClient] = None
+        self._sftp_opened_time = 0.0
+        self._sftp_lock = Lock()
+        self._metrics_lock = Lock()
+        self._metrics: Dict[str, SSHChannelMetrics] = {
+            CHANNEL_KIND_EXEC: SSHChannelMetrics(),
+            CHANNEL_KIND_SFTP: SSHChannelMetrics()
+        }
+
+    @contextmanager
+    def exec_channel(self) -> Iterator[Channel]:
+        """
+        Yields a new session channel for executing a single command and closes it afterwards
+        """
+        with self._session(CHANNEL_KIND_EXEC) as channel:
+            yield channel
+
+    @contextmanager
+    def sftp_session(self) -> Iterator[SFTPClient]:
+        """
+        Yields an SFTP client on its own channel and closes it afterwards. Unlike the shared `sftp_client`,
+        it is safe to be used concurrently with other transfers, e.g., from several threads.
+        """
+        with self._session(CHANNEL_KIND_SFTP) as channel:
+            channel.invoke_subsystem("sftp")
+            yield SFTPClient(channel)
+
+    @contextmanager
+    def _session(self, channel_kind: str) -> Iterator[Channel]:
+        metrics = self._metrics[channel_kind]
+        start_time = monotonic()
+        opened = False
+        try:
+            with self.connection_pool.open_session() as channel:
+                opened_time = monotonic()
+                self._count_open(metrics, opened_time - start_time)
+                opened = True
+                try:
+                    yield channel
+                finally:
+                    with self._metrics_lock:
+                        metrics.active -= 1
+                        metrics.busy_seconds += monotonic() - opened_time
+        except Exception:
+            # Errors raised while the channel was in use are not failures to open it
+            if not opened:
+                with self._metrics_lock:
+                    metrics.failed += 1
+            raise
+
+    @property
+    def sftp_client(self) -> SFTPClient:
+        """
+        The SFTP client of the process, reopened only if its channel is closed or the transport was replaced
+        """
+        with self._sftp_lock:
+            transport = self.connection_pool.get_transport()
+            if self._sftp_client:
+                channel = self._sftp_client.get_channel()
+                if channel and not channel.closed and channel.get_transport() is transport:
+                    return self._sftp_client
+                self._close_sftp_client()
+            metrics = self._metrics[CHANNEL_KIND_SFTP]
+            start_time = monotonic()
+            try:
+                self._sftp_client = SFTPClient.from_transport(transport)
+            except Exception:
+                with self._metrics_lock:
+                    metrics.failed += 1
+                raise
+            self._count_open(metrics, monotonic() - start_time)
+            self._sftp_opened_time = monotonic()
+            return self._sftp_client
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the metrics of the exec and SFTP channels, e.g., to be logged or exported
+        """
+        with self._metrics_lock:
+            return {kind: metrics.to_dict() for kind, metrics in self._metrics.items()}
+
+    def close(self) -> None:
+        with self._sftp_lock:
+            self._close_sftp_client()
+        self.connection_pool.close()
+
+    def _count_open(self, metrics: SSHChannelMetrics, open_seconds: float) -> None:
+        with self._metrics_lock:
+            metrics.opened += 1
+            metrics.active += 1
+            metrics.open_seconds += open_seconds
+
+    def _close_sftp_client(self) -> None:
+        if not self._sftp_client:
+            return
+        self._sftp_client.close()
+        self._sftp_client = None
+        with self._metrics_lock:
+            metrics = self._metrics[CHANNEL_KIND_SFTP]
+            metrics.active -= 1
+            metrics.busy_seconds += monotonic() - self._sftp_opened_time
+
+
+# Keys: host, port and username, values: the session manager of the current process to that host
+_session_managers: Dict[Tuple[str, int, str], SSHSessionManager] = {}
+_session_managers_lock = Lock()
+
+
+def get_ssh_session_manager(
+    host: str, username: str, key_path: Path, key_pass: Optional[str] = None, port: int = 22
+) -> SSHSessionManager:
+    """
+    Returns the session manager of the current process to the host, creates it on the first call
+    """
+    manager_key = (host, port, username)
+    with _session_managers_lock:
+        session_manager = _session_managers.get(manager_key, None)
+        if not session_manager:
+            connection_pool = SSHConnectionPool(
+                logger=getLogger("operandi_utils.hpc.ssh_connection_pool"), host=host, username=username,
+                key_path=key_path, key_pass=key_pass, port=port)
+            session_manager = SSHSessionManager(connection_pool=connection_pool)
+            _session_managers[manager_key] = session_manager
+        return session_manager
+
+
+def _reset_session_managers_after_fork() -> None:
+    global _session_managers_lock
+    # The transports inherited from the parent process are left untouched since closing them in the
+    # child could tear down the connections of the parent. The lock may have been held during the fork.
+    _session_managers.clear()
+    _session_managers_lock = Lock()
+
+
+register_at_fork(after_in_child=_reset_session_managers_after_fork)
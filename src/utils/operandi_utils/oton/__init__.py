@@ -1,6 +1,10 @@
-__all__ = ["cli", "OTONConverter", "NextflowBlockProcess", "NextflowBlockWorkflow", "NextflowFileExecutable"]
+__all__ = [
+    "cli", "OTONConversionCache", "OTONConverter", "NextflowBlockProcess", "NextflowBlockWorkflow",
+    "NextflowFileExecutable"
+]
 
 from .cli import cli
+from .oton_cache import OTONConversionCache
 from .oton_converter import OTONConverter
 from .nf_block_process import NextflowBlockProcess
 from .nf_block_workflow import NextflowBlockWorkflow
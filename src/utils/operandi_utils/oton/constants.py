@@ -1,6 +1,7 @@
 from json import load
 from os import environ
 from pkg_resources import resource_filename
+from typing import List
 from operandi_utils.constants import OPERANDI_VERSION
 
 
@@ -10,6 +11,10 @@ __all__ = [
     "METS_FILE",
 
     "OCRD_ALL_JSON",
+    "OTON_CACHE_DIR_NAME",
+    "OTON_CACHE_MAX_ENTRIES",
+    "OTON_CACHE_PARTIAL_MAX_AGE",
+    "OTON_ENVIRONMENTS",
     "OTON_LOG_LEVEL",
     "OTON_LOG_FORMAT",
 
@@ -33,6 +38,15 @@ OCRD_ALL_JSON_FILE = resource_filename(__name__, 'ocrd_all_tool.json')
 with open(OCRD_ALL_JSON_FILE) as f:
     OCRD_ALL_JSON = load(f)
 
+# Name of the directory inside `OPERANDI_SERVER_BASE_DIR` where the converted Nextflow scripts are cached
+OTON_CACHE_DIR_NAME: str = "oton_cache"
+# Upper bound of the amount of cached Nextflow scripts, least recently used scripts are evicted first
+OTON_CACHE_MAX_ENTRIES: int = 1000
+# Partially written conversion files older than that (in seconds) are considered abandoned and removed on eviction
+OTON_CACHE_PARTIAL_MAX_AGE: int = 60 * 60
+# The environments the processor calls of a converted Nextflow script can be executed in
+OTON_ENVIRONMENTS: List[str] = ["local", "docker", "apptainer"]
+
 OTON_LOG_LEVEL = environ.get("OTON_LOG_LEVEL", "INFO")
 OTON_LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s:%(funcName)s: %(lineno)s: %(message)s'
 
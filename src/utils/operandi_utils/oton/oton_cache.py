@@ -0,0 +1,116 @@
+from hashlib import sha256
+from logging import getLogger
+from os import close, environ, replace, scandir, unlink, utime
+from os.path import exists, join
+from pathlib import Path
+from tempfile import mkstemp
+from time import time
+from typing import Optional
+
+from operandi_utils.oton.constants import (
+    OTON_CACHE_DIR_NAME, OTON_CACHE_MAX_ENTRIES, OTON_CACHE_PARTIAL_MAX_AGE, OTON_ENVIRONMENTS)
+from operandi_utils.oton.oton_converter import OTONConverter
+
+NF_SUFFIX = ".nf"
+PARTIAL_SUFFIX = ".part"
+
+
+class OTONConversionCache:
+    """
+    Disk cache of the Nextflow scripts converted from OCR-D process workflows.
+
+    A converted script is identified by the hash of the OCR-D workflow text and the target environment,
+    hence, repeated conversions of the same workflow only touch the cached script. Each conversion works
+    on its own temporary files and the produced script is atomically renamed into the cache, so concurrent
+    conversions neither overwrite each other nor expose partially written scripts. The least recently used
+    scripts are evicted once there are more than `max_entries`, the last access time of a script is tracked
+    with the modification time of its file.
+    """
+    def __init__(self, cache_dir: str = None, max_entries: int = OTON_CACHE_MAX_ENTRIES):
+        self.logger = getLogger("operandi_utils.oton.oton_cache")
+        if not cache_dir:
+            server_base_dir = environ.get("OPERANDI_SERVER_BASE_DIR", None)
+            if not server_base_dir:
+                raise ValueError("Environment variable not set: OPERANDI_SERVER_BASE_DIR")
+            cache_dir = join(server_base_dir, OTON_CACHE_DIR_NAME)
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        Path(self.cache_dir).mkdir(mode=0o777, parents=True, exist_ok=True)
+
+    @staticmethod
+    def _cache_key(ocrd_workflow: bytes, environment: str) -> str:
+        return sha256(environment.encode("utf-8") + b"\0" + ocrd_workflow).hexdigest()
+
+    def _nf_script_path(self, ocrd_workflow: bytes, environment: str) -> str:
+        return join(self.cache_dir, f"{self._cache_key(ocrd_workflow, environment)}{NF_SUFFIX}")
+
+    def get(self, ocrd_workflow: bytes, environment: str) -> Optional[str]:
+        """
+        Returns the path to the cached Nextflow script of the OCR-D workflow, or None on a cache miss
+        """
+        nf_script_path = self._nf_script_path(ocrd_workflow, environment)
+        try:
+            # Mark the script as recently used
+            utime(nf_script_path)
+        except FileNotFoundError:
+            return None
+        self.logger.debug(f"OtoN cache hit for: {nf_script_path}")
+        return nf_script_path
+
+    def convert(self, ocrd_workflow: bytes, environment: str) -> str:
+        """
+        Returns the path to the Nextflow script of the OCR-D workflow, converts and caches it on a cache miss.
+        Raises ValueError for an unknown environment or an invalid OCR-D workflow.
+        """
+        if environment not in OTON_ENVIRONMENTS:
+            raise ValueError(f"Unknown environment: {environment}, must be one of: {OTON_ENVIRONMENTS}")
+        nf_script_path = self.get(ocrd_workflow, environment)
+        if nf_script_path:
+            return nf_script_path
+        nf_script_path = self._nf_script_path(ocrd_workflow, environment)
+        input_fd, input_path = mkstemp(dir=self.cache_dir, suffix=f".txt{PARTIAL_SUFFIX}")
+        output_fd, output_path = mkstemp(dir=self.cache_dir, suffix=f"{NF_SUFFIX}{PARTIAL_SUFFIX}")
+        close(output_fd)
+        try:
+            with open(input_fd, mode="wb") as input_fp:
+                input_fp.write(ocrd_workflow)
+            converter = OTONConverter()
+            if environment == "local":
+                converter.convert_oton_env_local(input_path, output_path)
+            elif environment == "docker":
+                converter.convert_oton_env_docker(input_path, output_path)
+            else:
+                converter.convert_oton_env_apptainer(input_path, output_path)
+            replace(output_path, nf_script_path)
+            self.logger.info(f"Cached converted Nextflow script: {nf_script_path}")
+        finally:
+            for partial_path in [input_path, output_path]:
+                if exists(partial_path):
+                    unlink(partial_path)
+        self.evict()
+        return nf_script_path
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used scripts until at most `max_entries` remain
+        """
+        cached_scripts = []
+        now = time()
+        for entry in scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            try:
+                entry_mtime = entry.stat().st_mtime
+                if entry.name.endswith(PARTIAL_SUFFIX):
+                    if now - entry_mtime > OTON_CACHE_PARTIAL_MAX_AGE:
+                        unlink(entry.path)
+                    continue
+            except FileNotFoundError:
+                continue
+            cached_scripts.append((entry_mtime, entry.path))
+        for _, nf_script_path in sorted(cached_scripts)[:max(len(cached_scripts) - self.max_entries, 0)]:
+            try:
+                unlink(nf_script_path)
+                self.logger.info(f"Evicted cached Nextflow script: {nf_script_path}")
+            except FileNotFoundError:
+                pass
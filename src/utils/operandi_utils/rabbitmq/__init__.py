@@ -1,22 +1,25 @@
 __all__ = [
     "DEFAULT_EXCHANGER_NAME",
     "DEFAULT_EXCHANGER_TYPE",
+    "get_async_connection_publisher",
     "get_connection_consumer",
     "get_connection_publisher",
     "RABBITMQ_QUEUE_DEFAULT",
-    "RABBITMQ_QUEUE_JOB_STATUSES",
     "RABBITMQ_QUEUE_HARVESTER",
     "RABBITMQ_QUEUE_USERS",
+    "RABBITMQ_QUEUE_WORKSPACE_IMPORTS",
+    "RMQAsyncPublisher",
     "RMQConnector"
 ]
 
+from .async_publisher import RMQAsyncPublisher
 from .connector import RMQConnector
 from .constants import (
     DEFAULT_EXCHANGER_NAME,
     DEFAULT_EXCHANGER_TYPE,
     RABBITMQ_QUEUE_DEFAULT,
-    RABBITMQ_QUEUE_JOB_STATUSES,
     RABBITMQ_QUEUE_HARVESTER,
-    RABBITMQ_QUEUE_USERS
+    RABBITMQ_QUEUE_USERS,
+    RABBITMQ_QUEUE_WORKSPACE_IMPORTS
 )
-from .wrappers import get_connection_consumer, get_connection_publisher
+from .wrappers import get_async_connection_publisher, get_connection_consumer, get_connection_publisher
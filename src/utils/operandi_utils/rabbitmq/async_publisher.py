@@ -0,0 +1,286 @@
+from asyncio import Future, Lock, Queue, create_task, get_running_loop, sleep, wait, wait_for
+from contextlib import asynccontextmanager
+from logging import getLogger
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from pika import BasicProperties, ConnectionParameters, PlainCredentials
+from pika.adapters.asyncio_connection import AsyncioConnection
+from pika.channel import Channel
+from pika.spec import Basic
+
+from operandi_utils.constants import LOG_LEVEL_RMQ_PUBLISHER
+from .constants import (
+    ASYNC_PUBLISHER_CHANNELS, ASYNC_PUBLISHER_CONFIRM_TIMEOUT, ASYNC_PUBLISHER_CONNECT_TIMEOUT,
+    ASYNC_PUBLISHER_HEARTBEAT, DEFAULT_EXCHANGER_NAME, DEFAULT_EXCHANGER_TYPE, RABBITMQ_QUEUE_DEFAULT,
+    RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS, RABBITMQ_QUEUE_WORKSPACE_IMPORTS, RECONNECT_TRIES, RECONNECT_WAIT
+)
+
+
+def _create_callback_future() -> Tuple[Future, Callable]:
+    # Resolves the future with the first argument of the first call of the pika callback
+    future = get_running_loop().create_future()
+
+    def callback(result=None, *args):
+        if not future.done():
+            future.set_result(result)
+    return future, callback
+
+
+class _ConfirmChannel:
+    """
+    A channel in confirm mode which tracks the confirmations of the messages published through it
+    """
+    def __init__(self, channel: Channel):
+        self.channel = channel
+        self.delivery_tag = 0
+        # Keys: delivery tags, values: the futures resolved once RabbitMQ confirms the message
+        self.unconfirmed: Dict[int, Future] = {}
+        channel.add_on_close_callback(self._on_close)
+
+    def publish(self, exchange_name: str, routing_key: str, message: bytes, properties: BasicProperties) -> Future:
+        confirmation = get_running_loop().create_future()
+        self.channel.basic_publish(
+            exchange=exchange_name, routing_key=routing_key, body=message, properties=properties)
+        self.delivery_tag += 1
+        self.unconfirmed[self.delivery_tag] = confirmation
+        return confirmation
+
+    def on_confirmation(self, method_frame) -> None:
+        confirmation = method_frame.method
+        if confirmation.multiple:
+            delivery_tags = [tag for tag in self.unconfirmed.keys() if tag <= confirmation.delivery_tag]
+        else:
+            delivery_tags = [confirmation.delivery_tag]
+        for delivery_tag in delivery_tags:
+            future = self.unconfirmed.pop(delivery_tag, None)
+            if not future or future.done():
+                continue
+            if isinstance(confirmation, Basic.Ack):
+                future.set_result(None)
+            else:
+                future.set_exception(ConnectionError("The message was rejected by RabbitMQ"))
+
+    def _on_close(self, channel: Channel, reason: Exception) -> None:
+        for future in self.unconfirmed.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"The channel was closed before the confirmation: {reason}"))
+        self.unconfirmed.clear()
+
+
+class RMQAsyncPublisher:
+    """
+    Asyncio-native publisher of the Operandi Server, the publishing never blocks the event loop.
+
+    The messages are published through a pool of channels in confirm mode. The publishers do not hold a channel
+    while waiting for the confirmations, hence, many messages are in flight at once and RabbitMQ confirms them
+    together. A batch of messages is published back-to-back through a single channel and confirmed as a whole.
+    The heartbeats detect dropped connections, the connection and the channels are reopened automatically.
+    """
+    def __init__(
+        self, host: str, port: int, vhost: str, channels: int = ASYNC_PUBLISHER_CHANNELS,
+        heartbeat: int = ASYNC_PUBLISHER_HEARTBEAT, confirm_timeout: float = ASYNC_PUBLISHER_CONFIRM_TIMEOUT
+    ) -> None:
+        self.logger = getLogger("operandi_utils.rabbitmq.async_publisher")
+        self.logger.setLevel(LOG_LEVEL_RMQ_PUBLISHER)
+        self._host = host
+        self._port = port
+        self._vhost = vhost
+        self._parameters: Optional[ConnectionParameters] = None
+        self.channels = channels
+        self.heartbeat = heartbeat
+        self.confirm_timeout = confirm_timeout
+
+        self._connection: Optional[AsyncioConnection] = None
+        self._channel_pool: Optional[Queue] = None
+        self._connect_lock = Lock()
+        self._disconnecting = False
+        self._disconnected: Optional[Future] = None
+
+    async def authenticate_and_connect(self, username: str, password: str) -> None:
+        credentials = PlainCredentials(username=username, password=password)
+        self._parameters = ConnectionParameters(
+            host=self._host, port=self._port, virtual_host=self._vhost, credentials=credentials,
+            heartbeat=self.heartbeat, socket_timeout=ASYNC_PUBLISHER_CONNECT_TIMEOUT)
+        self._disconnecting = False
+        await self._ensure_connected()
+
+    async def disconnect(self) -> None:
+        self._disconnecting = True
+        connection = self._connection
+        if not (connection and (connection.is_open or connection.is_opening)):
+            return
+        self._disconnected = get_running_loop().create_future()
+        try:
+            connection.close()
+            await wait_for(self._disconnected, timeout=ASYNC_PUBLISHER_CONNECT_TIMEOUT)
+        except Exception as error:
+            self.logger.error(f"Failed to gracefully disconnect the RabbitMQ async publisher: {error}")
+
+    async def publish_to_queue(
+        self, queue_name: str, message: bytes, exchange_name: str = DEFAULT_EXCHANGER_NAME,
+        properties: Optional[BasicProperties] = None
+    ) -> None:
+        """
+        Returns once RabbitMQ has confirmed the message, raises the error otherwise
+        """
+        publish_error = (await self.publish_batch_to_queue(queue_name, [message], exchange_name, properties))[0]
+        if publish_error:
+            raise publish_error
+
+    async def publish_batch_to_queue(
+        self, queue_name: str, messages: List[bytes], exchange_name: str = DEFAULT_EXCHANGER_NAME,
+        properties: Optional[BasicProperties] = None
+    ) -> List[Optional[Exception]]:
+        """
+        Publishes the messages back-to-back and waits for their confirmations together. Returns the publishing
+        error of each message, None for the messages confirmed by RabbitMQ. Raises if there is no connection.
+        """
+        if not properties:
+            app_id = "webapi-processing-server"
+            headers = {"OCR-D WebApi Header": "OCR-D WebApi Value"}
+            properties = BasicProperties(app_id=app_id, content_type="application/json", headers=headers)
+
+        self.logger.info(f"Publishing {len(messages)} messages to queue: {queue_name}")
+        confirmations: List[Future] = []
+        publish_error = None
+        async with self._lease_channel() as confirm_channel:
+            try:
+                for message in messages:
+                    self.logger.debug(f"Publishing bytes: {message}")
+                    # The routing key and the queue name must match!
+                    confirmations.append(confirm_channel.publish(
+                        exchange_name=exchange_name, routing_key=queue_name, message=message, properties=properties))
+            except Exception as error:
+                self.logger.error(f"Failed to publish to queue: {queue_name}, error: {error}")
+                publish_error = error
+
+        if confirmations:
+            _, not_confirmed = await wait(confirmations, timeout=self.confirm_timeout)
+            for confirmation in not_confirmed:
+                confirmation.cancel()
+        publish_errors = []
+        for confirmation in confirmations:
+            if confirmation.cancelled():
+                publish_errors.append(TimeoutError(f"Not confirmed in {self.confirm_timeout} seconds"))
+            else:
+                publish_errors.append(confirmation.exception())
+        publish_errors.extend([publish_error] * (len(messages) - len(confirmations)))
+        confirmed = publish_errors.count(None)
+        self.logger.info(f"Confirmed {confirmed} of {len(messages)} messages published to queue: {queue_name}")
+        return publish_errors
+
+    @asynccontextmanager
+    async def _lease_channel(self) -> AsyncIterator[_ConfirmChannel]:
+        await self._ensure_connected()
+        channel_pool = self._channel_pool
+        confirm_channel = await channel_pool.get()
+        try:
+            yield confirm_channel
+        finally:
+            if not confirm_channel.channel.is_open and channel_pool is self._channel_pool and self._is_connected():
+                try:
+                    confirm_channel = await self._open_confirm_channel(self._connection)
+                except Exception as error:
+                    self.logger.error(f"Failed to reopen a closed publishing channel: {error}")
+            # The channels of a lost connection are returned as well, so the waiting publishers fail instead of hang
+            channel_pool.put_nowait(confirm_channel)
+
+    def _is_connected(self) -> bool:
+        return bool(self._connection and self._connection.is_open and self._channel_pool)
+
+    async def _ensure_connected(self) -> None:
+        if self._is_connected():
+            return
+        async with self._connect_lock:
+            if self._is_connected():
+                return
+            if self._disconnecting:
+                raise ConnectionError("The RabbitMQ async publisher has been disconnected")
+            for attempt in range(1, RECONNECT_TRIES + 1):
+                try:
+                    await self._open_connection()
+                    self.logger.info(f"RMQAsyncPublisher connected to {self._host}:{self._port}{self._vhost}")
+                    return
+                except Exception as error:
+                    self.logger.warning(f"Connecting to RabbitMQ failed, try {attempt}/{RECONNECT_TRIES}: {error}")
+                    if attempt < RECONNECT_TRIES:
+                        await sleep(RECONNECT_WAIT)
+            raise ConnectionError(f"Failed to connect to RabbitMQ after {RECONNECT_TRIES} tries")
+
+    async def _open_connection(self) -> None:
+        if not self._parameters:
+            raise ConnectionError("The RabbitMQ async publisher has not been authenticated")
+        loop = get_running_loop()
+        opened = loop.create_future()
+
+        def on_open(connection: AsyncioConnection):
+            if not opened.done():
+                opened.set_result(connection)
+
+        def on_open_error(connection: AsyncioConnection, error: Exception):
+            if not opened.done():
+                opened.set_exception(ConnectionError(f"{error}"))
+
+        connection = AsyncioConnection(
+            parameters=self._parameters, on_open_callback=on_open, on_open_error_callback=on_open_error,
+            on_close_callback=self._on_connection_closed, custom_ioloop=loop)
+        try:
+            await wait_for(opened, timeout=ASYNC_PUBLISHER_CONNECT_TIMEOUT)
+            confirm_channels = [await self._open_confirm_channel(connection) for _ in range(self.channels)]
+            await self._declare_defaults(confirm_channels[0].channel)
+        except BaseException:
+            if connection.is_open or connection.is_opening:
+                connection.close()
+            raise
+        channel_pool = Queue()
+        for confirm_channel in confirm_channels:
+            channel_pool.put_nowait(confirm_channel)
+        self._connection = connection
+        self._channel_pool = channel_pool
+
+    async def _open_confirm_channel(self, connection: AsyncioConnection) -> _ConfirmChannel:
+        opened, on_open = _create_callback_future()
+        connection.channel(on_open_callback=on_open)
+        channel = await wait_for(opened, timeout=ASYNC_PUBLISHER_CONNECT_TIMEOUT)
+        confirm_channel = _ConfirmChannel(channel)
+        selected, on_select_ok = _create_callback_future()
+        channel.confirm_delivery(ack_nack_callback=confirm_channel.on_confirmation, callback=on_select_ok)
+        await wait_for(selected, timeout=ASYNC_PUBLISHER_CONNECT_TIMEOUT)
+        return confirm_channel
+
+    async def _declare_defaults(self, channel: Channel) -> None:
+        declared, on_declare_ok = _create_callback_future()
+        channel.exchange_declare(
+            exchange=DEFAULT_EXCHANGER_NAME, exchange_type=DEFAULT_EXCHANGER_TYPE, durable=False,
+            callback=on_declare_ok)
+        await wait_for(declared, timeout=ASYNC_PUBLISHER_CONNECT_TIMEOUT)
+        queue_names = [
+            RABBITMQ_QUEUE_DEFAULT, RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS, RABBITMQ_QUEUE_WORKSPACE_IMPORTS]
+        for queue_name in queue_names:
+            declared, on_declare_ok = _create_callback_future()
+            channel.queue_declare(queue=queue_name, durable=False, callback=on_declare_ok)
+            await wait_for(declared, timeout=ASYNC_PUBLISHER_CONNECT_TIMEOUT)
+            # The routing key matches the queue name
+            bound, on_bind_ok = _create_callback_future()
+            channel.queue_bind(
+                queue=queue_name, exchange=DEFAULT_EXCHANGER_NAME, routing_key=queue_name, callback=on_bind_ok)
+            await wait_for(bound, timeout=ASYNC_PUBLISHER_CONNECT_TIMEOUT)
+
+    def _on_connection_closed(self, connection: AsyncioConnection, reason: Exception) -> None:
+        if connection is not self._connection:
+            return
+        self._connection = None
+        self._channel_pool = None
+        if self._disconnecting:
+            self.logger.info(f"RMQAsyncPublisher disconnected")
+            if self._disconnected and not self._disconnected.done():
+                self._disconnected.set_result(None)
+            return
+        self.logger.warning(f"The RabbitMQ connection was lost, reconnecting: {reason}")
+        create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        try:
+            await self._ensure_connected()
+        except Exception as error:
+            self.logger.error(f"Reconnecting to RabbitMQ failed, retrying on the next publishing: {error}")
@@ -2,8 +2,8 @@ DEFAULT_EXCHANGER_NAME: str = "operandi_default_exchange"
 DEFAULT_EXCHANGER_TYPE: str = "direct"
 RABBITMQ_QUEUE_DEFAULT: str = "operandi_queue_default"
 RABBITMQ_QUEUE_HARVESTER: str = "operandi_queue_harvester"
-RABBITMQ_QUEUE_JOB_STATUSES: str = "operandi_queue_job_statuses"
 RABBITMQ_QUEUE_USERS: str = "operandi_queue_users"
+RABBITMQ_QUEUE_WORKSPACE_IMPORTS: str = "operandi_queue_workspace_imports"
 
 # Wait seconds before next reconnect try
 RECONNECT_WAIT: int = 5
@@ -12,3 +12,12 @@ RECONNECT_TRIES: int = 3
 # QOS, i.e., how many messages to consume in a single go
 # Check here: https://www.rabbitmq.com/consumer-prefetch.html
 PREFETCH_COUNT: int = 1
+
+# Amount of channels in confirm mode the asynchronous publisher publishes through concurrently
+ASYNC_PUBLISHER_CHANNELS: int = 4
+# Seconds to wait for the confirmation of a published message by RabbitMQ
+ASYNC_PUBLISHER_CONFIRM_TIMEOUT: float = 30
+# Seconds to wait for opening the connection or a channel, and for declaring the defaults
+ASYNC_PUBLISHER_CONNECT_TIMEOUT: float = 10
+# Seconds between the heartbeats of the asynchronous publisher, detects the connections dropped silently, e.g., by NAT
+ASYNC_PUBLISHER_HEARTBEAT: int = 30
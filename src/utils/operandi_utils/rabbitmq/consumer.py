@@ -7,7 +7,7 @@ from operandi_utils.constants import LOG_LEVEL_RMQ_CONSUMER
 from .connector import RMQConnector
 from .constants import (
     DEFAULT_EXCHANGER_NAME, DEFAULT_EXCHANGER_TYPE,
-    RABBITMQ_QUEUE_JOB_STATUSES, RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS
+    RABBITMQ_QUEUE_HARVESTER, RABBITMQ_QUEUE_USERS, RABBITMQ_QUEUE_WORKSPACE_IMPORTS
 )
 
 
@@ -34,7 +34,7 @@ class RMQConsumer(RMQConnector):
         RMQConnector.declare_and_bind_defaults(self._connection, self._channel)
         self.create_queue(queue_name=RABBITMQ_QUEUE_HARVESTER)
         self.create_queue(queue_name=RABBITMQ_QUEUE_USERS)
-        self.create_queue(queue_name=RABBITMQ_QUEUE_JOB_STATUSES, auto_delete=True)
+        self.create_queue(queue_name=RABBITMQ_QUEUE_WORKSPACE_IMPORTS)
 
     def create_queue(
         self, queue_name: str, exchange_name: str = DEFAULT_EXCHANGER_NAME, exchange_type: str = DEFAULT_EXCHANGER_TYPE,
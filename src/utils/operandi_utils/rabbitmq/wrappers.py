@@ -1,5 +1,6 @@
 from os import environ
 from operandi_utils import verify_and_parse_mq_uri
+from operandi_utils.rabbitmq.async_publisher import RMQAsyncPublisher
 from operandi_utils.rabbitmq.consumer import RMQConsumer
 from operandi_utils.rabbitmq.publisher import RMQPublisher
 
@@ -20,3 +21,12 @@ def get_connection_publisher(
     if enable_acks:
         rmq_publisher.enable_delivery_confirmations()
     return rmq_publisher
+
+
+async def get_async_connection_publisher(
+    rabbitmq_url: str = environ.get("OPERANDI_RABBITMQ_URL")
+) -> RMQAsyncPublisher:
+    rmq_data = verify_and_parse_mq_uri(rabbitmq_url)
+    rmq_publisher = RMQAsyncPublisher(host=rmq_data["host"], port=rmq_data["port"], vhost=rmq_data["vhost"])
+    await rmq_publisher.authenticate_and_connect(username=rmq_data["username"], password=rmq_data["password"])
+    return rmq_publisher
@@ -1,6 +1,7 @@
+from asyncio import AbstractEventLoop, iscoroutine, new_event_loop, run_coroutine_threadsafe
 from functools import wraps
 from io import DEFAULT_BUFFER_SIZE
-from os import makedirs, sep
+from os import makedirs, register_at_fork, sep
 from os.path import basename, dirname, exists
 from pathlib import Path
 from pika import URLParameters
@@ -9,6 +10,8 @@ from re import match as re_match
 from requests import get, post
 from requests.exceptions import RequestException
 from shutil import make_archive, move, unpack_archive
+from threading import Lock, Thread
+from typing import Optional
 from uuid import uuid4
 
 from ocrd_utils import initLogging
@@ -30,18 +33,47 @@ def safe_init_logging() -> None:
         initLogging()
 
 
-def call_sync(func):
+# The long-lived event loop of the current process running the coroutines of `call_sync` in a background thread
+_sync_event_loop: Optional[AbstractEventLoop] = None
+_sync_event_loop_lock = Lock()
+
+
+def _reset_sync_event_loop_after_fork() -> None:
+    # The thread running the loop of the parent process does not exist in the forked child process
+    global _sync_event_loop, _sync_event_loop_lock
+    _sync_event_loop = None
+    _sync_event_loop_lock = Lock()
+
+
+register_at_fork(after_in_child=_reset_sync_event_loop_after_fork)
+
+
+def get_sync_event_loop() -> AbstractEventLoop:
     """
-    Based on:
-    https://gist.github.com/phizaz/20c36c6734878c6ec053245a477572ec
+    Returns the event loop of the current process used by `call_sync`. The loop is started in a daemon thread
+    on first use and runs till the process exits, hence, the async clients created on it, e.g., the Motor client
+    of the database, stay bound to a single loop for the whole lifetime of the process.
     """
-    from asyncio import iscoroutine, get_event_loop
+    global _sync_event_loop
+    with _sync_event_loop_lock:
+        if not _sync_event_loop:
+            _sync_event_loop = new_event_loop()
+            Thread(target=_sync_event_loop.run_forever, name="operandi_sync_event_loop", daemon=True).start()
+        return _sync_event_loop
+
 
+def call_sync(func):
+    """
+    Turns a coroutine function into a blocking function for the synchronous callers, e.g., the broker workers.
+    The coroutine is submitted to the event loop of `get_sync_event_loop` and the caller waits for its result,
+    instead of entering and leaving an event loop on each call. Works from any thread, including signal handlers,
+    except from the thread of that event loop itself.
+    """
     @wraps(func)
     def func_wrapper(*args, **kwargs):
         result = func(*args, **kwargs)
         if iscoroutine(result):
-            return get_event_loop().run_until_complete(result)
+            return run_coroutine_threadsafe(result, get_sync_event_loop()).result()
         return result
 
     return func_wrapper
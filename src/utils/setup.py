@@ -15,6 +15,7 @@ setup(
     license='Apache License 2.0',
     packages=[
         'operandi_utils',
+        'operandi_utils.bagging',
         'operandi_utils.database',
         'operandi_utils.hpc',
         'operandi_utils.oton',
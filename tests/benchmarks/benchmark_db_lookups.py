@@ -0,0 +1,113 @@
+"""
+Measures the latency of the hot database lookups of Operandi while the collections grow up to one million entries.
+
+Requires a running MongoDB, uses the `OPERANDI_DB_URL` of the environment and a separate database that is dropped
+before and after the run. With the indexes declared in `operandi_utils.database.models` and the unique indexes
+created by `db_initiate_database` the latency stays flat, without them it grows linearly with the collection size.
+
+Run with: `make run-benchmark-db-lookups` or `python -m tests.benchmarks.benchmark_db_lookups`
+"""
+from asyncio import run
+from datetime import datetime
+from os import environ
+from random import randrange
+from statistics import median
+from time import perf_counter
+from typing import Awaitable, Callable, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from operandi_utils.constants import AccountType, StateJob, StateJobSlurm, StateWorkspace
+from operandi_utils.database import (
+    db_get_hpc_slurm_job, db_get_user_account_with_email, db_get_workflow_job, db_get_workspace,
+    db_initiate_database, db_list_workflow_jobs)
+
+BENCHMARK_DB_NAME = "operandi_benchmark"
+BENCHMARK_SIZES = [10_000, 100_000, 1_000_000]
+BENCHMARK_LOOKUPS = 200
+INSERT_BATCH_SIZE = 10_000
+USERS_AMOUNT = 1000
+
+
+def _user_account(index: int) -> dict:
+    return {
+        "institution_id": "benchmark", "user_id": f"user_{index}", "email": f"user_{index}@benchmark.org",
+        "encrypted_pass": "pass", "salt": "salt", "account_type": AccountType.USER, "approved_user": True,
+        "deleted": False, "datetime": datetime.now(), "details": "Benchmark user account"
+    }
+
+
+def _workspace(index: int) -> dict:
+    return {
+        "user_id": f"user_{index % USERS_AMOUNT}", "workspace_id": f"workspace_{index}",
+        "workspace_dir": f"/tmp/workspace_{index}", "workspace_mets_path": f"/tmp/workspace_{index}/mets.xml",
+        "pages_amount": 10, "file_groups": ["DEFAULT"], "state": StateWorkspace.READY, "deleted": False,
+        "datetime": datetime.now(), "details": "Benchmark workspace"
+    }
+
+
+def _workflow_job(index: int) -> dict:
+    return {
+        "user_id": f"user_{index % USERS_AMOUNT}", "job_id": f"job_{index}", "job_dir": f"/tmp/job_{index}",
+        "workflow_id": "workflow", "workspace_id": f"workspace_{index}", "job_state": StateJob.SUCCESS,
+        "deleted": False, "datetime": datetime.now(), "details": "Benchmark workflow job"
+    }
+
+
+def _hpc_slurm_job(index: int) -> dict:
+    return {
+        "user_id": f"user_{index % USERS_AMOUNT}", "workflow_job_id": f"job_{index}", "hpc_slurm_job_id": str(index),
+        "hpc_slurm_job_state": StateJobSlurm.COMPLETED, "deleted": False, "datetime": datetime.now(),
+        "details": "Benchmark hpc slurm job"
+    }
+
+
+async def _fill_collection(collection, create_entry: Callable[[int], dict], start: int, end: int) -> None:
+    for batch_start in range(start, end, INSERT_BATCH_SIZE):
+        batch_end = min(batch_start + INSERT_BATCH_SIZE, end)
+        await collection.insert_many([create_entry(index) for index in range(batch_start, batch_end)], ordered=False)
+
+
+async def _measure(lookup: Callable[[int], Awaitable], size: int) -> List[float]:
+    latencies = []
+    for _ in range(BENCHMARK_LOOKUPS):
+        index = randrange(size)
+        start = perf_counter()
+        await lookup(index)
+        latencies.append((perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+async def run_benchmark(db_url: str = environ.get("OPERANDI_DB_URL")) -> None:
+    database = AsyncIOMotorClient(db_url)[BENCHMARK_DB_NAME]
+    await database.client.drop_database(BENCHMARK_DB_NAME)
+    # Creates the collections together with their indexes
+    await db_initiate_database(db_url=db_url, db_name=BENCHMARK_DB_NAME)
+
+    lookups = {
+        "user account by email": lambda index: db_get_user_account_with_email(email=f"user_{index}@benchmark.org"),
+        "workspace by id": lambda index: db_get_workspace(workspace_id=f"workspace_{index}"),
+        "workflow job by id": lambda index: db_get_workflow_job(job_id=f"job_{index}"),
+        "hpc slurm job by workflow job id": lambda index: db_get_hpc_slurm_job(workflow_job_id=f"job_{index}"),
+        "workflow jobs of user in state": lambda index: db_list_workflow_jobs(
+            user_id=f"user_{index % USERS_AMOUNT}", job_state=StateJob.SUCCESS, limit=10),
+    }
+    filled = 0
+    try:
+        for size in BENCHMARK_SIZES:
+            print(f"Filling the collections up to {size} entries each")
+            await _fill_collection(database["user_accounts"], _user_account, filled, size)
+            await _fill_collection(database["workspaces"], _workspace, filled, size)
+            await _fill_collection(database["workflow_jobs"], _workflow_job, filled, size)
+            await _fill_collection(database["hpc_slurm_jobs"], _hpc_slurm_job, filled, size)
+            filled = size
+            for lookup_name, lookup in lookups.items():
+                latencies = await _measure(lookup, size)
+                p99 = latencies[int(len(latencies) * 0.99) - 1]
+                print(f"  {lookup_name:<35} median: {median(latencies):7.3f} ms, p99: {p99:7.3f} ms")
+    finally:
+        await database.client.drop_database(BENCHMARK_DB_NAME)
+
+
+if __name__ == "__main__":
+    run(run_benchmark())
@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+from pytest import raises
+
+from operandi_broker import job_status_reconciler
+from operandi_broker.job_status_reconciler import JobStatusReconciler
+from operandi_utils.constants import StateJob, StateWorkspace
+
+
+class _UnitOfWork:
+    def __init__(self, database=None):
+        self.database = database
+        self.staged = []
+        self.flushed = []
+
+    def stage_hpc_slurm_job_update(self, find_workflow_job_id, **kwargs):
+        self.staged.append(("hpc_slurm_job", kwargs))
+
+    def stage_workflow_job_update(self, find_job_id, **kwargs):
+        self.staged.append(("workflow_job", kwargs))
+
+    def stage_workspace_update(self, find_workspace_id, **kwargs):
+        self.staged.append(("workspace", kwargs))
+
+    def stage_processing_stats_increase(self, find_user_id, **kwargs):
+        self.staged.append(("processing_stats", kwargs))
+
+    def sync_flush(self):
+        if self.database:
+            self.database.apply(self.staged)
+        self.flushed.extend(self.staged)
+        self.staged = []
+
+
+class _Transfer:
+    def get_and_unpack_slurm_workspace(self, ocrd_workspace_dir, workflow_job_dir, slurm_job_id):
+        raise ConnectionError("Connection lost")
+
+
+def test_failed_result_download_is_rolled_back(monkeypatch):
+    guarded_updates = []
+    monkeypatch.setattr(
+        job_status_reconciler, "sync_db_update_workflow_job",
+        lambda find_job_id, expected_version, **kwargs: guarded_updates.append(kwargs))
+    monkeypatch.setattr(job_status_reconciler, "HPC_TRANSFER_STREAMING", False)
+    reconciler = JobStatusReconciler(db_url="", tunnel_port_executor=22, tunnel_port_transfer=22)
+    reconciler.db_changes = _UnitOfWork()
+    reconciler.hpc_executor = SimpleNamespace(check_slurm_job_state=lambda slurm_job_id: "COMPLETED")
+    reconciler.hpc_io_transfer = _Transfer()
+
+    hpc_slurm_job = SimpleNamespace(hpc_slurm_job_id="1", hpc_slurm_job_state="RUNNING")
+    workflow_job = SimpleNamespace(job_id="job_id", job_dir="job_dir", job_state=StateJob.RUNNING, version=3)
+    workspace = SimpleNamespace(
+        user_id="user_id", workspace_id="workspace_id", workspace_dir="workspace_dir", state=StateWorkspace.RUNNING)
+    with raises(ConnectionError):
+        reconciler._JobStatusReconciler__handle_hpc_and_workflow_states(
+            hpc_slurm_job_db=hpc_slurm_job, workflow_job_db=workflow_job, workspace_db=workspace)
+
+    # The job is not reported as succeeded before its results are downloaded
+    assert guarded_updates == [{"job_state": StateJob.TRANSFERRING_FROM_HPC}]
+    # The job and the workspace are back in their previous states, so the download is retried
+    assert reconciler.db_changes.flushed[-2:] == [
+        ("workspace", {"state": StateWorkspace.RUNNING}), ("workflow_job", {"job_state": StateJob.RUNNING})]
+
+
+class _Database:
+    def __init__(self):
+        self.workflow_job = SimpleNamespace(
+            job_id="job_id", job_dir="job_dir", workspace_id="workspace_id", job_state=StateJob.RUNNING, version=3)
+        self.workspace = SimpleNamespace(
+            user_id="user_id", workspace_id="workspace_id", workspace_dir="workspace_dir", pages_amount=1,
+            workspace_mets_path="workspace_dir/mets.xml", mets_basename="mets.xml", state=StateWorkspace.RUNNING)
+
+    def update_workflow_job(self, find_job_id, expected_version, job_state):
+        assert self.workflow_job.version == expected_version
+        self.workflow_job.job_state = job_state
+        self.workflow_job.version += 1
+
+    def apply(self, staged):
+        for collection, kwargs in staged:
+            if collection == "workflow_job":
+                self.workflow_job.job_state = kwargs["job_state"]
+            if collection == "workspace":
+                self.workspace.state = kwargs["state"]
+
+
+class _KilledTransfer:
+    def __init__(self):
+        self.downloads = 0
+
+    def get_and_unpack_slurm_workspace(self, ocrd_workspace_dir, workflow_job_dir, slurm_job_id):
+        self.downloads += 1
+        if self.downloads == 1:
+            # Raised by the signal handler of the reconciler when the broker stops it
+            raise SystemExit(0)
+
+    def download_slurm_job_log_file(self, slurm_job_id, job_dir):
+        pass
+
+
+def test_download_interrupted_by_process_exit_is_retried(monkeypatch):
+    database = _Database()
+    monkeypatch.setattr(job_status_reconciler, "sync_db_update_workflow_job", database.update_workflow_job)
+    monkeypatch.setattr(
+        job_status_reconciler, "sync_db_get_workflow_jobs_in_states",
+        lambda job_states: [database.workflow_job] if database.workflow_job.job_state in job_states else [])
+    monkeypatch.setattr(job_status_reconciler, "sync_db_get_workspace", lambda workspace_id: database.workspace)
+    monkeypatch.setattr(
+        job_status_reconciler, "sync_db_get_hpc_slurm_job",
+        lambda workflow_job_id: SimpleNamespace(hpc_slurm_job_id="1", hpc_slurm_job_state="COMPLETED"))
+    monkeypatch.setattr(job_status_reconciler, "HPC_TRANSFER_STREAMING", False)
+    transfer = _KilledTransfer()
+
+    def start_reconciler():
+        reconciler = JobStatusReconciler(db_url="", tunnel_port_executor=22, tunnel_port_transfer=22)
+        reconciler.db_changes = _UnitOfWork(database)
+        reconciler.hpc_executor = SimpleNamespace(check_slurm_job_state=lambda slurm_job_id: "COMPLETED")
+        reconciler.hpc_io_transfer = transfer
+        return reconciler
+
+    with raises(SystemExit):
+        start_reconciler().reconcile_once()
+    # No rollback runs when the process exits, the job is left in the transferring state
+    assert database.workflow_job.job_state == StateJob.TRANSFERRING_FROM_HPC
+    assert database.workspace.state == StateWorkspace.TRANSFERRING_FROM_HPC
+
+    # The restarted reconciler downloads the results again
+    start_reconciler().reconcile_once()
+    assert transfer.downloads == 2
+    assert database.workflow_job.job_state == StateJob.SUCCESS
+    assert database.workspace.state == StateWorkspace.READY
@@ -0,0 +1,31 @@
+from os.path import exists, join
+from pathlib import Path
+from types import SimpleNamespace
+
+from pytest import raises
+
+from operandi_broker import workspace_import_worker
+from operandi_broker.workspace_import_worker import WorkspaceImportWorker
+
+
+def test_failed_import_removes_workspace_dir(monkeypatch, tmp_path):
+    workspace_dir = join(tmp_path, "workspace_id")
+
+    def create_bag(bag_dest, **kwargs):
+        Path(bag_dest).write_text("bag")
+        return join(tmp_path, "temp_workspace")
+
+    def ingest_bag(bag_dest, workspace_dir):
+        # The workspace directory is partially created before the ingest fails
+        Path(workspace_dir, "OCR-D-IMG").mkdir(parents=True)
+        raise ValueError("Invalid bag")
+
+    monkeypatch.setattr(workspace_import_worker, "create_workspace_bag_from_remote_url", create_bag)
+    monkeypatch.setattr(workspace_import_worker, "ingest_workspace_bag", ingest_bag)
+    worker = WorkspaceImportWorker(db_url="", rabbitmq_url="", queue_name="queue_name")
+    db_workspace = SimpleNamespace(workspace_id="workspace_id", workspace_dir=workspace_dir, user_id="user_id")
+    with raises(ValueError):
+        worker._WorkspaceImportWorker__import_workspace(
+            db_workspace=db_workspace, mets_url="mets_url", mets_basename="mets.xml", preserve_file_grps=[])
+    assert not exists(workspace_dir)
+    assert not exists(f"{workspace_dir}.zip")
@@ -117,6 +117,31 @@ def _test_running_workflow_job_status():
     pass
 
 
+def test_post_workflow_jobs_batch_non_existing_workspaces(operandi, auth, bytes_template_workflow):
+    response = operandi.post(url="/workflow", files={"nextflow_script": bytes_template_workflow}, auth=auth)
+    assert_response_status_code(response.status_code, expected_floor=2)
+    workflow_id = response.json()['resource_id']
+    submissions = [
+        {"workflow_args": {"workspace_id": "non_existing_workspace_id_1"}},
+        {"workflow_args": {"workspace_id": "non_existing_workspace_id_2"}, "sbatch_args": {"cpus": 8}}
+    ]
+    response = operandi.post(url=f"/workflow/{workflow_id}/batch", json=submissions, auth=auth)
+    assert_response_status_code(response.status_code, expected_floor=2)
+    results = response.json()
+    assert [result["workspace_id"] for result in results] == [
+        "non_existing_workspace_id_1", "non_existing_workspace_id_2"]
+    assert [result["status_code"] for result in results] == [404, 404]
+
+
+def test_post_workflow_jobs_status_query(operandi, auth):
+    response = operandi.post(
+        url="/workflow-jobs/status", json={"job_ids": ["non_existing_job_id_1", "non_existing_job_id_2"]}, auth=auth)
+    assert_response_status_code(response.status_code, expected_floor=2)
+    assert response.json() == []
+    response = operandi.post(url="/workflow-jobs/status", json={"cursor": "invalid_cursor"}, auth=auth)
+    assert_response_status_code(response.status_code, expected_floor=4)
+
+
 # Added by Faizan
 def test_convert_txt_to_nextflow_success(operandi, auth):
     """
@@ -23,6 +23,8 @@ def _test_post_workspace_url(operandi, auth, db_workspaces):
     )
     response = operandi.post(url=req_url, auth=auth)
     assert_response_status_code(response.status_code, expected_floor=2)
+    # The import runs in the background, the workspace is returned right away
+    assert response.json()["state"] == "IMPORTING"
     workspace_id = response.json()['resource_id']
     assert_local_dir_workspace(workspace_id)
     db_workspace = db_workspaces.find_one({"workspace_id": workspace_id})
@@ -143,6 +145,23 @@ def test_get_workspace_non_existing(operandi, auth):
     assert_response_status_code(response.status_code, expected_floor=4)
 
 
+def test_list_workspaces_paginated(operandi, auth, bytes_dummy_workspace):
+    for _ in range(2):
+        response = operandi.post(url="/workspace", files={"workspace": bytes_dummy_workspace}, auth=auth)
+        assert_response_status_code(response.status_code, expected_floor=2)
+    response = operandi.get(url="/workspace?limit=1", auth=auth)
+    assert_response_status_code(response.status_code, expected_floor=2)
+    assert len(response.json()) == 1
+    cursor = response.headers.get("X-Next-Cursor")
+    assert cursor, "Expected a next page cursor"
+    first_workspace_id = response.json()[0]["resource_id"]
+    response = operandi.get(url=f"/workspace?limit=1&cursor={cursor}", auth=auth)
+    assert_response_status_code(response.status_code, expected_floor=2)
+    assert response.json()[0]["resource_id"] != first_workspace_id
+    response = operandi.get(url="/workspace?cursor=invalid_cursor", auth=auth)
+    assert_response_status_code(response.status_code, expected_floor=4)
+
+
 def test_delete_file_groups(operandi, auth, db_workspaces, bytes_dummy_workspace):
     response = operandi.post(url="/workspace", files={"workspace": bytes_dummy_workspace}, auth=auth)
     assert_response_status_code(response.status_code, expected_floor=2)
@@ -0,0 +1,32 @@
+from asyncio import create_task, run, sleep
+
+from operandi_utils.constants import StateJob
+from operandi_server.job_state_hub import JobStateHub
+
+
+def test_job_state_hub_delivers_only_changes():
+    async def watch_job():
+        job_state_hub = JobStateHub()
+        async with job_state_hub.subscribe(job_id="job-1", last_state=StateJob.PENDING) as job_states:
+            job_state_hub._deliver(job_id="job-1", job_state=StateJob.PENDING)
+            job_state_hub._deliver(job_id="job-2", job_state=StateJob.FAILED)
+            job_state_hub._deliver(job_id="job-1", job_state=StateJob.RUNNING)
+            job_state_hub._deliver(job_id="job-1", job_state=StateJob.RUNNING)
+            job_state_hub._deliver(job_id="job-1", job_state=StateJob.SUCCESS)
+            delivered = [job_states.get_nowait() for _ in range(job_states.qsize())]
+        return delivered, job_state_hub._subscriptions
+    delivered, subscriptions = run(watch_job())
+    assert delivered == [StateJob.RUNNING, StateJob.SUCCESS]
+    assert subscriptions == {}
+
+
+def test_job_state_hub_wait_for_change():
+    async def wait_for_changes():
+        job_state_hub = JobStateHub()
+        assert not await job_state_hub.wait_for_change(job_id="job-1", last_state=StateJob.PENDING, timeout=0.1)
+        waiting = create_task(
+            job_state_hub.wait_for_change(job_id="job-1", last_state=StateJob.PENDING, timeout=5))
+        await sleep(0.1)
+        job_state_hub._deliver(job_id="job-1", job_state=StateJob.RUNNING)
+        return await waiting
+    assert run(wait_for_changes()) == StateJob.RUNNING
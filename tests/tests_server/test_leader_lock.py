@@ -0,0 +1,69 @@
+from asyncio import run
+
+from pytest import raises
+
+from operandi_server import leader_lock
+from operandi_server.leader_lock import ServerLeaderLock
+
+
+def test_leader_lock_runs_startup_work_once(monkeypatch):
+    lock_owners = {}
+
+    async def acquire_server_lock(lock_name: str, owner_id: str, ttl: float) -> bool:
+        return lock_owners.setdefault(lock_name, owner_id) == owner_id
+
+    async def release_server_lock(lock_name: str, owner_id: str) -> bool:
+        return lock_owners.pop(lock_name, None) == owner_id
+
+    monkeypatch.setattr(leader_lock, "db_acquire_server_lock", acquire_server_lock)
+    monkeypatch.setattr(leader_lock, "db_release_server_lock", release_server_lock)
+
+    async def start_and_stop_processes():
+        elections = []
+
+        async def on_elected():
+            elections.append(True)
+        process_locks = [ServerLeaderLock(on_elected=on_elected, lock_name="test_lock") for _ in range(3)]
+        for process_lock in process_locks:
+            await process_lock.start()
+        assert elections == [True]
+        assert [process_lock.is_leader for process_lock in process_locks] == [True, False, False]
+        # Another process takes over once the leader released the lock
+        await process_locks[0].stop()
+        await process_locks[1]._try_acquire()
+        assert process_locks[1].is_leader and len(elections) == 2
+        for process_lock in process_locks[1:]:
+            await process_lock.stop()
+        assert not lock_owners
+    run(start_and_stop_processes())
+
+
+def test_leader_lock_released_when_startup_work_fails(monkeypatch):
+    lock_owners = {}
+
+    async def acquire_server_lock(lock_name: str, owner_id: str, ttl: float) -> bool:
+        return lock_owners.setdefault(lock_name, owner_id) == owner_id
+
+    async def release_server_lock(lock_name: str, owner_id: str) -> bool:
+        return lock_owners.pop(lock_name, None) == owner_id
+
+    monkeypatch.setattr(leader_lock, "db_acquire_server_lock", acquire_server_lock)
+    monkeypatch.setattr(leader_lock, "db_release_server_lock", release_server_lock)
+
+    async def fail_and_retry_startup_work():
+        elections = []
+
+        async def on_elected():
+            elections.append(True)
+            if len(elections) == 1:
+                raise ConnectionError("Database connection lost")
+        failing_lock = ServerLeaderLock(on_elected=on_elected, lock_name="test_lock")
+        with raises(ConnectionError):
+            await failing_lock._try_acquire()
+        assert not failing_lock.is_leader and not lock_owners
+        # The next process acquiring the lock retries the startup work
+        process_lock = ServerLeaderLock(on_elected=on_elected, lock_name="test_lock")
+        await process_lock._try_acquire()
+        assert process_lock.is_leader and len(elections) == 2
+        await process_lock.stop()
+    run(fail_and_retry_startup_work())
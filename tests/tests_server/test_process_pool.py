@@ -0,0 +1,76 @@
+from asyncio import CancelledError, create_task, gather, run, sleep as asyncio_sleep
+from os.path import exists
+from subprocess import Popen
+from time import monotonic, sleep
+
+from pytest import raises
+
+from operandi_server.exceptions import ServerTaskTimeoutError, WorkspaceNotValidException
+from operandi_server.process_pool import ServerProcessPool
+from operandi_server.routers.workspace_utils import validate_bag
+
+
+def test_process_pool_runs_workspace_operations(path_small_workspace):
+    async def run_tasks():
+        process_pool = ServerProcessPool(max_concurrent_tasks=2)
+        await process_pool.run(validate_bag, path_small_workspace, processes=2)
+        with raises(WorkspaceNotValidException):
+            await process_pool.run(validate_bag, __file__)
+        return await gather(*[process_pool.run(max, index, 1) for index in range(4)])
+    assert run(run_tasks()) == [1, 1, 2, 3]
+
+
+def test_process_pool_task_timeout():
+    async def run_task():
+        process_pool = ServerProcessPool(max_concurrent_tasks=1)
+        await process_pool.run(sleep, 10, task_timeout=0.5)
+    with raises(ServerTaskTimeoutError):
+        run(run_task())
+
+
+def test_process_pool_kills_cancelled_task():
+    async def cancel_task():
+        process_pool = ServerProcessPool(max_concurrent_tasks=1)
+        task = create_task(process_pool.run(sleep, 10))
+        await asyncio_sleep(0.5)
+        task.cancel()
+        start_time = monotonic()
+        with raises(CancelledError):
+            await task
+        # The task process is killed instead of being waited for, so the slot is free again right away
+        assert monotonic() - start_time < 5
+        return await process_pool.run(max, 1, 2)
+    assert run(cancel_task()) == 2
+
+
+def _spawn_and_sleep(pid_path: str) -> None:
+    child_process = Popen(["sleep", "30"])
+    with open(pid_path, mode="w") as pid_fp:
+        pid_fp.write(str(child_process.pid))
+    sleep(30)
+
+
+def _is_process_running(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as stat_fp:
+            # Killed processes which are not reaped yet are zombies
+            return stat_fp.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_process_pool_kills_processes_spawned_by_task(tmp_path):
+    pid_path = str(tmp_path / "child.pid")
+
+    async def run_task():
+        process_pool = ServerProcessPool(max_concurrent_tasks=1)
+        await process_pool.run(_spawn_and_sleep, pid_path, task_timeout=2)
+    with raises(ServerTaskTimeoutError):
+        run(run_task())
+    assert exists(pid_path)
+    with open(pid_path) as pid_fp:
+        child_pid = int(pid_fp.read())
+    start_time = monotonic()
+    while _is_process_running(child_pid) and monotonic() - start_time < 5:
+        sleep(0.1)
+    assert not _is_process_running(child_pid)
@@ -0,0 +1,45 @@
+from asyncio import run
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from operandi_server.constants import PRODUCTION_WORKFLOWS_USER_ID
+from operandi_server.routers import workflow
+from operandi_server.routers.workflow import RouterWorkflow
+
+
+def test_insert_production_workflows_registers_changed_scripts_only(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPERANDI_SERVER_BASE_DIR", str(tmp_path / "server"))
+    workflows_dir = tmp_path / "nextflow_workflows"
+    workflows_dir.mkdir()
+    (workflows_dir / "workflow1.nf").write_text("params.mets_socket = null")
+    (workflows_dir / "workflow2.nf").write_text("params.mets_path = null")
+    (workflows_dir / "readme.txt").write_text("Not a workflow")
+    db_workflows = {}
+
+    async def get_workflows(workflow_ids):
+        return [db_workflows[workflow_id] for workflow_id in workflow_ids if workflow_id in db_workflows]
+
+    async def upsert_workflows(workflows):
+        for entry in workflows:
+            db_workflow = db_workflows.get(entry["workflow_id"], None)
+            script_version = db_workflow.workflow_script_version + 1 if db_workflow else 1
+            db_workflows[entry["workflow_id"]] = SimpleNamespace(
+                **entry, deleted=False, workflow_script_version=script_version)
+        return len(workflows)
+
+    monkeypatch.setattr(workflow, "db_get_workflows", get_workflows)
+    monkeypatch.setattr(workflow, "db_upsert_workflows", MagicMock(side_effect=upsert_workflows))
+    router = RouterWorkflow(MagicMock(), MagicMock(), MagicMock(), MagicMock())
+
+    run(router.insert_production_workflows(production_workflows_dir=workflows_dir))
+    assert sorted(db_workflows.keys()) == ["workflow1", "workflow2"]
+    assert db_workflows["workflow1"].uses_mets_server and not db_workflows["workflow2"].uses_mets_server
+    assert db_workflows["workflow1"].user_id == PRODUCTION_WORKFLOWS_USER_ID
+
+    (workflows_dir / "workflow2.nf").write_text("params.mets_socket = null")
+    run(router.insert_production_workflows(production_workflows_dir=workflows_dir))
+    changed_workflows = workflow.db_upsert_workflows.call_args.kwargs["workflows"]
+    assert [entry["workflow_id"] for entry in changed_workflows] == ["workflow2"]
+    assert db_workflows["workflow1"].workflow_script_version == 1
+    assert db_workflows["workflow2"].workflow_script_version == 2
+    assert db_workflows["workflow2"].uses_mets_server
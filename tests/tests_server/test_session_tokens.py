@@ -0,0 +1,79 @@
+from asyncio import run
+from time import monotonic
+from types import SimpleNamespace
+
+from pytest import raises
+
+from operandi_utils.constants import AccountType
+from operandi_server.exceptions import AuthenticationError
+from operandi_server.models import PYUserAction
+from operandi_server import session_tokens as session_tokens_module
+from operandi_server.session_tokens import SessionTokenManager
+
+
+class _UserAccount:
+    user_id = "test_user_id"
+
+
+def test_session_token_rejects_forged_and_expired_tokens():
+    session_tokens = SessionTokenManager(secret="test_secret")
+    token, expires_in = session_tokens.issue_token(_UserAccount())
+    assert expires_in == session_tokens.token_ttl
+    payload, signature = token.split(".")
+    with raises(AuthenticationError):
+        run(session_tokens.verify_token(f"{payload}.{signature[::-1]}"))
+    with raises(AuthenticationError):
+        run(SessionTokenManager(secret="another_secret").verify_token(token))
+    with raises(AuthenticationError):
+        run(session_tokens.verify_token("not_a_token"))
+    expired_token, _ = SessionTokenManager(secret="test_secret", token_ttl=-1).issue_token(_UserAccount())
+    with raises(AuthenticationError):
+        run(session_tokens.verify_token(expired_token))
+
+
+def test_session_token_verified_from_cache(monkeypatch):
+    async def get_user_account_version(user_id):
+        raise AssertionError("The version of a recently checked account must not be read again")
+
+    async def get_user_account(user_id):
+        raise AssertionError("The cached account must not be read again")
+
+    monkeypatch.setattr(session_tokens_module, "db_get_user_account_version", get_user_account_version)
+    monkeypatch.setattr(session_tokens_module, "db_get_user_account", get_user_account)
+    session_tokens = SessionTokenManager(secret="test_secret", cache_max_size=1)
+    token, _ = session_tokens.issue_token(_UserAccount())
+    py_user_action = PYUserAction(
+        institution_id="test_institution", user_id="test_user_id", email="test@example.com",
+        account_type=AccountType.USER, details="Test account", action="Successfully logged!")
+    session_tokens._verified_accounts["test_user_id"] = (py_user_action, 1, monotonic(), monotonic())
+    assert run(session_tokens.verify_token(token)) == py_user_action
+    session_tokens.invalidate("test_user_id")
+    assert "test_user_id" not in session_tokens._verified_accounts
+
+
+def test_session_token_rejects_account_revoked_by_another_process(monkeypatch):
+    # Another process of the server revoked the approval, which incremented the version of the entry
+    revoked_account = SimpleNamespace(
+        institution_id="test_institution", user_id="test_user_id", email="test@example.com",
+        account_type=AccountType.USER, details="Test account", approved_user=False, deleted=False, version=2)
+
+    async def get_user_account_version(user_id):
+        return revoked_account.version
+
+    async def get_user_account(user_id):
+        return revoked_account
+
+    monkeypatch.setattr(session_tokens_module, "db_get_user_account_version", get_user_account_version)
+    monkeypatch.setattr(session_tokens_module, "db_get_user_account", get_user_account)
+    session_tokens = SessionTokenManager(secret="test_secret", version_check_interval=5)
+    token, _ = session_tokens.issue_token(_UserAccount())
+    py_user_action = PYUserAction(
+        institution_id="test_institution", user_id="test_user_id", email="test@example.com",
+        account_type=AccountType.USER, details="Test account", action="Successfully logged!")
+    # The revocation is not seen before the version check interval has passed
+    session_tokens._verified_accounts["test_user_id"] = (py_user_action, 1, monotonic(), monotonic())
+    assert run(session_tokens.verify_token(token)) == py_user_action
+    session_tokens._verified_accounts["test_user_id"] = (py_user_action, 1, monotonic(), monotonic() - 5)
+    with raises(AuthenticationError):
+        run(session_tokens.verify_token(token))
+    assert "test_user_id" not in session_tokens._verified_accounts
@@ -0,0 +1,36 @@
+from asyncio import run
+
+from pika.frame import Method
+from pika.spec import Basic
+
+from operandi_utils.rabbitmq.async_publisher import _ConfirmChannel
+
+
+class _Channel:
+    def __init__(self):
+        self.published = []
+        self.on_close_callback = None
+
+    def add_on_close_callback(self, callback):
+        self.on_close_callback = callback
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.published.append(body)
+
+
+def test_confirm_channel_resolves_multiple_acks_and_nacks():
+    async def publish_and_confirm():
+        confirm_channel = _ConfirmChannel(_Channel())
+        confirmations = [
+            confirm_channel.publish(exchange_name="", routing_key="queue", message=b"message", properties=None)
+            for _ in range(4)
+        ]
+        confirm_channel.on_confirmation(Method(1, Basic.Ack(delivery_tag=2, multiple=True)))
+        confirm_channel.on_confirmation(Method(1, Basic.Nack(delivery_tag=3, multiple=False)))
+        assert [confirmation.done() for confirmation in confirmations] == [True, True, True, False]
+        assert confirmations[0].exception() is None and confirmations[1].exception() is None
+        assert isinstance(confirmations[2].exception(), ConnectionError)
+        confirm_channel.channel.on_close_callback(confirm_channel.channel, "Channel closed")
+        assert isinstance(confirmations[3].exception(), ConnectionError)
+        assert not confirm_channel.unconfirmed
+    run(publish_and_confirm())
@@ -0,0 +1,35 @@
+from os.path import exists
+
+from pytest import raises
+
+from operandi_utils.oton import oton_cache
+from operandi_utils.oton.oton_cache import OTONConversionCache
+
+INPUT_OCRD_PROCESS_WORKFLOW = 'tests/assets/workflows_oton/workflow1.txt'
+
+
+def test_oton_cache_converts_each_workflow_once(tmp_path, monkeypatch):
+    with open(INPUT_OCRD_PROCESS_WORKFLOW, mode="rb") as fp:
+        ocrd_workflow = fp.read()
+    cache = OTONConversionCache(cache_dir=str(tmp_path), max_entries=1)
+    nf_script_local = cache.convert(ocrd_workflow, environment="local")
+    assert exists(nf_script_local)
+    # Only the converted script is left in the cache directory
+    assert [path.name for path in tmp_path.iterdir()] == [nf_script_local.split("/")[-1]]
+
+    class FailingConverter:
+        def __init__(self):
+            raise AssertionError("The cached conversion was converted again")
+    monkeypatch.setattr(oton_cache, "OTONConverter", FailingConverter)
+    assert cache.convert(ocrd_workflow, environment="local") == nf_script_local
+    monkeypatch.undo()
+
+    nf_script_docker = cache.convert(ocrd_workflow, environment="docker")
+    assert nf_script_docker != nf_script_local
+    # The least recently used script is evicted
+    assert not exists(nf_script_local) and exists(nf_script_docker)
+    with raises(ValueError):
+        cache.convert(ocrd_workflow, environment="unknown")
+    with raises(ValueError):
+        cache.convert(b"not an ocrd process workflow", environment="local")
+    assert [path.name for path in tmp_path.iterdir()] == [nf_script_docker.split("/")[-1]]
@@ -0,0 +1,75 @@
+from os import utime
+from os.path import getsize, join
+from re import fullmatch
+from time import time_ns
+from types import SimpleNamespace
+from zipfile import ZipFile
+
+from ocrd import Resolver
+from ocrd.workspace_bagger import WorkspaceBagger
+from ocrd_validators.ocrd_zip_validator import OcrdZipValidator
+
+from operandi_utils.bagging import stream_workspace_bag, WorkspaceBagCache
+
+
+def _spill_workspace(path_workspace_zip: str, workspace_dir: str) -> SimpleNamespace:
+    WorkspaceBagger(Resolver()).spill(path_workspace_zip, workspace_dir)
+    return SimpleNamespace(
+        workspace_id="test_workspace", workspace_dir=workspace_dir, mets_basename="mets.xml",
+        workspace_mets_path=join(workspace_dir, "mets.xml"), ocrd_identifier="test_workspace",
+        ocrd_base_version_checksum=None)
+
+
+def test_stream_workspace_bag_is_valid(tmp_path, path_dummy_workspace):
+    db_workspace = _spill_workspace(path_dummy_workspace, str(tmp_path / "workspace"))
+    bag_path = str(tmp_path / "streamed.ocrd.zip")
+    with open(bag_path, mode="wb") as bag_fp:
+        for chunk in stream_workspace_bag(db_workspace, chunk_size=1024):
+            bag_fp.write(chunk)
+    report = OcrdZipValidator(Resolver(), bag_path).validate(processes=1)
+    assert report.is_valid, report.to_xml()
+    # Both manifests separate the checksum and the path with two spaces
+    with ZipFile(bag_path, mode="r") as bag_zip:
+        for manifest_name in ["manifest-sha512.txt", "tagmanifest-sha512.txt"]:
+            for line in bag_zip.read(manifest_name).decode("utf-8").splitlines():
+                assert fullmatch(r"[0-9a-f]{128}  \S.*", line), line
+
+
+def test_bag_cache_hit_and_invalidation(tmp_path, path_dummy_workspace):
+    db_workspace = _spill_workspace(path_dummy_workspace, str(tmp_path / "workspace"))
+    mets_path = db_workspace.workspace_mets_path
+    bag_cache = WorkspaceBagCache(cache_dir=str(tmp_path / "cache"))
+    assert not bag_cache.get("test_workspace", mets_path)
+
+    # An interrupted stream must not be cached
+    bag_stream = bag_cache.tee("test_workspace", mets_path, stream_workspace_bag(db_workspace))
+    next(bag_stream)
+    bag_stream.close()
+    assert not bag_cache.get("test_workspace", mets_path)
+
+    streamed_bytes = b"".join(bag_cache.tee("test_workspace", mets_path, stream_workspace_bag(db_workspace)))
+    bag_path = bag_cache.get("test_workspace", mets_path)
+    assert bag_path
+    with open(bag_path, mode="rb") as bag_fp:
+        assert bag_fp.read() == streamed_bytes
+
+    # Modifying the METS file makes the cached bag unreachable
+    utime(mets_path, ns=(time_ns(), time_ns()))
+    assert not bag_cache.get("test_workspace", mets_path)
+    assert bag_cache.put("test_workspace", mets_path, stream_workspace_bag(db_workspace))
+    bag_cache.invalidate("test_workspace")
+    assert not bag_cache.get("test_workspace", mets_path)
+
+
+def test_bag_cache_evicts_least_recently_used(tmp_path, path_dummy_workspace):
+    db_workspace = _spill_workspace(path_dummy_workspace, str(tmp_path / "workspace"))
+    mets_path = db_workspace.workspace_mets_path
+    bag_cache = WorkspaceBagCache(cache_dir=str(tmp_path / "cache"))
+    bag_path_1 = bag_cache.put("test_workspace_1", mets_path, stream_workspace_bag(db_workspace))
+    bag_cache.put("test_workspace_2", mets_path, stream_workspace_bag(db_workspace))
+    # Mark the first bag as the most recently used one
+    utime(bag_path_1, ns=(time_ns(), time_ns() + 10 ** 9))
+    bag_cache.max_size = getsize(bag_path_1)
+    bag_cache.evict()
+    assert bag_cache.get("test_workspace_1", mets_path)
+    assert not bag_cache.get("test_workspace_2", mets_path)
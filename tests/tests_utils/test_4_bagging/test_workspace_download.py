@@ -0,0 +1,85 @@
+from filecmp import cmp
+from hashlib import sha256
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from os.path import join
+from threading import Thread
+
+from lxml import etree
+from ocrd import Resolver
+from ocrd_models.constants import NAMESPACES
+from pytest import fixture, raises
+
+from operandi_utils.bagging import download_workspace_files
+
+
+class FlakyRequestHandler(SimpleHTTPRequestHandler):
+    # Paths which already failed once, each file is served on the second request
+    failed_paths = set()
+
+    def do_GET(self):
+        if self.path not in self.failed_paths:
+            self.failed_paths.add(self.path)
+            self.send_error(503)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@fixture(name="remote_small_workspace_url")
+def fixture_remote_small_workspace_url(path_small_workspace_data_dir):
+    def handler(*args, **kwargs):
+        return FlakyRequestHandler(*args, directory=path_small_workspace_data_dir, **kwargs)
+    FlakyRequestHandler.failed_paths = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def create_remote_workspace(tmp_path, data_dir: str, base_url: str, checksum: str = None):
+    resolver = Resolver()
+    workspace = resolver.workspace_from_url(
+        mets_url=join(data_dir, "mets.xml"), dst_dir=join(tmp_path, "workspace"), clobber_mets=True, download=False)
+    for group in workspace.mets.file_groups:
+        if group != "DEFAULT":
+            workspace.remove_file_group(group, recursive=True, force=True)
+    checksums = {}
+    for ws_file in workspace.find_files():
+        local_filename = ws_file.local_filename
+        ws_file.url = f"{base_url}/{local_filename}"
+        with open(join(data_dir, local_filename), mode="rb") as file_fp:
+            checksums[ws_file.ID] = checksum or sha256(file_fp.read()).hexdigest()
+    workspace.save_mets()
+    # The checksum attributes of mets:file are set in the METS document, OcrdFile does not expose them
+    mets_tree = etree.parse(workspace.mets_target)
+    for file_el in mets_tree.iterfind(".//mets:file", namespaces=NAMESPACES):
+        file_el.set("CHECKSUM", checksums[file_el.get("ID")])
+        file_el.set("CHECKSUMTYPE", "SHA-256")
+    mets_tree.write(workspace.mets_target, xml_declaration=True, encoding="utf-8")
+    return resolver.workspace_from_url(mets_url=workspace.mets_target, download=False)
+
+
+def test_download_workspace_files(tmp_path, path_small_workspace_data_dir, remote_small_workspace_url):
+    workspace = create_remote_workspace(tmp_path, path_small_workspace_data_dir, remote_small_workspace_url)
+    progress = []
+    download_workspace_files(
+        workspace, max_connections_per_host=2, backoff_factor=0,
+        progress_callback=lambda fetched, total: progress.append((fetched, total)))
+    assert progress == [(fetched, 8) for fetched in range(9)]
+    ws_files = list(workspace.find_files())
+    assert len(ws_files) == 8
+    for ws_file in ws_files:
+        downloaded_path = join(workspace.directory, ws_file.local_filename)
+        assert cmp(downloaded_path, join(path_small_workspace_data_dir, ws_file.local_filename), shallow=False)
+
+
+def test_download_workspace_files_checksum_mismatch(
+    tmp_path, path_small_workspace_data_dir, remote_small_workspace_url
+):
+    workspace = create_remote_workspace(
+        tmp_path, path_small_workspace_data_dir, remote_small_workspace_url, checksum="0" * 64)
+    with raises(ValueError, match="Checksum mismatch"):
+        download_workspace_files(workspace, retries=1, backoff_factor=0)
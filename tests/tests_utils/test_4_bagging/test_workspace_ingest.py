@@ -0,0 +1,67 @@
+from hashlib import sha512
+from os import listdir
+from os.path import join
+from zipfile import ZipFile
+
+from pytest import raises
+
+from operandi_utils.bagging import ingest_workspace_bag, WorkspaceBagNotValidError
+
+
+def test_ingest_workspace_bag(tmp_path, path_ws_different_mets):
+    workspace_dir = join(tmp_path, "workspace")
+    bag_info, pages_amount, file_groups = ingest_workspace_bag(path_ws_different_mets, workspace_dir)
+    assert bag_info["Ocrd-Mets"] == "test-workspace-mets.xml"
+    assert pages_amount == 1
+    assert file_groups == ["OCR-D-IMG"]
+    assert "test-workspace-mets.xml" in listdir(workspace_dir)
+    # The staging directory is removed after the ingest
+    assert listdir(tmp_path) == ["workspace"]
+
+
+def test_ingest_workspace_bag_checksum_mismatch(tmp_path, path_small_workspace):
+    corrupted_bag = join(tmp_path, "corrupted.ocrd.zip")
+    with ZipFile(path_small_workspace, mode="r") as src_fp, ZipFile(corrupted_bag, mode="w") as dst_fp:
+        for entry in src_fp.infolist():
+            content = src_fp.read(entry)
+            if entry.filename.endswith(".jpg"):
+                content = bytes([content[0] ^ 1]) + content[1:]
+            dst_fp.writestr(entry, content)
+    workspace_dir = join(tmp_path, "workspace")
+    with raises(WorkspaceBagNotValidError):
+        ingest_workspace_bag(corrupted_bag, workspace_dir)
+    assert listdir(tmp_path) == ["corrupted.ocrd.zip"]
+
+
+def _rewrite_bag(src_bag: str, dst_bag: str, replaced_entries: dict) -> None:
+    with ZipFile(src_bag, mode="r") as src_fp, ZipFile(dst_bag, mode="w") as dst_fp:
+        for entry in src_fp.infolist():
+            dst_fp.writestr(entry, replaced_entries.pop(entry.filename, None) or src_fp.read(entry))
+        for entry_name, content in replaced_entries.items():
+            dst_fp.writestr(entry_name, content)
+
+
+def test_ingest_workspace_bag_unsupported_algorithm(tmp_path, path_small_workspace):
+    invalid_bag = join(tmp_path, "invalid.ocrd.zip")
+    _rewrite_bag(path_small_workspace, invalid_bag, {"manifest-foo.txt": b""})
+    with raises(WorkspaceBagNotValidError, match="manifest-foo.txt"):
+        ingest_workspace_bag(invalid_bag, join(tmp_path, "workspace"))
+
+
+def test_ingest_workspace_bag_malformed_mets(tmp_path, path_small_workspace):
+    with ZipFile(path_small_workspace, mode="r") as src_fp:
+        mets = src_fp.read("data/mets.xml")
+        payload_manifest = src_fp.read("manifest-sha512.txt")
+        tag_manifest = src_fp.read("tagmanifest-sha512.txt")
+    # Same size as the valid METS file, so only the manifests have to be updated
+    malformed_mets = b"<" + b"x" * (len(mets) - 1)
+    updated_payload_manifest = payload_manifest.replace(
+        sha512(mets).hexdigest().encode(), sha512(malformed_mets).hexdigest().encode())
+    tag_manifest = tag_manifest.replace(
+        sha512(payload_manifest).hexdigest().encode(), sha512(updated_payload_manifest).hexdigest().encode())
+    invalid_bag = join(tmp_path, "invalid.ocrd.zip")
+    _rewrite_bag(path_small_workspace, invalid_bag, {
+        "data/mets.xml": malformed_mets, "manifest-sha512.txt": updated_payload_manifest,
+        "tagmanifest-sha512.txt": tag_manifest})
+    with raises(WorkspaceBagNotValidError, match="METS"):
+        ingest_workspace_bag(invalid_bag, join(tmp_path, "workspace"))
@@ -0,0 +1,23 @@
+from asyncio import get_running_loop, run, sleep
+from threading import current_thread
+
+from operandi_utils import call_sync
+
+
+@call_sync
+async def sync_get_running_loop():
+    await sleep(0)
+    return get_running_loop(), current_thread().name
+
+
+def test_call_sync_reuses_the_same_event_loop():
+    loop, thread_name = sync_get_running_loop()
+    assert sync_get_running_loop() == (loop, thread_name)
+    assert thread_name == "operandi_sync_event_loop"
+    assert loop.is_running()
+
+
+def test_call_sync_from_running_event_loop():
+    async def call_from_coroutine():
+        return sync_get_running_loop()
+    assert run(call_from_coroutine()) == sync_get_running_loop()
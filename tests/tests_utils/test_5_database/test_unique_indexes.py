@@ -0,0 +1,46 @@
+from asyncio import run
+from logging import getLogger
+
+from operandi_utils.database.base import db_create_unique_indexes
+
+
+class _Collection:
+    def __init__(self, name, values):
+        self.name = name
+        self.values = values
+        self.indexes = {}
+
+    async def index_information(self):
+        return self.indexes
+
+    async def _aggregate(self, pipeline):
+        counts = {}
+        for value in self.values:
+            counts[value] = counts.get(value, 0) + 1
+        for value, count in counts.items():
+            if count > 1:
+                yield {"_id": value, "count": count}
+
+    def aggregate(self, pipeline):
+        return self._aggregate(pipeline)
+
+    async def create_index(self, keys, name, unique):
+        self.indexes[name] = {"key": keys, "unique": unique}
+
+
+class _DocumentModel:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get_motor_collection(self):
+        return self.collection
+
+
+def test_unique_indexes_are_not_created_over_duplicates():
+    accounts = _DocumentModel(_Collection("user_accounts", ["a@mail.com", "b@mail.com", "a@mail.com"]))
+    workspaces = _DocumentModel(_Collection("workspaces", ["ws1", "ws2"]))
+    unique_indexes = [(accounts, "email"), (workspaces, "workspace_id")]
+    failed_indexes = run(db_create_unique_indexes(getLogger("tests.unique_indexes"), unique_indexes))
+    assert failed_indexes == [(accounts, "email")]
+    assert not accounts.collection.indexes
+    assert workspaces.collection.indexes["workspace_id_1"]["unique"]
@@ -0,0 +1,54 @@
+from asyncio import run
+from types import SimpleNamespace
+
+from beanie.odm.utils.encoder import Encoder
+from pytest import raises
+
+from operandi_utils.constants import StateJob, StateWorkspace
+from operandi_utils.database import DBUnitOfWork, DBWorkflowJob, DBWorkspace
+
+
+def test_unit_of_work_coalesces_updates_of_the_same_entry():
+    db_changes = DBUnitOfWork()
+    db_changes.stage_workflow_job_update(find_job_id="job-1", job_state=StateJob.TRANSFERRING_TO_HPC)
+    db_changes.stage_workspace_update(find_workspace_id="ws-1", state=StateWorkspace.TRANSFERRING_TO_HPC)
+    db_changes.stage_workflow_job_update(find_job_id="job-1", job_state=StateJob.PENDING)
+    db_changes.stage_workflow_job_update(find_job_id="job-2", job_state=StateJob.FAILED)
+    db_changes.stage_processing_stats_increase(find_user_id="user-1", pages_failed=2)
+    db_changes.stage_processing_stats_increase(find_user_id="user-1", pages_failed=3, pages_submitted=1)
+    assert len(db_changes) == 4
+
+    encoder = Encoder()
+    job_operations = [staged.to_operation(encoder) for staged in db_changes._staged[DBWorkflowJob]]
+    assert [operation._filter for operation in job_operations] == [{"job_id": "job-1"}, {"job_id": "job-2"}]
+    assert job_operations[0]._doc == {"$inc": {"version": 1}, "$set": {"job_state": StateJob.PENDING}}
+    stats_update = list(db_changes._staged_updates.values())[-1]
+    assert stats_update.inc_fields == {"pages_failed": 5, "pages_submitted": 1}
+
+
+def test_unit_of_work_rejects_invalid_changes():
+    db_changes = DBUnitOfWork()
+    with raises(ValueError):
+        db_changes.stage_workspace_update(find_workspace_id="ws-1", not_a_field=True)
+    with raises(ValueError):
+        db_changes.stage_workspace_update(find_workspace_id="ws-1", user_id="user-2")
+    with raises(ValueError):
+        db_changes.stage_processing_stats_increase(find_user_id="user-1", pages_failed=-1)
+    with raises(ValueError):
+        db_changes.stage_update(DBWorkspace, {"workspace_id": "ws-1"}, ["state"], inc_fields={"pages_amount": 1})
+    assert len(db_changes) == 0
+
+
+def test_unit_of_work_raises_on_unmatched_updates(monkeypatch):
+    class _Collection:
+        async def bulk_write(self, operations, ordered):
+            # The entry of the second update does not exist
+            return SimpleNamespace(inserted_count=0, matched_count=1, modified_count=1)
+
+    monkeypatch.setattr(DBWorkflowJob, "get_motor_collection", classmethod(lambda cls: _Collection()))
+    db_changes = DBUnitOfWork()
+    db_changes.stage_workflow_job_update(find_job_id="job-1", job_state=StateJob.SUCCESS)
+    db_changes.stage_workflow_job_update(find_job_id="job-2", job_state=StateJob.FAILED)
+    with raises(RuntimeError, match="DBWorkflowJob: 1 of 2"):
+        run(db_changes.flush())
+    assert len(db_changes) == 0
@@ -0,0 +1,92 @@
+from logging import getLogger
+
+from paramiko import SSHException
+from pytest import raises
+
+from operandi_utils.hpc import ssh_connection_pool
+from operandi_utils.hpc.ssh_connection_pool import SSHConnectionPool
+
+
+class _Channel:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _Transport:
+    def __init__(self):
+        self.active = True
+        self.probes = 0
+
+    def is_active(self):
+        return self.active
+
+    def send_ignore(self):
+        self.probes += 1
+        if not self.active:
+            raise EOFError("Transport closed")
+
+    def open_session(self):
+        if not self.active:
+            raise SSHException("SSH session not active")
+        return _Channel()
+
+
+class _SSHClient:
+    def __init__(self):
+        self.transport = _Transport()
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.transport.active = False
+
+
+def _ssh_connection_pool(monkeypatch, connect_results):
+    pool = SSHConnectionPool(
+        logger=getLogger("tests.ssh_connection_pool"), host="hpc.host", username="user", key_path="key",
+        probe_interval=0)
+    clients = []
+
+    def connect():
+        result = connect_results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        clients.append(result)
+        return result
+    monkeypatch.setattr(pool, "_connect", connect)
+    monkeypatch.setattr(ssh_connection_pool, "sleep", lambda _: None)
+    return pool, clients
+
+
+def test_ssh_connection_pool_reuses_transport(monkeypatch):
+    pool, clients = _ssh_connection_pool(monkeypatch, [_SSHClient()])
+    for _ in range(3):
+        with pool.open_session() as channel:
+            assert not channel.closed
+        assert channel.closed
+    assert len(clients) == 1
+    # The idle transport is probed before being reused
+    assert clients[0].transport.probes == 2
+
+
+def test_ssh_connection_pool_reconnects_dead_transport(monkeypatch):
+    pool, clients = _ssh_connection_pool(monkeypatch, [_SSHClient(), _SSHClient()])
+    first_transport = pool.get_transport()
+    # The connection is dropped silently, e.g., by a firewall
+    first_transport.active = False
+    with pool.open_session():
+        pass
+    assert len(clients) == 2
+    assert pool.get_transport() is clients[1].transport
+
+
+def test_ssh_connection_pool_retries_connecting(monkeypatch):
+    pool, clients = _ssh_connection_pool(monkeypatch, [OSError("Refused"), EOFError("Reset"), _SSHClient()])
+    assert pool.get_transport() is clients[0].transport
+    pool, _ = _ssh_connection_pool(monkeypatch, [OSError("Refused")] * pool.reconnect_tries)
+    with raises(ConnectionError):
+        pool.get_transport()
@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+
+from pytest import raises
+
+from operandi_utils.hpc import ssh_session_manager
+from operandi_utils.hpc.ssh_session_manager import get_ssh_session_manager, SSHSessionManager
+
+
+class _Channel:
+    def __init__(self, transport):
+        self.transport = transport
+        self.closed = False
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+
+
+class _SFTPClient:
+    def __init__(self, transport):
+        self.channel = _Channel(transport)
+
+    @classmethod
+    def from_transport(cls, transport):
+        return cls(transport)
+
+    def get_channel(self):
+        return self.channel
+
+    def close(self):
+        self.channel.close()
+
+
+class _ConnectionPool:
+    def __init__(self):
+        self.transport = object()
+        self.sessions_opened = 0
+
+    def get_transport(self):
+        return self.transport
+
+    @contextmanager
+    def open_session(self):
+        self.sessions_opened += 1
+        channel = _Channel(self.transport)
+        yield channel
+        channel.close()
+
+    def close(self):
+        pass
+
+
+def test_ssh_session_manager_multiplexes_channels(monkeypatch):
+    monkeypatch.setattr(ssh_session_manager, "SFTPClient", _SFTPClient)
+    connection_pool = _ConnectionPool()
+    session_manager = SSHSessionManager(connection_pool=connection_pool)
+    for _ in range(3):
+        with session_manager.exec_channel():
+            pass
+    with raises(RuntimeError):
+        with session_manager.exec_channel():
+            raise RuntimeError("Command failed")
+    sftp_client = session_manager.sftp_client
+    assert session_manager.sftp_client is sftp_client
+    # The SFTP client is reopened once the transport was replaced
+    connection_pool.transport = object()
+    assert session_manager.sftp_client is not sftp_client and sftp_client.channel.closed
+
+    metrics = session_manager.metrics()
+    assert connection_pool.sessions_opened == 4
+    assert (metrics["exec"]["opened"], metrics["exec"]["active"], metrics["exec"]["failed"]) == (4, 0, 0)
+    assert (metrics["sftp"]["opened"], metrics["sftp"]["active"]) == (2, 1)
+
+
+def test_ssh_session_manager_is_shared_within_a_process():
+    session_manager = get_ssh_session_manager(host="hpc.host", username="user", key_path="key")
+    assert get_ssh_session_manager(host="hpc.host", username="user", key_path="key") is session_manager
+    assert get_ssh_session_manager(host="hpc.host", username="other", key_path="key") is not session_manager
+    # A forked child process opens its own transport
+    ssh_session_manager._reset_session_managers_after_fork()
+    assert get_ssh_session_manager(host="hpc.host", username="user", key_path="key") is not session_manager
+    ssh_session_manager._reset_session_managers_after_fork()
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from os import close, pipe, write
+from threading import Event
+from time import monotonic
+
+from pytest import raises
+
+from operandi_utils.hpc import nhr_executor
+from operandi_utils.hpc.nhr_executor import NHRExecutor
+
+
+class _Channel:
+    """
+    Serves the outputs of a command, the command exits once both outputs are read unless it hangs
+    """
+    def __init__(self, stdout_chunks, stderr_chunks, exit_status=0, hangs=False):
+        self.stdout_chunks = list(stdout_chunks)
+        self.stderr_chunks = list(stderr_chunks)
+        self.exit_status = exit_status
+        self.hangs = hangs
+        self.status_event = Event()
+        self.closed = False
+        self._pipe_read, self._pipe_write = pipe()
+        if not hangs:
+            # Like the pipe of a paramiko channel, readable for good once the outputs are there
+            write(self._pipe_write, b"*")
+
+    @property
+    def eof_received(self):
+        return not self.hangs and not self.stdout_chunks and not self.stderr_chunks
+
+    def exec_command(self, command):
+        self.command = command
+        if not self.hangs:
+            self.status_event.set()
+
+    def shutdown_write(self):
+        pass
+
+    def fileno(self):
+        return self._pipe_read
+
+    def recv_ready(self):
+        return bool(self.stdout_chunks)
+
+    def recv(self, nbytes):
+        return self.stdout_chunks.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr_chunks)
+
+    def recv_stderr(self, nbytes):
+        return self.stderr_chunks.pop(0)
+
+    def exit_status_ready(self):
+        return self.status_event.is_set()
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+        close(self._pipe_read)
+        close(self._pipe_write)
+
+
+class _SessionManager:
+    def __init__(self, channels):
+        self.channels = channels
+
+    @contextmanager
+    def exec_channel(self):
+        channel = self.channels.pop(0)
+        try:
+            yield channel
+        finally:
+            channel.close()
+
+
+def _nhr_executor(channels) -> NHRExecutor:
+    executor = NHRExecutor.__new__(NHRExecutor)
+    executor.session_manager = _SessionManager(channels)
+    return executor
+
+
+def test_execute_blocking_returns_once_the_command_exits():
+    executor = _nhr_executor([_Channel([b"line 1\nline", b" 2\n"], [b"warning\n"], exit_status=3)])
+    start_time = monotonic()
+    output, err, return_code = executor.execute_blocking("command")
+    assert monotonic() - start_time < 0.5
+    assert (output, err, return_code) == (["line 1\n", "line 2\n"], ["warning\n"], 3)
+
+
+def test_execute_blocking_times_out_and_cancels(monkeypatch):
+    monkeypatch.setattr(nhr_executor, "HPC_SSH_COMMAND_POLL_INTERVAL", 0.01)
+    channel = _Channel([], [], hangs=True)
+    with raises(TimeoutError):
+        _nhr_executor([channel]).execute_blocking("command", timeout=0.05)
+    assert channel.closed
+    cancel_event = Event()
+    cancel_event.set()
+    with raises(InterruptedError):
+        _nhr_executor([_Channel([], [], hangs=True)]).execute_blocking("command", cancel_event=cancel_event)
+
+
+def test_execute_concurrently_keeps_the_order_of_the_commands():
+    channels = [_Channel([f"{index}\n".encode()], []) for index in range(4)]
+    results = _nhr_executor(channels).execute_concurrently([f"command {index}" for index in range(4)])
+    assert sorted(output[0] for output, _, _ in results) == ["0\n", "1\n", "2\n", "3\n"]
@@ -0,0 +1,91 @@
+from asyncio import gather, run
+from contextlib import contextmanager
+from threading import current_thread, Lock
+from time import sleep
+from types import SimpleNamespace
+
+from operandi_utils.hpc import nhr_async_client
+from operandi_utils.hpc.nhr_async_client import NHRAsyncClient
+
+
+class _SessionManager:
+    def __init__(self):
+        self.connection_pool = SimpleNamespace(host="hpc.host")
+        self.sftp_sessions = 0
+
+    @contextmanager
+    def sftp_session(self):
+        self.sftp_sessions += 1
+        yield f"sftp client {self.sftp_sessions}"
+
+
+class _Operations:
+    """
+    Stands for both NHRExecutor and NHRTransfer, tracks how many operations run at once
+    """
+    def __init__(self, slurm_job_states):
+        self.session_manager = _SessionManager()
+        self.slurm_job_states = list(slurm_job_states)
+        self.transferred = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = Lock()
+
+    def _operation(self):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        sleep(0.02)
+        with self._lock:
+            self.running -= 1
+
+    def check_slurm_job_state(self, slurm_job_id, tries, wait_time):
+        self._operation()
+        return self.slurm_job_states.pop(0)
+
+    def put_file(self, local_src, remote_dst, sftp_client):
+        self._operation()
+        self.transferred.append((local_src, remote_dst, sftp_client))
+
+
+def test_async_client_limits_concurrent_operations_per_host():
+    operations = _Operations(slurm_job_states=[None, "RUNNING"] + ["COMPLETED"] * 8)
+    clients = [NHRAsyncClient(executor=operations, transfer=operations, max_operations=3) for _ in range(2)]
+
+    async def keep_operations_in_flight():
+        # The first state check retries until the job is listed
+        first_state = await clients[0].check_slurm_job_state(slurm_job_id="1", wait_time=0)
+        results = await gather(
+            *[clients[index % 2].check_slurm_job_state(slurm_job_id=str(index)) for index in range(8)],
+            *[clients[index % 2].put_file(f"local_{index}", f"remote_{index}") for index in range(8)])
+        return first_state, results
+    first_state, results = run(keep_operations_in_flight())
+    for client in clients:
+        client.close()
+
+    assert first_state == "RUNNING"
+    assert results[:8] == ["COMPLETED"] * 8
+    # Both clients share the limit of the host
+    assert operations.max_running == 3
+    # Each transfer runs in its own SFTP session
+    assert len({sftp_client for _, _, sftp_client in operations.transferred}) == 8
+
+
+def test_async_client_connects_outside_of_event_loop(monkeypatch):
+    connecting_threads = []
+
+    def connect_operations():
+        # Stands for the blocking SSH connection of NHRExecutor and NHRTransfer
+        connecting_threads.append(current_thread())
+        return _Operations(slurm_job_states=[])
+
+    monkeypatch.setattr(nhr_async_client, "NHRExecutor", connect_operations)
+    monkeypatch.setattr(nhr_async_client, "NHRTransfer", connect_operations)
+
+    async def connect_client():
+        return await NHRAsyncClient.connect(max_operations=2), current_thread()
+    client, loop_thread = run(connect_client())
+    client.close()
+    assert len(connecting_threads) == 2
+    assert loop_thread not in connecting_threads
+    assert client.host == "hpc.host" and client.max_operations == 2
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from logging import getLogger
+from os import listdir
+from pathlib import Path
+from subprocess import PIPE, Popen
+
+from pytest import mark
+
+from operandi_utils.hpc.nhr_transfer import NHRTransfer
+
+
+class _LocalChannel:
+    """
+    Runs the commands of an exec channel locally, standing for the login node of the HPC
+    """
+    def exec_command(self, command):
+        self.process = Popen(["bash", "-c", command], stdin=PIPE, stdout=PIPE, stderr=PIPE)
+
+    def sendall(self, data):
+        self.process.stdin.write(data)
+
+    def shutdown_write(self):
+        if not self.process.stdin.closed:
+            self.process.stdin.close()
+
+    def makefile(self, mode):
+        return self.process.stdout
+
+    def makefile_stderr(self, mode):
+        return self.process.stderr
+
+    def recv_exit_status(self):
+        return self.process.wait()
+
+
+class _SessionManager:
+    @contextmanager
+    def exec_channel(self):
+        yield _LocalChannel()
+
+
+@mark.parametrize("compress", [False, True])
+def test_stream_slurm_workspace_round_trip(tmp_path, compress):
+    transfer = NHRTransfer.__new__(NHRTransfer)
+    transfer.logger = getLogger("tests.nhr_transfer_streaming")
+    transfer.session_manager = _SessionManager()
+    transfer.slurm_workspaces_dir = str(Path(tmp_path, "slurm_workspaces"))
+
+    ocrd_workspace_dir = Path(tmp_path, "workspaces", "workspace_id")
+    Path(ocrd_workspace_dir, "OCR-D-IMG").mkdir(parents=True)
+    Path(ocrd_workspace_dir, "mets.xml").write_text("<mets/>")
+    Path(ocrd_workspace_dir, "OCR-D-IMG", "page_1.png").write_bytes(b"\x89PNG")
+    nextflow_script_path = Path(tmp_path, "workflow.nf")
+    nextflow_script_path.write_text("nextflow.enable.dsl = 2")
+
+    hpc_workflow_job_dir = transfer.stream_slurm_workspace(
+        ocrd_workspace_dir=ocrd_workspace_dir, workflow_job_id="job_id", nextflow_script_path=nextflow_script_path,
+        compress=compress)
+    assert sorted(listdir(hpc_workflow_job_dir)) == ["workflow.nf", "workspace_id"]
+    assert Path(hpc_workflow_job_dir, "workspace_id", "OCR-D-IMG", "page_1.png").read_bytes() == b"\x89PNG"
+
+    # The results of the slurm job, including the zip archives which are not fetched when streaming
+    Path(hpc_workflow_job_dir, "workspace_id", "OCR-D-BIN").mkdir()
+    Path(hpc_workflow_job_dir, "workspace_id", "workspace_id.zip").write_bytes(b"zip")
+    Path(hpc_workflow_job_dir, "workspace_id", "mets_server.sock").write_bytes(b"")
+    Path(hpc_workflow_job_dir, "job_id.zip").write_bytes(b"zip")
+    Path(hpc_workflow_job_dir, "report.html").write_text("report")
+
+    workflow_job_dir = Path(tmp_path, "workflow_jobs", "job_id")
+    transfer.stream_and_unpack_slurm_workspace(
+        ocrd_workspace_dir=ocrd_workspace_dir, workflow_job_dir=workflow_job_dir, slurm_job_id="1",
+        compress=compress)
+    assert sorted(listdir(workflow_job_dir)) == ["report.html", "workflow.nf", "workspace_id"]
+    assert Path(workflow_job_dir, "workspace_id").resolve() == ocrd_workspace_dir.resolve()
+    assert sorted(listdir(ocrd_workspace_dir)) == ["OCR-D-BIN", "OCR-D-IMG", "mets.xml"]